@@ -0,0 +1,73 @@
+from kivy.clock import Clock
+from kivy.graphics import Color, Rectangle
+from kivy.uix.widget import Widget
+
+from audio_analysis import FLOOR_DB, db_to_unit
+
+
+class LevelSpectrumView(Widget):
+    """RMS/peak meters and a band spectrum drawn from an AnalysisTap.
+
+    The canvas instructions are created once; refresh() only moves and
+    resizes the existing rectangles. Refreshing is skipped while the widget
+    is not on screen.
+    """
+
+    REFRESH_INTERVAL = 1 / 30.0
+    # How fast bars and the peak-hold marker fall back, in dB per second.
+    FALL_DB_PER_S = 24.0
+    METER_WIDTH = 0.12
+    GAP = 2
+
+    def __init__(self, tap, **kwargs):
+        super().__init__(**kwargs)
+        self.tap = tap
+        self._bands = [FLOOR_DB] * len(tap.centers)
+        self._rms_db = self._peak_db = self._peak_hold = FLOOR_DB
+        with self.canvas:
+            Color(0.1, 0.1, 0.12, 1)
+            self._bg = Rectangle()
+            Color(0.2, 0.8, 0.4, 1)
+            self._rms_bar = Rectangle()
+            Color(0.9, 0.7, 0.2, 1)
+            self._peak_bar = Rectangle()
+            Color(1, 0.3, 0.3, 1)
+            self._hold_mark = Rectangle()
+            Color(0.2, 0.6, 0.8, 1)
+            self._band_bars = [Rectangle() for _ in self._bands]
+        self.bind(pos=self.refresh, size=self.refresh)
+        self._event = Clock.schedule_interval(self._tick, self.REFRESH_INTERVAL)
+
+    def _tick(self, dt):
+        if self.get_root_window() is None:
+            return
+        fall = self.FALL_DB_PER_S * dt
+        rms_db, peak_db = self.tap.levels()
+        self._peak_hold = max(peak_db, self._peak_hold - fall)
+        self._bands = [max(new, old - fall) for new, old in zip(self.tap.spectrum(), self._bands)]
+        self._rms_db, self._peak_db = rms_db, peak_db
+        self.refresh()
+
+    def refresh(self, *args):
+        x, y = self.pos
+        width, height = self.size
+        gap = self.GAP
+        self._bg.pos = self.pos
+        self._bg.size = self.size
+
+        meter_w = max(1, (width * self.METER_WIDTH - gap) / 2)
+        self._rms_bar.pos = (x, y)
+        self._rms_bar.size = (meter_w, height * db_to_unit(self._rms_db))
+        self._peak_bar.pos = (x + meter_w + gap, y)
+        self._peak_bar.size = (meter_w, height * db_to_unit(self._peak_db))
+        self._hold_mark.pos = (x + meter_w + gap, y + height * db_to_unit(self._peak_hold) - 1)
+        self._hold_mark.size = (meter_w, 2)
+
+        left = x + width * self.METER_WIDTH + gap
+        band_w = (x + width - left) / len(self._band_bars)
+        for i, (bar, db) in enumerate(zip(self._band_bars, self._bands)):
+            bar.pos = (left + i * band_w, y)
+            bar.size = (max(1, band_w - gap), height * db_to_unit(db))
+
+    def stop(self):
+        self._event.cancel()
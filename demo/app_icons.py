@@ -0,0 +1,312 @@
+import glob
+import hashlib
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from app_tasks import detach_jvm
+from perf import perf
+
+
+ICON_SIZE = 96
+# Version of packages the platform can't describe (and of all desktop placeholders).
+UNKNOWN_VERSION = '0'
+
+
+def _png(width, height, rgba):
+    """Encode RGBA bytes as a PNG."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    stride = width * 4
+    raw = b''.join(b'\x00' + rgba[y * stride:(y + 1) * stride] for y in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 6))
+            + chunk(b'IEND', b''))
+
+
+def placeholder_icon(package, size=ICON_SIZE):
+    """A framed square in a colour derived from the package name."""
+    r, g, b = hashlib.md5(package.encode()).digest()[:3]
+    inset = size // 8
+    edge = bytes((r, g, b, 255))
+    inner = bytes((min(255, r + 60), min(255, g + 60), min(255, b + 60), 255))
+    clear = bytes(4)
+    rows = []
+    for y in range(size):
+        if y < inset // 2 or y >= size - inset // 2:
+            rows.append(clear * size)
+        elif inset <= y < size - inset:
+            rows.append(clear * (inset // 2) + edge * (inset - inset // 2) + inner * (size - 2 * inset)
+                        + edge * (inset - inset // 2) + clear * (inset // 2))
+        else:
+            rows.append(clear * (inset // 2) + edge * (size - 2 * (inset // 2)) + clear * (inset // 2))
+    return _png(size, size, b''.join(rows))
+
+
+def placeholder_label(package):
+    return package.rsplit('.', 1)[-1].replace('_', ' ').title()
+
+
+class PackageSource:
+    """Labels, versions and icons of installed packages.
+
+    Uses Android's PackageManager through pyjnius when available and
+    generated placeholders otherwise, so the whole loading path runs on
+    desktop too.
+    """
+
+    def __init__(self, size=ICON_SIZE):
+        self.size = size
+        self._pm = None
+        try:
+            from jnius import autoclass
+        except ImportError:
+            return
+        try:
+            activity = autoclass('org.kivy.android.PythonActivity').mActivity
+            self._pm = activity.getPackageManager()
+            self._autoclass = autoclass
+        except Exception as e:
+            print(f"Error opening PackageManager: {e}")
+
+    def version(self, package):
+        """Version string used to key the disk cache; cheap compared with describe()."""
+        if self._pm is None:
+            return UNKNOWN_VERSION
+        try:
+            info = self._pm.getPackageInfo(package, 0)
+            code = info.getLongVersionCode() if hasattr(info, 'getLongVersionCode') else info.versionCode
+            return f'{code}-{info.lastUpdateTime}'
+        except Exception:
+            return UNKNOWN_VERSION
+
+    def describe(self, package):
+        """(label, PNG bytes of the icon) for a package."""
+        if self._pm is None:
+            return placeholder_label(package), placeholder_icon(package, self.size)
+        autoclass = self._autoclass
+        info = self._pm.getApplicationInfo(package, 0)
+        label = str(self._pm.getApplicationLabel(info))
+        drawable = self._pm.getApplicationIcon(info)
+        Bitmap = autoclass('android.graphics.Bitmap')
+        bitmap = Bitmap.createBitmap(self.size, self.size, autoclass('android.graphics.Bitmap$Config').ARGB_8888)
+        drawable.setBounds(0, 0, self.size, self.size)
+        drawable.draw(autoclass('android.graphics.Canvas')(bitmap))
+        stream = autoclass('java.io.ByteArrayOutputStream')()
+        bitmap.compress(autoclass('android.graphics.Bitmap$CompressFormat').PNG, 100, stream)
+        data = stream.toByteArray()
+        data = data.tostring() if hasattr(data, 'tostring') else bytes(b & 0xFF for b in data)
+        bitmap.recycle()
+        return label, data
+
+
+class IconCache:
+    """Size-bounded LRU of icon textures keyed by package."""
+
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.evictions = 0
+
+    def get(self, package):
+        entry = self._entries.get(package)
+        if entry is not None:
+            self._entries.move_to_end(package)
+        return entry
+
+    def put(self, package, label, texture):
+        old = self._entries.pop(package, None)
+        if old is not None:
+            self.bytes -= old[1].width * old[1].height * 4
+        self._entries[package] = (label, texture)
+        self.bytes += texture.width * texture.height * 4
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= evicted.width * evicted.height * 4
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def held_bytes(self, shown=()):
+        """Bytes of the cached textures plus those in shown, each texture counted once."""
+        textures = {id(texture): texture for _, texture in self._entries.values()}
+        textures.update((id(texture), texture) for texture in shown)
+        return sum(texture.width * texture.height * 4 for texture in textures.values())
+
+
+class AppIconLoader:
+    """Loads app labels and icons for the rows currently on screen.
+
+    request() answers from the texture LRU straight away. Otherwise the
+    package is queued for a background thread, which reads the thumbnail
+    from the disk cache (keyed by package and version) or fetches and
+    stores it, and decodes the PNG to pixels. Textures are only created on
+    the UI thread, which owns the GL context. Requests for rows scrolled
+    out of view before their turn are skipped, and the newest requests are
+    served first.
+    """
+
+    def __init__(self, cache_dir, source=None, max_bytes=4 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.source = source or PackageSource()
+        self.cache = IconCache(max_bytes)
+        self._pending = OrderedDict()
+        # Popped by the thread but not yet delivered to the UI.
+        self._inflight = set()
+        self._wanted = None
+        self._results = []
+        self._cond = threading.Condition()
+        self._closing = False
+        self._thread = None
+        self.counts = {'memory_hits': 0, 'disk_hits': 0, 'fetches': 0, 'skipped': 0, 'errors': 0}
+        self.decode_s = 0.0
+        self.fetch_s = 0.0
+
+    def request(self, package, callback):
+        """callback(package, label, texture) on the UI thread; returns True if answered now."""
+        entry = self.cache.get(package)
+        if entry is not None:
+            self._count('memory_hits')
+            callback(package, *entry)
+            return True
+        with self._cond:
+            if package in self._inflight:
+                return False
+            self._pending.pop(package, None)
+            self._pending[package] = callback
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='app-icons', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return False
+
+    def set_visible(self, packages):
+        """Only rows in packages are still worth loading."""
+        with self._cond:
+            self._wanted = set(packages)
+
+    def _next(self):
+        with self._cond:
+            while True:
+                while self._pending:
+                    package, callback = self._pending.popitem(last=True)
+                    if self._wanted is None or package in self._wanted:
+                        self._inflight.add(package)
+                        return package, callback
+                    self._count('skipped')
+                if self._closing:
+                    return None
+                self._cond.wait()
+
+    def _thumbnail(self, package):
+        """(label, path) of the cached thumbnail, fetching it on a miss."""
+        key = f'{package}-{self.source.version(package)}'
+        path = os.path.join(self.cache_dir, key + '.png')
+        label_path = os.path.join(self.cache_dir, key + '.txt')
+        if os.path.exists(path) and os.path.exists(label_path):
+            with open(label_path, encoding='utf-8') as f:
+                self._count('disk_hits')
+                return f.read(), path
+        start = time.perf_counter()
+        label, data = self.source.describe(package)
+        self.fetch_s += time.perf_counter() - start
+        for target, payload, mode in ((path, data, 'wb'), (label_path, label.encode('utf-8'), 'wb')):
+            tmp = target + '.tmp'
+            with open(tmp, mode) as f:
+                f.write(payload)
+            os.replace(tmp, target)
+        self._remove_stale(package, key)
+        self._count('fetches')
+        return label, path
+
+    def _remove_stale(self, package, key):
+        """Delete thumbnails of other versions of package."""
+        for path in glob.glob(os.path.join(glob.escape(self.cache_dir), f'{glob.escape(package)}-*')):
+            if os.path.splitext(os.path.basename(path))[0] != key:
+                os.remove(path)
+
+    def _run(self):
+        try:
+            self._load_loop()
+        finally:
+            # PackageSource calls pyjnius from this thread.
+            detach_jvm()
+
+    def _load_loop(self):
+        from kivy.clock import Clock
+        from kivy.core.image import ImageLoader
+
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            package, callback = item
+            try:
+                label, path = self._thumbnail(package)
+                start = time.perf_counter()
+                # Decoding doesn't touch GL; only the ImageData (pixels,
+                # size and format) goes to the UI thread, never the loader.
+                pixels = ImageLoader.load(path, keep_data=True, nocache=True)._data[0]
+                elapsed = time.perf_counter() - start
+                self.decode_s += elapsed
+                perf.record('icons.decode', elapsed)
+            except Exception as e:
+                self._count('errors')
+                print(f"Error loading icon for {package}: {e}")
+                with self._cond:
+                    self._inflight.discard(package)
+                continue
+            with self._cond:
+                self._results.append((package, label, pixels, callback))
+                first = len(self._results) == 1
+            if first:
+                Clock.schedule_once(self._deliver, 0)
+
+    @perf.timed('icons.deliver')
+    def _deliver(self, dt):
+        from kivy.graphics.texture import Texture
+
+        with self._cond:
+            results, self._results = self._results, []
+            self._inflight.difference_update(package for package, _, _, _ in results)
+        for package, label, pixels, callback in results:
+            # The only GL work: upload the decoded pixels.
+            texture = Texture.create_from_data(pixels)
+            if pixels.flip_vertical:
+                texture.flip_vertical()
+            self.cache.put(package, label, texture)
+            callback(package, label, texture)
+
+    def _count(self, name):
+        with self._cond:
+            self.counts[name] += 1
+        perf.count(f'icons.{name}')
+
+    def close(self):
+        with self._cond:
+            self._closing = True
+            self._pending.clear()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+
+    def stats(self):
+        counts = self.counts
+        lookups = counts['memory_hits'] + counts['disk_hits'] + counts['fetches']
+        return dict(counts,
+                    memory_hit_rate=counts['memory_hits'] / lookups if lookups else 0.0,
+                    disk_hit_rate=counts['disk_hits'] / lookups if lookups else 0.0,
+                    resident_bytes=self.cache.bytes,
+                    evictions=self.cache.evictions,
+                    fetch_ms=self.fetch_s * 1000,
+                    decode_ms=self.decode_s * 1000)
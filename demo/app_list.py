@@ -0,0 +1,157 @@
+from kivy.clock import Clock
+from kivy.graphics import Color, Rectangle
+from kivy.properties import ObjectProperty, StringProperty
+from kivy.uix.button import Button
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+
+from perf import perf
+
+
+class AppRow(RecycleDataViewBehavior, Button):
+    """A recycled package button showing the label and icon loaded for its item."""
+
+    package = StringProperty('')
+    icon = ObjectProperty(None, allownone=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.list_view = None
+        self.index = None
+        with self.canvas.after:
+            Color(1, 1, 1, 1)
+            self._icon = Rectangle(size=(0, 0))
+        self.fbind('pos', self._place_icon)
+        self.fbind('size', self._place_icon)
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.list_view = rv
+        self.index = index
+        super().refresh_view_attrs(rv, index, data)
+        self.sync()
+
+    def sync(self):
+        """Show the label and icon the list holds for this row's item."""
+        self.text = self.list_view.label(self.index)
+        self.icon = self.list_view.icon(self.index)
+
+    def on_icon(self, instance, texture):
+        self._icon.texture = texture
+        self._place_icon()
+
+    def on_parent(self, instance, parent):
+        # Views scrolled out are kept in Kivy's view cache; don't let them
+        # hold on to an icon. One put back for the same item isn't refreshed
+        # by the RecycleView, so it catches up here.
+        if parent is None:
+            self.icon = None
+        elif self.list_view is not None:
+            self.sync()
+
+    def on_press(self):
+        if self.list_view is not None:
+            self.list_view.on_select(self)
+
+    def _place_icon(self, *args):
+        if self._icon.texture is None:
+            self._icon.size = (0, 0)
+            return
+        side = self.height - 10
+        self._icon.size = (side, side)
+        self._icon.pos = (self.x + 8, self.y + 5)
+
+
+class AppListView(RecycleView):
+    """Scrollable package list that loads labels and icons for visible rows only.
+
+    The list is a RecycleView: each package is a data item, and only the
+    rows on screen (plus Kivy's small view cache) exist as widgets, however
+    many packages there are. Labels and icons are kept beside the data and
+    pushed to the row showing them: changing data makes the RecycleView lay
+    out every item again. Rows have a fixed height, so the visible index
+    range follows directly from scroll_y; a few items beyond each edge are
+    requested ahead of time. Items outside that range drop their icon
+    textures, so the loader's LRU holds the only reference to everything
+    off screen and its size bound is what stays resident.
+    """
+
+    def __init__(self, packages, loader, on_select, row_height=50, spacing=5, prefetch_rows=4, **kwargs):
+        super().__init__(**kwargs)
+        self.loader = loader
+        self.on_select = on_select
+        self.row_height = row_height
+        self.spacing = spacing
+        self.prefetch_rows = prefetch_rows
+        layout = RecycleBoxLayout(orientation='vertical', spacing=spacing, size_hint_y=None,
+                                  default_size=(None, row_height), default_size_hint=(1, None))
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        self.viewclass = AppRow
+        self.packages = list(packages)
+        self.data = [{'package': package, 'background_color': (0.2, 0.6, 0.8, 1)} for package in self.packages]
+        self._index = {package: i for i, package in enumerate(self.packages)}
+        # Loaded labels by index; icons only for items in the visible range.
+        self._labels = {}
+        self._icons = {}
+        self._wanted = set()
+        # Scrolling fires many times per frame; look at the visible range once per frame.
+        self._trigger_visible = Clock.create_trigger(self.load_visible)
+        self.fbind('scroll_y', self._trigger_visible)
+        self.fbind('height', self._trigger_visible)
+        layout.fbind('height', self._trigger_visible)
+
+    def visible_range(self):
+        """Indices of the items on screen, widened by prefetch_rows."""
+        pitch = self.row_height + self.spacing
+        hidden = max(0.0, self.layout_manager.height - self.height)
+        top = (1.0 - self.scroll_y) * hidden
+        first = int(top // pitch) - self.prefetch_rows
+        last = int((top + self.height) // pitch) + self.prefetch_rows
+        return range(max(0, first), min(len(self.data), last + 1))
+
+    @perf.timed('ui.app_list.visible')
+    def load_visible(self, *args):
+        visible = self.visible_range()
+        self._wanted = set(visible)
+        for index in [index for index in self._icons if index not in self._wanted]:
+            self._set_icon(index, None)
+        self.loader.set_visible(self.packages[i] for i in visible)
+        for index in visible:
+            if index not in self._icons:
+                self.loader.request(self.packages[index], self._on_loaded)
+
+    def label(self, index):
+        return self._labels.get(index, self.packages[index])
+
+    def icon(self, index):
+        return self._icons.get(index)
+
+    def loaded_count(self):
+        """Items currently holding an icon."""
+        return len(self._icons)
+
+    def icon_textures(self):
+        return list(self._icons.values())
+
+    def release_icons(self):
+        """Drop every item's icon texture; items in view load theirs again on the next tick."""
+        for index in list(self._icons):
+            self._set_icon(index, None)
+        self._trigger_visible()
+
+    def _set_icon(self, index, texture):
+        if texture is None:
+            self._icons.pop(index, None)
+        else:
+            self._icons[index] = texture
+        view = self.view_adapter.views.get(index)
+        if view is not None:
+            view.sync()
+
+    def _on_loaded(self, package, label, texture):
+        index = self._index.get(package)
+        # A load that finished after its item scrolled away isn't kept.
+        if index is not None and index in self._wanted:
+            self._labels[index] = label
+            self._set_icon(index, texture)
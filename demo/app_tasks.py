@@ -0,0 +1,121 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from perf import perf
+
+
+def detach_jvm():
+    """Detach the calling thread from the JVM, if it runs on Android.
+
+    pyjnius attaches a thread on its first Java call; a thread that exits
+    still attached leaks its JNI environment or aborts the process.
+    """
+    try:
+        from jnius import detach
+    except ImportError:
+        return
+    detach()
+
+
+def _call(func, args):
+    # Pool threads come and go with the executor, so each job detaches
+    # when it's done; the next Java call attaches again.
+    try:
+        return func(*args)
+    finally:
+        detach_jvm()
+
+
+class TaskRunner:
+    """Runs blocking jobs on a thread pool from the app's asyncio loop.
+
+    run(key, func, *args, on_done=callback) submits func(*args) to the pool
+    and calls callback(result) back on the loop's thread, which under
+    App.async_run() is the UI thread. A newer job with the same key cancels
+    the older one: a job still queued never runs, and one already running
+    finishes but its result is dropped. The newer job starts only after
+    that, so jobs sharing a key never overlap and can write the same files.
+
+    Without a running loop (the app started with App.run()) jobs run inline,
+    as they did before.
+    """
+
+    def __init__(self, max_workers=2):
+        self.max_workers = max_workers
+        self._executor = None
+        # key -> the job's asyncio task; key -> the last pool future started.
+        self._tasks = {}
+        self._running = {}
+        self.counts = {'started': 0, 'completed': 0, 'cancelled': 0, 'errors': 0, 'inline': 0}
+
+    def run(self, key, func, *args, on_done=None):
+        """Start func(*args) under key; returns the asyncio task, or None if run inline."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._count('inline')
+            try:
+                result = func(*args)
+            except Exception as e:
+                self._count('errors')
+                print(f"Error in task {key}: {e}")
+                return None
+            if on_done is not None:
+                on_done(result)
+            return None
+        self.cancel(key)
+        task = self._tasks[key] = loop.create_task(self._job(key, func, args, on_done))
+        return task
+
+    async def _job(self, key, func, args, on_done):
+        previous = self._running.get(key)
+        if previous is not None and not previous.done():
+            # A cancelled job that was already running; let it finish first.
+            await asyncio.wait([asyncio.wrap_future(previous)])
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='app-task')
+        future = self._running[key] = self._executor.submit(_call, func, args)
+        self._count('started')
+        try:
+            result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self._count('errors')
+            print(f"Error in task {key}: {e}")
+            return
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+        self._count('completed')
+        if on_done is not None:
+            with perf.span(f'tasks.{key}.done'):
+                on_done(result)
+
+    def pending(self, key):
+        return key in self._tasks
+
+    def cancel(self, key):
+        """Drop the job under key; returns True if there was one."""
+        task = self._tasks.pop(key, None)
+        if task is None:
+            return False
+        task.cancel()
+        self._count('cancelled')
+        return True
+
+    def close(self):
+        """Cancel every job and stop the pool without waiting for running ones."""
+        for key in list(self._tasks):
+            self.cancel(key)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _count(self, name):
+        self.counts[name] += 1
+        perf.count(f'tasks.{name}')
+
+    def stats(self):
+        return dict(self.counts, pending=len(self._tasks))
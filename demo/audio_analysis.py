@@ -0,0 +1,160 @@
+import array
+import math
+import sys
+import threading
+from collections import deque
+
+from perf import perf
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+MIN_BANDS = 32
+MAX_BANDS = 64
+# Levels below this are drawn as silence.
+FLOOR_DB = -72.0
+
+
+def to_db(amplitude):
+    return 20.0 * math.log10(amplitude) if amplitude > 1e-9 else FLOOR_DB
+
+
+def hann(length):
+    """Hann window scaled so a full-scale int16 sine reads 0 dBFS."""
+    window = [0.5 - 0.5 * math.cos(2.0 * math.pi * i / (length - 1)) for i in range(length)]
+    gain = 2.0 / (sum(window) * 32768.0)
+    return [w * gain for w in window]
+
+
+def db_to_unit(db):
+    """Map dBFS onto 0..1 for drawing, FLOOR_DB being 0."""
+    return min(1.0, max(0.0, 1.0 - db / FLOOR_DB))
+
+
+class AnalysisTap:
+    """Level meter and band spectrum fed from the DSP output.
+
+    feed() runs on the processing path and only does cheap work: block
+    RMS/peak and decimating into a short history. spectrum() analyses the
+    newest history block on demand (normally once per UI refresh) with a
+    precomputed window and an rfft band plan, or a constant-Q Goertzel bank
+    at the band centres when NumPy isn't available. All levels are in dBFS.
+    """
+
+    def __init__(self, sample_rate=44100, bands=32, block_size=512, decimation=4, min_freq=50.0):
+        if not MIN_BANDS <= bands <= MAX_BANDS:
+            raise ValueError(f"bands must be within [{MIN_BANDS}, {MAX_BANDS}], got {bands}")
+        self.sample_rate = sample_rate
+        self.decimation = decimation
+        self.rate = sample_rate / decimation
+        self.block_size = block_size
+        self.rms_db = FLOOR_DB
+        self.peak_db = FLOOR_DB
+        self.blocks = 0
+
+        # Log-spaced band centres from min_freq to just under the decimated Nyquist.
+        top = self.rate * 0.45
+        ratio = (top / min_freq) ** (1.0 / (bands - 1))
+        self.centers = [min_freq * ratio ** i for i in range(bands)]
+        self.edges = [c / math.sqrt(ratio) for c in self.centers] + [self.centers[-1] * math.sqrt(ratio)]
+
+        if np is not None:
+            self._np_window = np.array(hann(block_size))
+            bin_hz = self.rate / block_size
+            self._plan = []
+            for lo, hi in zip(self.edges, self.edges[1:]):
+                first = min(block_size // 2, int(round(lo / bin_hz)))
+                self._plan.append((first, max(first + 1, int(round(hi / bin_hz)))))
+        else:
+            # Constant-Q bank: each band looks at the newest samples only as far
+            # back as its bandwidth needs, so the filter spans the whole band
+            # and the high bands cost a fraction of a full block.
+            self._bank = []
+            for center, lo, hi in zip(self.centers, self.edges, self.edges[1:]):
+                length = min(block_size, max(16, int(round(self.rate / (hi - lo)))))
+                coeff = 2.0 * math.cos(2.0 * math.pi * center / self.rate)
+                self._bank.append((length, coeff, hann(length)))
+
+        self._history = deque(maxlen=block_size)
+        self._carry = array.array('h')
+        self._fresh = False
+        self._spectrum = [FLOOR_DB] * bands
+        self._lock = threading.Lock()
+
+    @property
+    def uses_numpy(self):
+        return np is not None
+
+    def feed(self, audio_data):
+        """Take one block of 16-bit mono PCM (bytes or array('h'))."""
+        if isinstance(audio_data, array.array):
+            samples = audio_data
+        else:
+            samples = array.array('h')
+            samples.frombytes(audio_data)
+        if not samples:
+            return
+        peak = max(max(samples), -min(samples))
+        rms = math.sqrt(sum(s * s for s in samples) / len(samples))
+        self.peak_db = to_db(peak / 32768.0)
+        self.rms_db = to_db(rms / 32768.0)
+        self.blocks += 1
+
+        # Box-filter decimation; leftover samples carry into the next block.
+        step = self.decimation
+        if self._carry:
+            samples = self._carry + samples
+        usable = len(samples) - len(samples) % step
+        self._carry = samples[usable:]
+        decimated = [sum(samples[i:i + step]) / step for i in range(0, usable, step)]
+        with self._lock:
+            self._history.extend(decimated)
+            self._fresh = True
+
+    def levels(self):
+        return self.rms_db, self.peak_db
+
+    def spectrum(self):
+        """Band levels in dBFS for the newest block; cached until new audio arrives."""
+        with self._lock:
+            if not self._fresh or len(self._history) < self.block_size:
+                return self._spectrum
+            block = list(self._history)
+            self._fresh = False
+        with perf.span('dsp.analysis'):
+            if np is not None:
+                magnitudes = self._analyze_fft(block)
+            else:
+                magnitudes = self._analyze_goertzel(block)
+        self._spectrum = [to_db(m) for m in magnitudes]
+        return self._spectrum
+
+    def _analyze_fft(self, block):
+        spectrum = np.abs(np.fft.rfft(np.asarray(block) * self._np_window))
+        return [float(spectrum[first:last].max()) for first, last in self._plan]
+
+    def _analyze_goertzel(self, block):
+        magnitudes = []
+        for length, coeff, window in self._bank:
+            s1 = s2 = 0.0
+            for x, w in zip(block[-length:], window):
+                s1, s2 = x * w + coeff * s1 - s2, s1
+            power = s1 * s1 + s2 * s2 - coeff * s1 * s2
+            magnitudes.append(math.sqrt(max(power, 0.0)))
+        return magnitudes
+
+    def resident_bytes(self):
+        """Bytes held by the sample history and carry buffers."""
+        return (sys.getsizeof(self._history) + len(self._history) * sys.getsizeof(0)
+                + self._carry.itemsize * len(self._carry))
+
+    def reset(self):
+        with self._lock:
+            self._history.clear()
+            self._carry = array.array('h')
+            self._fresh = False
+        self.rms_db = self.peak_db = FLOOR_DB
+        self._spectrum = [FLOOR_DB] * len(self.centers)
@@ -0,0 +1,84 @@
+import os
+
+
+# Used off-device, and on Android if the platform doesn't report a value.
+DEFAULT_SAMPLE_RATE = 44100
+DEFAULT_FRAMES_PER_BUFFER = 256
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 192000
+
+
+class OutputConfig:
+    """Native output format of the audio device.
+
+    Rendering and processing at sample_rate, in blocks that are whole
+    multiples of frames_per_buffer (the mixer's burst size), lets the OS
+    play our audio without resampling or re-buffering it.
+    """
+
+    def __init__(self, sample_rate, frames_per_buffer, source):
+        if not MIN_SAMPLE_RATE <= sample_rate <= MAX_SAMPLE_RATE:
+            raise ValueError(f"sample_rate must be within [{MIN_SAMPLE_RATE}, {MAX_SAMPLE_RATE}], got {sample_rate}")
+        if frames_per_buffer < 1:
+            raise ValueError(f"frames_per_buffer must be positive, got {frames_per_buffer}")
+        self.sample_rate = sample_rate
+        self.frames_per_buffer = frames_per_buffer
+        # 'override', 'android' or 'default'.
+        self.source = source
+
+    def block_size(self, target):
+        """The multiple of frames_per_buffer closest to target samples."""
+        return max(1, round(target / self.frames_per_buffer)) * self.frames_per_buffer
+
+    def __repr__(self):
+        return f'OutputConfig({self.sample_rate} Hz, {self.frames_per_buffer} frames, {self.source})'
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Error reading {name}: {value!r} is not an integer")
+        return None
+
+
+def _android_output():
+    """(sample_rate, frames_per_buffer) reported by AudioManager, or None off-device."""
+    try:
+        from jnius import autoclass
+    except ImportError:
+        return None
+    try:
+        PythonActivity = autoclass('org.kivy.android.PythonActivity')
+        Context = autoclass('android.content.Context')
+        AudioManager = autoclass('android.media.AudioManager')
+        manager = PythonActivity.mActivity.getSystemService(Context.AUDIO_SERVICE)
+        rate = manager.getProperty(AudioManager.PROPERTY_OUTPUT_SAMPLE_RATE)
+        frames = manager.getProperty(AudioManager.PROPERTY_OUTPUT_FRAMES_PER_BUFFER)
+        return (int(rate) if rate else None, int(frames) if frames else None)
+    except Exception as e:
+        print(f"Error querying audio output: {e}")
+        return None
+
+
+def detect_output(sample_rate=None, frames_per_buffer=None):
+    """Find the native output rate and burst size.
+
+    Explicit arguments win, then the CYN_SAMPLE_RATE and CYN_FRAMES_PER_BUFFER
+    environment variables (for desktop tests of other rates), then what
+    Android's AudioManager reports, then the defaults.
+    """
+    sample_rate = sample_rate or _env_int('CYN_SAMPLE_RATE')
+    frames_per_buffer = frames_per_buffer or _env_int('CYN_FRAMES_PER_BUFFER')
+    source = 'override' if sample_rate or frames_per_buffer else 'default'
+    if not (sample_rate and frames_per_buffer):
+        native = _android_output()
+        if native is not None:
+            sample_rate = sample_rate or native[0]
+            frames_per_buffer = frames_per_buffer or native[1]
+            source = 'android'
+    return OutputConfig(sample_rate or DEFAULT_SAMPLE_RATE,
+                        frames_per_buffer or DEFAULT_FRAMES_PER_BUFFER, source)
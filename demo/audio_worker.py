@@ -0,0 +1,409 @@
+import array
+import math
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+from audio_analysis import FLOOR_DB, AnalysisTap
+from dsp_scheduler import QualityScheduler
+from perf import perf
+from voice_engine import VoiceChangerEngine
+
+
+# Engine attributes the UI may change; everything else stays in the worker.
+VOICE_PARAMS = ('pitch_shift', 'speed', 'volume', 'bass', 'mid', 'treble',
+                'reverb_amount', 'echo_amount', 'distortion', 'current_preset')
+
+# Ring buffer: producer and consumer sample counters, then int16 samples.
+# Each counter is only ever written by one side, so no lock is needed.
+RING_HEADER = struct.Struct('<QQ')
+# Meters: a sequence number (odd while being written), blocks processed,
+# blocks dropped because the output ring was full, deadline misses, the
+# quality level and how often it changed, seconds spent in DSP, rms and
+# peak in dBFS, then one dBFS value per band.
+METERS_HEADER = struct.Struct('<QQQQQQddd')
+_UNSET = object()
+
+
+def free_threaded():
+    """True on a Python build running without the GIL."""
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+class RingBuffer:
+    """Single-producer, single-consumer int16 ring over shared memory."""
+
+    def __init__(self, buf, capacity):
+        self.capacity = capacity
+        self.header = buf[:RING_HEADER.size]
+        self.data = buf[RING_HEADER.size:RING_HEADER.size + capacity * 2].cast('h')
+
+    @staticmethod
+    def size_for(capacity):
+        return RING_HEADER.size + capacity * 2
+
+    def available(self):
+        written, read = RING_HEADER.unpack(self.header)
+        return written - read
+
+    def write(self, samples):
+        """Append an array('h') in full, or return False if it doesn't fit."""
+        written, read = RING_HEADER.unpack(self.header)
+        count = len(samples)
+        if count > self.capacity - (written - read):
+            return False
+        start = written % self.capacity
+        first = min(count, self.capacity - start)
+        source = memoryview(samples)
+        self.data[start:start + first] = source[:first]
+        if first < count:
+            self.data[:count - first] = source[first:]
+        # Publish only after the samples are in place.
+        struct.pack_into('<Q', self.header, 0, written + count)
+        return True
+
+    def read(self, max_samples):
+        """Remove and return up to max_samples as array('h')."""
+        written, read = RING_HEADER.unpack(self.header)
+        count = min(max_samples, written - read)
+        samples = array.array('h')
+        if count <= 0:
+            return samples
+        start = read % self.capacity
+        first = min(count, self.capacity - start)
+        samples.frombytes(self.data[start:start + first].tobytes())
+        if first < count:
+            samples.frombytes(self.data[:count - first].tobytes())
+        struct.pack_into('<Q', self.header, 8, read + count)
+        return samples
+
+
+class SharedMeters:
+    """Latest levels, spectrum and worker counters, published with a seqlock."""
+
+    def __init__(self, buf, bands):
+        self.buf = buf
+        self.bands = struct.Struct(f'<{bands}d')
+
+    @staticmethod
+    def size_for(bands):
+        return METERS_HEADER.size + bands * 8
+
+    def publish(self, counters, busy_s, rms_db, peak_db, spectrum):
+        """counters is (blocks, dropped, misses, level, level_changes)."""
+        seq = struct.unpack_from('<Q', self.buf, 0)[0]
+        struct.pack_into('<Q', self.buf, 0, seq + 1)
+        METERS_HEADER.pack_into(self.buf, 0, seq + 1, *counters, busy_s, rms_db, peak_db)
+        self.bands.pack_into(self.buf, METERS_HEADER.size, *spectrum)
+        struct.pack_into('<Q', self.buf, 0, seq + 2)
+
+    def snapshot(self):
+        """(counters, busy_s, rms_db, peak_db, spectrum) from one consistent write."""
+        while True:
+            seq, *values = METERS_HEADER.unpack_from(self.buf, 0)
+            spectrum = list(self.bands.unpack_from(self.buf, METERS_HEADER.size))
+            if not seq & 1 and struct.unpack_from('<Q', self.buf, 0)[0] == seq:
+                return tuple(values[:5]), values[5], values[6], values[7], spectrum
+            time.sleep(0)
+
+
+class _Layout:
+    """Offsets of the input ring, output ring and meters in the shared file."""
+
+    def __init__(self, ring_capacity, bands):
+        self.ring_capacity = ring_capacity
+        self.bands = bands
+        ring_size = RingBuffer.size_for(ring_capacity)
+        # Keep every region 8-byte aligned for the counters.
+        ring_size += -ring_size % 8
+        self.input_offset = 0
+        self.output_offset = ring_size
+        self.meters_offset = 2 * ring_size
+        self.size = self.meters_offset + SharedMeters.size_for(bands)
+
+    def attach(self, buf):
+        view = memoryview(buf)
+        return (RingBuffer(view[self.input_offset:self.output_offset], self.ring_capacity),
+                RingBuffer(view[self.output_offset:self.meters_offset], self.ring_capacity),
+                SharedMeters(view[self.meters_offset:self.size], self.bands))
+
+
+def sweep_blocks(sample_rate, block_size, duration=2.0, low=100.0, high=5000.0):
+    """A repeating exponential sine sweep, one array('h') block at a time."""
+    total = int(sample_rate * duration)
+    phase = 0.0
+    position = 0
+    while True:
+        block = array.array('h')
+        for i in range(position, position + block_size):
+            freq = low * (high / low) ** ((i % total) / total)
+            phase += 2.0 * math.pi * freq / sample_rate
+            block.append(int(24000 * math.sin(phase)))
+        phase %= 2.0 * math.pi
+        position += block_size
+        yield block
+
+
+def run_worker(path, layout, conn, sample_rate, block_size, in_process):
+    """Worker loop: apply control messages, run the DSP chain, publish results."""
+    if in_process:
+        # The forked copy may hold a lock another thread had at fork time;
+        # timings from this process aren't visible to the UI anyway.
+        perf.enabled = False
+    engine = VoiceChangerEngine(sample_rate)
+    engine.analysis = tap = AnalysisTap(sample_rate=sample_rate, bands=layout.bands)
+    scheduler = QualityScheduler(engine, block_size, sample_rate)
+    with open(path, 'r+b') as f:
+        shared = mmap.mmap(f.fileno(), layout.size)
+    input_ring, output_ring, meters = layout.attach(shared)
+
+    source = None
+    realtime = True
+    # Output goes to the ring only while someone reads it.
+    output = False
+    next_block = time.perf_counter()
+    blocks = dropped = 0
+    busy_s = 0.0
+    published = analysed = 0.0
+    spectrum = tap.spectrum()
+    unpublished = False
+    while True:
+        idle = source is None and input_ring.available() < block_size
+        # Publish at most at the UI refresh rate, and whenever work runs dry.
+        now = time.perf_counter()
+        if unpublished and (idle or now - published >= 1 / 30.0):
+            # The spectrum counts against the next block's budget, and is
+            # refreshed less often at lower quality levels.
+            if scheduler.spectrum_due(now - analysed):
+                spectrum = scheduler.timed(tap.spectrum)
+                analysed = time.perf_counter()
+                busy_s += analysed - now
+            counts = scheduler.counts
+            meters.publish((blocks, dropped, counts['misses'], scheduler.level,
+                            counts['steps_down'] + counts['steps_up']),
+                           busy_s, tap.rms_db, tap.peak_db, spectrum)
+            published = time.perf_counter()
+            unpublished = False
+        # Idle, the worker sleeps until a message arrives; push() sends one
+        # when the input ring fills up to a block.
+        if conn.poll(None if idle else 0):
+            try:
+                message, value = conn.recv()
+            except EOFError:
+                break
+            if message == 'stop':
+                break
+            if message == 'params':
+                for key, param in value.items():
+                    setattr(engine, key, param)
+            elif message == 'source':
+                source = sweep_blocks(sample_rate, block_size) if value == 'sweep' else None
+                next_block = time.perf_counter()
+                tap.reset()
+            elif message == 'realtime':
+                realtime = value
+            elif message == 'output':
+                output = value
+            elif message == 'slowdown':
+                scheduler.slowdown = value
+            elif message == 'sync':
+                # Every earlier message is applied and its blocks written.
+                conn.send(('sync', value))
+            continue
+
+        block = next(source) if source is not None else input_ring.read(block_size)
+        if not block:
+            continue
+        start = time.perf_counter()
+        processed = scheduler.process(block.tobytes())
+        if output:
+            out = array.array('h')
+            out.frombytes(processed)
+            if not output_ring.write(out):
+                dropped += 1
+        blocks += 1
+        busy_s += time.perf_counter() - start
+        unpublished = True
+
+        if source is not None and realtime:
+            # Generated input arrives at the real-time rate, like a microphone.
+            next_block += block_size / sample_rate
+            delay = next_block - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_block = time.perf_counter()
+    del input_ring, output_ring, meters
+    shared.close()
+
+
+class RemoteAnalysis:
+    """AnalysisTap-compatible reader of the worker's shared meters."""
+
+    def __init__(self, meters, centers):
+        self.meters = meters
+        self.centers = centers
+
+    def levels(self):
+        snapshot = self.meters.snapshot()
+        return snapshot[2], snapshot[3]
+
+    def spectrum(self):
+        return self.meters.snapshot()[4]
+
+
+class AudioWorker:
+    """Runs the voice DSP chain away from the UI thread.
+
+    The chain runs in a child process (or a thread on free-threaded Python)
+    and talks to the UI through a memory-mapped file holding an input ring,
+    an output ring and the latest meters. Parameter changes travel over a
+    pipe, and send_params() only sends values that changed since the last
+    call. With no test signal and less than a block of input queued, the
+    worker blocks on the pipe instead of polling. mode is 'process',
+    'thread' or 'auto'.
+    """
+
+    def __init__(self, sample_rate=44100, block_size=1024, bands=32, ring_seconds=1.0, mode='auto'):
+        if mode == 'auto':
+            mode = 'thread' if free_threaded() else 'process'
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.layout = _Layout(int(sample_rate * ring_seconds), bands)
+        self.analysis = None
+        self._sent = {}
+        self._syncs = 0
+        self._runner = None
+        self._conn = None
+        self._shared = None
+        self._path = None
+
+    @property
+    def running(self):
+        return self._runner is not None and self._runner.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        fd, self._path = tempfile.mkstemp(prefix='cyn_audio_', suffix='.shm')
+        with os.fdopen(fd, 'r+b') as f:
+            f.truncate(self.layout.size)
+            self._shared = mmap.mmap(f.fileno(), self.layout.size)
+        self.input, self.output, meters = self.layout.attach(self._shared)
+        meters.publish((0, 0, 0, 0, 0), 0.0, FLOOR_DB, FLOOR_DB, [FLOOR_DB] * self.layout.bands)
+        centers = AnalysisTap(sample_rate=self.sample_rate, bands=self.layout.bands).centers
+        self.analysis = RemoteAnalysis(meters, centers)
+        self._meters = meters
+
+        self._conn, child_conn = multiprocessing.Pipe()
+        args = (self._path, self.layout, child_conn, self.sample_rate, self.block_size)
+        if self.mode == 'thread':
+            self._runner = threading.Thread(target=run_worker, args=args + (False,),
+                                            name='audio-worker', daemon=True)
+        else:
+            # fork keeps the child from re-importing the Kivy entry point,
+            # which spawn would do.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+            self._runner = context.Process(target=run_worker, args=args + (True,),
+                                           name='audio-worker', daemon=True)
+        self._runner.start()
+        if self.mode == 'process':
+            child_conn.close()
+        self._sent = {}
+
+    def stop(self, timeout=2.0):
+        if self._runner is None:
+            return
+        try:
+            self._conn.send(('stop', None))
+        except (BrokenPipeError, OSError):
+            pass
+        self._runner.join(timeout)
+        if self.mode == 'process' and self._runner.is_alive():
+            self._runner.terminate()
+            self._runner.join(timeout)
+        self._runner = None
+        self._conn.close()
+        self.input = self.output = self._meters = None
+        self.analysis = None
+        try:
+            self._shared.close()
+        except BufferError:
+            # A view still holds the meters; the map goes when it does.
+            pass
+        self._shared = None
+        os.remove(self._path)
+
+    def _send(self, message, value):
+        if self.running:
+            self._conn.send((message, value))
+
+    def send_params(self, engine):
+        """Send the VOICE_PARAMS of engine that changed; returns the delta."""
+        delta = {}
+        for key in VOICE_PARAMS:
+            value = getattr(engine, key)
+            if self._sent.get(key, _UNSET) != value:
+                delta[key] = value
+        if delta and self.running:
+            self._send('params', delta)
+            self._sent.update(delta)
+        return delta
+
+    def set_source(self, name):
+        """'sweep' for the built-in test signal, None to process pushed input."""
+        self._send('source', name)
+
+    def set_realtime(self, realtime):
+        """False lets a generated source run as fast as the DSP allows."""
+        self._send('realtime', realtime)
+
+    def set_output(self, enabled):
+        """Whether processed audio is queued for pull(); off by default."""
+        self._send('output', enabled)
+
+    def sync(self, timeout=0.5):
+        """Wait until the worker has applied every message sent so far; False on timeout."""
+        if not self.running:
+            return False
+        self._syncs += 1
+        self._send('sync', self._syncs)
+        deadline = time.perf_counter() + timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not self._conn.poll(remaining):
+                return False
+            # Replies to syncs that timed out earlier are skipped.
+            if self._conn.recv() == ('sync', self._syncs):
+                return True
+
+    def set_slowdown(self, factor):
+        """Make the worker's DSP factor times slower, to simulate a slow CPU."""
+        self._send('slowdown', factor)
+
+    def push(self, samples):
+        """Queue array('h') input for the worker; False if the ring is full."""
+        before = self.input.available()
+        if not self.input.write(samples):
+            return False
+        if before < self.block_size <= before + len(samples):
+            # The worker may be blocked waiting for a message.
+            self._send('input', None)
+        return True
+
+    def pull(self, max_samples):
+        """Processed output as array('h'), up to max_samples."""
+        return self.output.read(max_samples)
+
+    def stats(self):
+        (blocks, dropped, misses, level, changes), busy_s, _, _, _ = self._meters.snapshot()
+        return {'blocks': blocks, 'dropped': dropped, 'busy_s': busy_s,
+                'deadline_misses': misses, 'quality_level': level, 'quality_changes': changes}
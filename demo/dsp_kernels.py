@@ -0,0 +1,90 @@
+import array
+import os
+import platform
+import sys
+from itertools import repeat
+from operator import add, mul, rshift
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Gains are fixed-point with GAIN_BITS fraction bits (Q3.12), so a full-scale
+# Q15 sample times the largest gain still fits a 32-bit accumulator.
+GAIN_BITS = 12
+MAX_GAIN = (1 << (15 - GAIN_BITS)) - 1.0 / (1 << GAIN_BITS)
+# Largest difference from the float path: half a step of gain quantisation
+# at full scale, plus rounding instead of truncating the product.
+FIXED_TOLERANCE = 32768 // (1 << (GAIN_BITS + 1)) + 1
+MODES = ('float', 'fixed')
+
+
+def _as_samples(audio_data):
+    if isinstance(audio_data, array.array):
+        return audio_data
+    samples = array.array('h')
+    samples.frombytes(audio_data)
+    return samples
+
+
+def _saturate(values):
+    """array('h') of a list of ints, clamping any outside the int16 range."""
+    try:
+        return array.array('h', values)
+    except OverflowError:
+        return array.array('h', [32767 if v > 32767 else -32768 if v < -32768 else v for v in values])
+
+
+# The kernels below keep the per-sample work inside map() and comprehensions;
+# the interpreter overhead of a Python loop body costs more than the maths.
+
+def gain_float(audio_data, factor):
+    """int16 samples times factor, truncated and saturated, as array('h')."""
+    return _saturate(list(map(int, map(mul, _as_samples(audio_data), repeat(factor)))))
+
+
+def gain_fixed(audio_data, factor):
+    """Q15 samples times a Q3.12 gain, rounded and saturated, as array('h')."""
+    if not -MAX_GAIN <= factor <= MAX_GAIN:
+        raise ValueError(f"gain must be within [{-MAX_GAIN}, {MAX_GAIN}], got {factor}")
+    q = int(round(factor * (1 << GAIN_BITS)))
+    bias = 1 << (GAIN_BITS - 1)
+    if np is not None:
+        samples = np.frombuffer(_as_samples(audio_data), dtype=np.int16).astype(np.int32)
+        samples = (samples * q + bias) >> GAIN_BITS
+        return array.array('h', np.clip(samples, -32768, 32767).astype(np.int16).tobytes())
+    # Products fit in 32 bits; Python's arbitrary ints simply never overflow.
+    accumulators = map(add, map(mul, _as_samples(audio_data), repeat(q)), repeat(bias))
+    return _saturate(list(map(rshift, accumulators, repeat(GAIN_BITS))))
+
+
+def clip(audio_data, threshold):
+    """Hard-clip int16 samples to [-threshold, threshold]; integer in both modes."""
+    samples = _as_samples(audio_data)
+    if np is not None:
+        clipped = np.clip(np.frombuffer(samples, dtype=np.int16), -threshold, threshold)
+        return array.array('h', clipped.astype(np.int16).tobytes())
+    low = -threshold
+    return array.array('h', [threshold if s > threshold else low if s < low else s for s in samples])
+
+
+GAIN = {'float': gain_float, 'fixed': gain_fixed}
+
+
+def default_mode():
+    """'fixed' on 32-bit ARM (armeabi-v7a), where float maths is slowest, else 'float'.
+
+    CYN_DSP_MODE=float or fixed overrides the choice.
+    """
+    mode = os.environ.get('CYN_DSP_MODE')
+    if mode:
+        if mode in MODES:
+            return mode
+        print(f"Error reading CYN_DSP_MODE: {mode!r} is not one of {MODES}")
+    machine = platform.machine().lower()
+    # A 32-bit process on a 64-bit CPU reports armv8l.
+    if machine.startswith('arm') and sys.maxsize <= 2 ** 32:
+        return 'fixed'
+    return 'float'
@@ -0,0 +1,136 @@
+import os
+import time
+
+from perf import perf
+
+
+# Cheapest last. spectrum_hz caps how often the band spectrum is recomputed
+# (0 keeps the last one); analysis False stops feeding the level meter too.
+QUALITY_LEVELS = (
+    {'name': 'full', 'spectrum_hz': 30.0, 'analysis': True},
+    {'name': 'slow spectrum', 'spectrum_hz': 10.0, 'analysis': True},
+    {'name': 'levels only', 'spectrum_hz': 0.0, 'analysis': True},
+    {'name': 'no analysis', 'spectrum_hz': 0.0, 'analysis': False},
+)
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"Error reading {name}: {value!r} is not a number")
+        return default
+
+
+def _spin(seconds):
+    """Busy-wait, so simulated work occupies the CPU like real work would."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class QualityScheduler:
+    """Keeps the voice DSP chain inside its real-time budget.
+
+    Each block has block_size / sample_rate seconds to be processed. The
+    time spent on a block (the engine plus any analysis charged to it with
+    timed()) is compared with that budget: a block over budget is a
+    deadline miss, and a smoothed load above high_load or any miss steps
+    down one QUALITY_LEVELS entry. After recover_s of load below low_load
+    the scheduler steps back up one level. slowdown > 1 (or CYN_DSP_SLOWDOWN)
+    makes every timed call take that many times longer, to try the chain
+    on a slow CPU. With adaptive False the level stays put and misses are
+    only counted.
+    """
+
+    def __init__(self, engine, block_size, sample_rate, high_load=0.7, low_load=0.35,
+                 recover_s=2.0, hold_blocks=8, slowdown=None, adaptive=True):
+        if not 0.0 < low_load < high_load:
+            raise ValueError(f"need 0 < low_load < high_load, got {low_load} and {high_load}")
+        self.engine = engine
+        self.budget_s = block_size / sample_rate
+        self.high_load = high_load
+        self.low_load = low_load
+        self.recover_blocks = max(1, round(recover_s / self.budget_s))
+        self.hold_blocks = hold_blocks
+        self.slowdown = slowdown if slowdown is not None else _env_float('CYN_DSP_SLOWDOWN', 1.0)
+        self.adaptive = adaptive
+        self.level = 0
+        # Exponentially weighted block time / budget.
+        self.load = 0.0
+        self.counts = {'blocks': 0, 'misses': 0, 'steps_down': 0, 'steps_up': 0}
+        self.blocks_at_level = [0] * len(QUALITY_LEVELS)
+        self._spent = 0.0
+        self._calm = 0
+        self._hold = 0
+        self._apply()
+
+    @property
+    def quality(self):
+        return QUALITY_LEVELS[self.level]
+
+    def timed(self, func, *args):
+        """Call func, charging its time to the current block."""
+        start = time.perf_counter()
+        result = func(*args)
+        if self.slowdown > 1.0:
+            _spin((time.perf_counter() - start) * (self.slowdown - 1.0))
+        self._spent += time.perf_counter() - start
+        return result
+
+    def process(self, audio_data):
+        """engine.process() one block, then adjust quality for the next one."""
+        result = self.timed(self.engine.process, audio_data)
+        self.end_block()
+        return result
+
+    def end_block(self):
+        spent, self._spent = self._spent, 0.0
+        perf.record('dsp.block', spent)
+        load = spent / self.budget_s
+        self.load += 0.2 * (load - self.load)
+        self.counts['blocks'] += 1
+        self.blocks_at_level[self.level] += 1
+        missed = load > 1.0
+        if missed:
+            self.counts['misses'] += 1
+            perf.count('dsp.deadline_misses')
+        if not self.adaptive:
+            return
+        if self._hold:
+            # Let the load settle at the new level before judging it.
+            self._hold -= 1
+            return
+        if (missed or self.load > self.high_load) and self.level < len(QUALITY_LEVELS) - 1:
+            self._step(1)
+        elif self.load < self.low_load and self.level > 0:
+            self._calm += 1
+            if self._calm >= self.recover_blocks:
+                self._step(-1)
+        else:
+            self._calm = 0
+
+    def _step(self, direction):
+        self.level += direction
+        key = 'steps_down' if direction > 0 else 'steps_up'
+        self.counts[key] += 1
+        perf.count(f'dsp.quality_{key}')
+        self._calm = 0
+        self._hold = self.hold_blocks
+        self._apply()
+
+    def _apply(self):
+        self.engine.analysis_enabled = self.quality['analysis']
+
+    def spectrum_due(self, since_s):
+        """Whether the spectrum may be recomputed since_s after the last time."""
+        hz = self.quality['spectrum_hz']
+        return hz > 0 and since_s >= 1.0 / hz
+
+    def stats(self):
+        return dict(self.counts, level=self.level, quality=self.quality['name'], load=self.load,
+                    budget_ms=self.budget_s * 1000, slowdown=self.slowdown,
+                    blocks_at_level=list(self.blocks_at_level))
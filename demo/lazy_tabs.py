@@ -0,0 +1,133 @@
+import time
+
+from kivy.clock import Clock
+from kivy.uix.label import Label
+from kivy.uix.tabbedpanel import TabbedPanel, TabbedPanelItem
+
+
+def count_widgets(widget):
+    return sum(1 for _ in widget.walk(restrict=True))
+
+
+class LazyTabbedPanelItem(TabbedPanelItem):
+    """Tab whose content is produced by `builder` the first time it is opened.
+
+    release() drops the built content again so it can be garbage collected;
+    the next open rebuilds it, so builders must restore their state from the
+    model rather than from the widgets. teardown(content), if given, is
+    called with the dropped content to stop its clocks and clear references
+    the app holds into it.
+    """
+
+    def __init__(self, builder, teardown=None, **kwargs):
+        super().__init__(**kwargs)
+        self.builder = builder
+        self.teardown = teardown
+        self.built = False
+        self.last_used = time.monotonic()
+        self.content = Label(text='Loading...')
+
+    def ensure_built(self):
+        if not self.built:
+            self.content = self.builder()
+            self.built = True
+        return self.content
+
+    def release(self):
+        if self.built:
+            content = self.content
+            self.content = Label(text='Loading...')
+            self.built = False
+            if self.teardown is not None:
+                self.teardown(content)
+
+
+class StagedTabbedPanel(TabbedPanel):
+    """TabbedPanel that shows placeholders until its content can be built.
+
+    Nothing is built until start() is called (after the first frame). From
+    then on, switching to an unbuilt tab draws its placeholder immediately
+    and builds the content on the next Clock tick, so tap feedback is never
+    blocked by widget construction. With prebuild=True the remaining tabs
+    are also built on idle ticks; by default they wait until first opened.
+    """
+
+    PREBUILD_INTERVAL = 0.05
+
+    def __init__(self, prebuild=False, **kwargs):
+        super().__init__(**kwargs)
+        self.prebuild = prebuild
+        self.ready = False
+
+    def switch_to(self, header, do_scroll=False):
+        previous = self.current_tab
+        if isinstance(previous, LazyTabbedPanelItem):
+            previous.last_used = time.monotonic()
+        super().switch_to(header, do_scroll=do_scroll)
+        if isinstance(header, LazyTabbedPanelItem):
+            header.last_used = time.monotonic()
+            if self.ready and not header.built:
+                Clock.schedule_once(lambda dt: self._build_tab(header), 0)
+
+    def clear_widgets(self, *args, **kwargs):
+        super().clear_widgets(*args, **kwargs)
+        # TabbedPanel only forgets contents in remove_widget(), so every
+        # content switch_to() ever showed would stay referenced from here,
+        # released tabs included.
+        if self.content is not None:
+            shown = self.content.children
+            self._childrens[:] = [widget for widget in self._childrens if widget in shown]
+
+    def _build_tab(self, header):
+        if header.built:
+            return
+        header.ensure_built()
+        if self.current_tab is header:
+            super().switch_to(header)
+
+    def start(self, on_current_built=None, on_done=None):
+        """Build the current tab now; with prebuild, the rest on idle ticks."""
+        self.ready = True
+        if isinstance(self.current_tab, LazyTabbedPanelItem):
+            self._build_tab(self.current_tab)
+        if on_current_built:
+            on_current_built()
+        pending = []
+        if self.prebuild:
+            pending = [tab for tab in reversed(self.tab_list)
+                       if isinstance(tab, LazyTabbedPanelItem) and not tab.built]
+
+        def step(dt):
+            while pending and pending[0].built:
+                pending.pop(0)
+            if pending:
+                self._build_tab(pending.pop(0))
+            if pending:
+                Clock.schedule_once(step, self.PREBUILD_INTERVAL)
+            elif on_done:
+                on_done()
+
+        Clock.schedule_once(step, self.PREBUILD_INTERVAL)
+
+    def release_idle(self, max_idle_s):
+        """Release content of background tabs unused for max_idle_s seconds.
+
+        Returns the number of widgets dropped.
+        """
+        now = time.monotonic()
+        freed = 0
+        for tab in self.tab_list:
+            if (isinstance(tab, LazyTabbedPanelItem) and tab.built
+                    and tab is not self.current_tab
+                    and now - tab.last_used >= max_idle_s):
+                freed += count_widgets(tab.content)
+                tab.release()
+        return freed
+
+    def widget_count(self):
+        """Widgets in the visible tree plus content held by background tabs."""
+        total = count_widgets(self)
+        for tab in self.tab_list:
+            if tab is not self.current_tab and tab.content is not None:
+                total += count_widgets(tab.content)
+        return total
@@ -1,382 +1,353 @@
+from perf import memory_usage, perf, startup
+startup.mark('main_start')
+
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.button import Button
 from kivy.uix.label import Label
-from kivy.uix.popup import Popup
-from kivy.uix.slider import Slider
-from kivy.uix.spinner import Spinner
-from kivy.uix.switch import Switch
-from kivy.uix.tabbedpanel import TabbedPanel, TabbedPanelItem
 from kivy.core.window import Window
-from kivy.core.audio import SoundLoader
-import json
-import os
-import math
-import struct
-import wave
 import array
-import threading
+import asyncio
+import math
+import os
+import time
+import weakref
 
-# Request Android permissions
-try:
-    from android.permissions import request_permissions, Permission
-    request_permissions([
-        Permission.QUERY_ALL_PACKAGES,
-        Permission.READ_EXTERNAL_STORAGE,
-        Permission.WRITE_EXTERNAL_STORAGE,
-        Permission.RECORD_AUDIO,
-    ])
-except ImportError:
-    pass
+from app_tasks import TaskRunner
+from audio_device import DEFAULT_FRAMES_PER_BUFFER, DEFAULT_SAMPLE_RATE, OutputConfig, detect_output
+from dsp_scheduler import QualityScheduler
+from lazy_tabs import LazyTabbedPanelItem, StagedTabbedPanel, count_widgets
+from memory_budget import (
+    TRIM_MEMORY_BACKGROUND, TRIM_MEMORY_RUNNING_CRITICAL, TRIM_MEMORY_RUNNING_LOW, TRIM_MEMORY_UI_HIDDEN,
+    MemoryBudget, install_android_callbacks, install_pressure_signals,
+)
+from settings_manager import AppSettingsManager
+from settings_schema import FIELDS as SETTING_FIELDS
+from soundboard import SoundBoardManager
+from text_cache import NumericLabel, StaticLabel, prepare_atlas, texture_cache
+from ui_bindings import bind_coalesced
+from voice_engine import VoiceChangerEngine
+from voice_preview import PreviewCache, preset_params, voice_params
 
-# Try to get installed packages
-try:
-    from jnius import autoclass
-    PythonJavaClass = autoclass('org.renpy.android.PythonJavaClass')
-    pm = PythonJavaClass.activity.getPackageManager()
-    
-    def get_installed_apps():
-        """Get list of installed app packages."""
-        try:
-            packages = pm.getInstalledPackages(0)
-            app_list = []
-            for i in range(packages.size()):
-                pkg = packages.get(i)
-                app_name = pkg.packageName
-                if not app_name.startswith('android') and not app_name.startswith('com.android'):
-                    app_list.append(app_name)
-            return sorted(app_list)
-        except:
-            return []
-except ImportError:
-    def get_installed_apps():
-        """Fallback: return demo apps."""
-        return ['com.example.game1', 'com.example.game2', 'com.example.app1']
+startup.mark('imports_done')
 
 
-class AppSettingsManager:
-    """Manages comprehensive app settings."""
-    
-    DEFAULT_SETTINGS = {
-        'fps_cap': 60,
-        'target_fps': 60,
-        'refresh_rate': 60,
-        'resolution_scale': 1.0,
-        'graphics_quality': 'high',
-        'motion_smoothing': True,
-        'ambient_occlusion': False,
-        'shadow_quality': 'medium',
-        'texture_quality': 'high',
-        'anti_aliasing': 'fxaa',
-        'memory_limit': 2048,
-        'touch_sensitivity': 1.0,
-        'haptic_feedback': True,
-        'frame_timing': 'adaptive',
-        'power_profile': 'balanced',
-        'cpu_threads': 4,
-        'gpu_boost': False,
-        'memory_compression': True,
-        'vsync': True,
-        'cpu_governor': 'schedutil',
-        'gpu_frequency': 'auto',
-    }
-    
-    def __init__(self):
-        self.settings_file = os.path.join(os.path.expanduser('~'), 'app_settings.json')
-        self.settings = self.load_settings()
-    
-    def load_settings(self):
-        if os.path.exists(self.settings_file):
-            try:
-                with open(self.settings_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
-    
-    def save_settings(self):
-        try:
-            with open(self.settings_file, 'w') as f:
-                json.dump(self.settings, f, indent=2)
-        except Exception as e:
-            print(f"Error saving settings: {e}")
-    
-    def get_app_settings(self, app_name):
-        if app_name not in self.settings:
-            self.settings[app_name] = self.DEFAULT_SETTINGS.copy()
-            self.save_settings()
-        return self.settings[app_name]
-    
-    def update_app_setting(self, app_name, key, value):
-        if app_name not in self.settings:
-            self.settings[app_name] = self.DEFAULT_SETTINGS.copy()
-        self.settings[app_name][key] = value
-        self.save_settings()
+def request_android_permissions():
+    """Request Android permissions (no-op off-device)."""
+    try:
+        from android.permissions import request_permissions, Permission
+        request_permissions([
+            Permission.QUERY_ALL_PACKAGES,
+            Permission.READ_EXTERNAL_STORAGE,
+            Permission.WRITE_EXTERNAL_STORAGE,
+            Permission.RECORD_AUDIO,
+        ])
+    except ImportError:
+        pass
 
 
-class SoundBoardManager:
-    """Enhanced soundboard with customization."""
-    
-    SOUND_TEMPLATES = {
-        'beep': {'freq': 800, 'duration': 0.5, 'volume': 0.7},
-        'success': {'freq': [600, 900], 'duration': 0.8, 'volume': 0.7},
-        'error': {'freq': [300, 150], 'duration': 0.6, 'volume': 0.7},
-        'click': {'freq': 1000, 'duration': 0.1, 'volume': 0.7},
-        'notification': {'freq': [500, 700, 900], 'duration': 0.4, 'volume': 0.6},
-        'alert': {'freq': 'sweep', 'duration': 0.5, 'volume': 0.8},
-        'chime': {'freq': 1200, 'duration': 0.6, 'volume': 0.5},
-        'laser': {'freq': 'down', 'duration': 0.2, 'volume': 0.6},
-        'pop': {'freq': 150, 'duration': 0.15, 'volume': 0.5},
-        'whoosh': {'freq': 'sweep', 'duration': 0.3, 'volume': 0.6},
-    }
-    
-    def __init__(self):
-        self.sounds = {}
-        self.sound_config = {}
-        self.master_volume = 1.0
-        self.current_sound = None
-        self.sample_rate = 44100
-        self._generate_all_sounds()
-    
-    def _generate_all_sounds(self):
-        """Generate all sound files."""
-        for name, config in self.SOUND_TEMPLATES.items():
-            path = self._create_sound(name, config)
-            self.sounds[name] = path
-            self.sound_config[name] = {
-                'volume': config['volume'],
-                'pitch': 1.0,
-                'enabled': True,
-                'loop': False
-            }
-    
-    def _create_sound(self, name, config):
-        """Create a sound file."""
-        sound_file = os.path.join(os.path.expanduser('~'), f'{name}.wav')
-        if not os.path.exists(sound_file):
-            try:
-                sample_rate = 44100
-                duration = config.get('duration', 0.5)
-                num_samples = int(sample_rate * duration)
-                frames = []
-                
-                if config['freq'] == 'sweep':
-                    for i in range(num_samples):
-                        env = 1.0 - (i / num_samples) * 0.8
-                        freq = 2000 - 1500 * (i / num_samples)
-                        sample = int(32767 * 0.4 * env * math.sin(2.0 * math.pi * freq * i / sample_rate))
-                        frames.append(struct.pack('<h', sample))
-                elif config['freq'] == 'down':
-                    for i in range(num_samples):
-                        env = 1.0 - (i / num_samples)
-                        freq = 2000 - 1500 * (i / num_samples)
-                        sample = int(32767 * 0.4 * env * math.sin(2.0 * math.pi * freq * i / sample_rate))
-                        frames.append(struct.pack('<h', sample))
-                elif isinstance(config['freq'], list):
-                    for i in range(num_samples):
-                        idx = int((i / num_samples) * (len(config['freq']) - 1))
-                        freq = config['freq'][idx]
-                        sample = int(32767 * 0.3 * math.sin(2.0 * math.pi * freq * i / sample_rate))
-                        frames.append(struct.pack('<h', sample))
-                else:
-                    for i in range(num_samples):
-                        freq = config['freq']
-                        sample = int(32767 * 0.5 * math.sin(2.0 * math.pi * freq * i / sample_rate))
-                        frames.append(struct.pack('<h', sample))
-                
-                with wave.open(sound_file, 'w') as wav_file:
-                    wav_file.setnchannels(1)
-                    wav_file.setsampwidth(2)
-                    wav_file.setframerate(sample_rate)
-                    wav_file.writeframes(b''.join(frames))
-            except:
-                pass
-        return sound_file
-    
-    def play_sound(self, sound_name):
-        try:
-            if self.current_sound:
-                self.current_sound.stop()
-            
-            config = self.sound_config.get(sound_name, {})
-            if not config.get('enabled', True):
-                return
-            
-            sound_file = self.sounds.get(sound_name)
-            if sound_file:
-                self.current_sound = SoundLoader.load(sound_file)
-                if self.current_sound:
-                    self.current_sound.volume = config.get('volume', 0.7) * self.master_volume
-                    self.current_sound.play()
-        except Exception as e:
-            print(f"Error playing sound: {e}")
-    
-    def stop_sound(self):
-        if self.current_sound:
-            self.current_sound.stop()
-            self.current_sound = None
-    
-    def set_sound_volume(self, sound_name, volume):
-        if sound_name in self.sound_config:
-            self.sound_config[sound_name]['volume'] = volume
-    
-    def set_master_volume(self, volume):
-        self.master_volume = volume
+def get_installed_apps():
+    """Get list of installed app packages.
 
-
-class VoiceChangerEngine:
-    """Advanced voice changer with EQ and presets."""
-    
-    VOICE_PRESETS = {
-        'normal': {'pitch': 0, 'speed': 1.0, 'bass': 0, 'mid': 0, 'treble': 0},
-        'high': {'pitch': 12, 'speed': 1.0, 'bass': -5, 'mid': 0, 'treble': 5},
-        'deep': {'pitch': -12, 'speed': 1.0, 'bass': 5, 'mid': -3, 'treble': -5},
-        'fast': {'pitch': 0, 'speed': 1.3, 'bass': 0, 'mid': 2, 'treble': 0},
-        'slow': {'pitch': 0, 'speed': 0.7, 'bass': 2, 'mid': 0, 'treble': -2},
-        'robotic': {'pitch': 0, 'speed': 1.0, 'bass': 5, 'mid': -10, 'treble': 5},
-        'chipmunk': {'pitch': 24, 'speed': 1.1, 'bass': -8, 'mid': 0, 'treble': 8},
-        'demon': {'pitch': -24, 'speed': 0.9, 'bass': 10, 'mid': -5, 'treble': -8},
-    }
-    
-    def __init__(self):
-        self.is_recording = False
-        self.pitch_shift = 0
-        self.speed = 1.0
-        self.volume = 0.7
-        self.bass = 0
-        self.mid = 0
-        self.treble = 0
-        self.reverb_amount = 0.0
-        self.echo_amount = 0.0
-        self.distortion = 0.0
-        self.current_preset = 'normal'
-        self.sample_rate = 44100
-    
-    def apply_preset(self, preset_name):
-        if preset_name in self.VOICE_PRESETS:
-            preset = self.VOICE_PRESETS[preset_name]
-            self.pitch_shift = preset['pitch']
-            self.speed = preset['speed']
-            self.bass = preset['bass']
-            self.mid = preset['mid']
-            self.treble = preset['treble']
-            self.current_preset = preset_name
-    
-    def apply_equalizer(self, audio_data):
-        """Apply EQ adjustments using pure Python."""
-        try:
-            if self.bass == 0 and self.mid == 0 and self.treble == 0:
-                return audio_data
-            
-            # Convert bytes to samples
-            audio_array = array.array('h')
-            audio_array.frombytes(audio_data)
-            
-            # Apply EQ by scaling amplitude
-            eq_factor = 1.0
-            if self.bass != 0:
-                eq_factor *= (1.0 + self.bass / 100.0)
-            if self.mid != 0:
-                eq_factor *= (1.0 + self.mid / 100.0)
-            if self.treble != 0:
-                eq_factor *= (1.0 + self.treble / 100.0)
-            
-            # Apply factor and clamp to int16 range
-            result = array.array('h')
-            for sample in audio_array:
-                scaled = int(sample * eq_factor)
-                # Clamp to int16 range [-32768, 32767]
-                clamped = max(-32768, min(32767, scaled))
-                result.append(clamped)
-            
-            return result.tobytes()
-        except:
-            return audio_data
-    
-    def apply_distortion(self, audio_data):
-        """Apply distortion effect using pure Python."""
-        if self.distortion == 0:
-            return audio_data
-        
-        try:
-            # Convert bytes to samples
-            audio_array = array.array('h')
-            audio_array.frombytes(audio_data)
-            
-            # Calculate threshold for distortion
-            threshold = int(32767 * (1.0 - self.distortion / 100.0))
-            
-            # Apply distortion (hard clipping)
-            result = array.array('h')
-            for sample in audio_array:
-                if sample > threshold:
-                    clamped = threshold
-                elif sample < -threshold:
-                    clamped = -threshold
-                else:
-                    clamped = sample
-                result.append(clamped)
-            
-            return result.tobytes()
-        except:
-            return audio_data
+    pyjnius is imported on first call so it stays off the startup path.
+    """
+    try:
+        from jnius import autoclass
+    except ImportError:
+        # Fallback: return demo apps.
+        return ['com.example.game1', 'com.example.game2', 'com.example.app1']
+    try:
+        PythonJavaClass = autoclass('org.renpy.android.PythonJavaClass')
+        pm = PythonJavaClass.activity.getPackageManager()
+        packages = pm.getInstalledPackages(0)
+        app_list = []
+        for i in range(packages.size()):
+            pkg = packages.get(i)
+            app_name = pkg.packageName
+            if not app_name.startswith('android') and not app_name.startswith('com.android'):
+                app_list.append(app_name)
+        return sorted(app_list)
+    except:
+        return []
 
 
 class CynEnhancementsApp(App):
+    # Background tabs idle for this long are released when the app is paused.
+    TAB_IDLE_RELEASE_MINUTES = 5
+    # Voice slider changes re-render the preview once they pause this long.
+    PREVIEW_DEBOUNCE_S = 0.4
+    # Accounted memory is checked against the budget this often.
+    MEMORY_CHECK_S = 10
+    # Rough heap cost of one widget (tracemalloc over Buttons, Labels and
+    # Sliders on desktop), for content held by background tabs.
+    WIDGET_BYTES = 60 * 1024
+    # The app has its own settings UI; Kivy's settings panel and its
+    # widgets (textinput, colorpicker, filechooser...) are left out of the
+    # APK, see tools/apk_blacklist.txt.
+    use_kivy_settings = False
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.settings_manager = AppSettingsManager()
-        self.soundboard = SoundBoardManager()
+        self.soundboard = SoundBoardManager(preload=False)
+        for name, graph in self.settings_manager.custom_sounds.items():
+            self.soundboard.define_sound(name, graph)
         self.voice_engine = VoiceChangerEngine()
+        self.previews = PreviewCache(sample_rate=self.voice_engine.sample_rate)
+        self._preview_render = Clock.create_trigger(self._render_preview, self.PREVIEW_DEBOUNCE_S)
+        # File and platform I/O started from UI callbacks runs here.
+        self.tasks = TaskRunner()
+        self.audio_output = None
+        self.audio_worker = None
+        self._resume_worker = False
+        self.voice_meters = None
+        self.icon_loader = None
+        self._app_list = None
+        self.recorder = None
+        # Stats of the last finished recording, shown by the Voice tab.
+        self.last_recording = None
+        self._show_recording = None
+        self._record_drain = None
+        self._ring_dropped = 0
         self.current_app = None
+        self.tab_panel = None
+        self.memory = MemoryBudget()
+        self._trim_callbacks = None
+        self.register_memory()
+    
+    def register_memory(self):
+        """Account the caches with the memory budget, cheapest to rebuild first."""
+        memory = self.memory
+        memory.register('voice_previews', self.previews.resident_bytes, self.previews.trim_memory, 0)
+        memory.register('app_icons', self.icon_bytes, self.trim_icons, 1, ui=True)
+        # Textures a widget still shows aren't freed by clearing the cache.
+        memory.register('text_textures', texture_cache.unshared_bytes, lambda level: texture_cache.clear(), 2,
+                        TRIM_MEMORY_RUNNING_LOW, ui=True)
+        memory.register('soundboard', self.soundboard.resident_bytes, self.soundboard.trim_memory, 3,
+                        TRIM_MEMORY_RUNNING_LOW)
+        memory.register('settings', self.settings_manager.resident_bytes, self.settings_manager.trim_memory, 4,
+                        TRIM_MEMORY_RUNNING_CRITICAL)
+        memory.register('voice_engine', self.voice_engine.resident_bytes, self.voice_engine.trim_memory, 5,
+                        TRIM_MEMORY_RUNNING_CRITICAL)
+        memory.register('background_tabs', self.background_tab_bytes,
+                        lambda level: self.trim_memory(0 if level >= TRIM_MEMORY_BACKGROUND else None), 6,
+                        TRIM_MEMORY_UI_HIDDEN, ui=True)
+    
+    def save_custom_sound(self, name, graph):
+        """Add a user sound graph to the soundboard and persist it with the settings."""
+        graph = self.soundboard.define_sound(name, graph)
+        self.settings_manager.define_sound(name, graph)
+        # Each write covers every custom sound, so a newer one supersedes a pending one.
+        self.tasks.run('settings.sounds', self.settings_manager.write_sounds)
+        return graph
     
     def build(self):
+        startup.mark('build')
         Window.size = (400, 900)
         self.title = 'Cyn Enhancements'
         
-        tab_panel = TabbedPanel(do_default_tab=False)
+        # Only the tab strip is built here; contents are built after the
+        # first frame, see on_first_frame().
+        tab_panel = StagedTabbedPanel(do_default_tab=False)
         
-        settings_tab = TabbedPanelItem(text='Settings')
-        settings_tab.content = self.build_settings_tab()
+        settings_tab = LazyTabbedPanelItem(self.build_settings_tab, text='Settings')
         tab_panel.add_widget(settings_tab)
         
-        soundboard_tab = TabbedPanelItem(text='Soundboard')
-        soundboard_tab.content = self.build_soundboard_tab()
+        soundboard_tab = LazyTabbedPanelItem(self.build_soundboard_tab, text='Soundboard')
         tab_panel.add_widget(soundboard_tab)
         
-        voice_tab = TabbedPanelItem(text='Voice')
-        voice_tab.content = self.build_voice_tab()
+        voice_tab = LazyTabbedPanelItem(self.build_voice_tab, teardown=self.release_voice_tab, text='Voice')
         tab_panel.add_widget(voice_tab)
         
         tab_panel.default_tab = settings_tab
+        self.tab_panel = tab_panel
+        Window.bind(on_flip=self.on_first_frame)
+        
+        if perf.enabled:
+            from perf_hud import PerfHUD
+            self.perf_hud = PerfHUD.install()
         return tab_panel
     
+    def open_settings(self, *largs):
+        # F1 (or a hardware keyboard's settings key) would import kivy.uix.settings.
+        return False
+    
+    def on_start(self):
+        request_android_permissions()
+        self._trim_callbacks = install_android_callbacks(self.memory)
+        if self._trim_callbacks is None:
+            install_pressure_signals(self.memory)
+        Clock.schedule_interval(lambda dt: self.memory.check(), self.MEMORY_CHECK_S)
+    
+    def on_first_frame(self, *args):
+        Window.unbind(on_flip=self.on_first_frame)
+        startup.mark('first_frame')
+        self.configure_audio()
+        self.tab_panel.start(on_current_built=self.on_interactive, on_done=self.warm_sounds)
+    
+    def on_interactive(self):
+        startup.mark('interactive')
+        startup.note('widgets', self.tab_panel.widget_count())
+        startup.note('rss_kb', memory_usage()['rss_kb'])
+        # Slider readouts in the tabs and the per-app popup draw from this atlas.
+        Clock.schedule_once(lambda dt: prepare_atlas(), 0)
+    
+    def on_pause(self):
+        # The worker is restarted on resume; a recording is finished so the
+        # file is complete if Android kills the app in the background.
+        if self.recorder is not None:
+            self.stop_recording()
+        self._resume_worker = self.audio_worker is not None
+        self.stop_audio_worker()
+        # Only UI consumers are trimmed at ui_hidden, so a brief app switch
+        # keeps decoded settings and sound plans.
+        self.memory.trim(TRIM_MEMORY_UI_HIDDEN, 'pause')
+        return True
+    
+    def on_resume(self):
+        if self._resume_worker:
+            self._resume_worker = False
+            self.start_audio_worker()
+        # Shows the recording on_pause finished as saved.
+        self.show_recording_state()
+    
+    def trim_memory(self, max_idle_minutes=None):
+        """Release content of tabs that haven't been opened recently."""
+        if max_idle_minutes is None:
+            max_idle_minutes = self.TAB_IDLE_RELEASE_MINUTES
+        return self.tab_panel.release_idle(max_idle_minutes * 60)
+    
+    def background_tab_bytes(self):
+        """Estimated memory of built content in tabs other than the current one."""
+        panel = self.tab_panel
+        if panel is None:
+            return 0
+        widgets = sum(count_widgets(tab.content) for tab in panel.tab_list
+                      if tab is not panel.current_tab and getattr(tab, 'built', False))
+        return widgets * self.WIDGET_BYTES
+    
+    def configure_audio(self):
+        """Detect the output device's native format once and render/process at it."""
+        if self.audio_output is None:
+            try:
+                output = detect_output()
+            except ValueError as e:
+                print(f"Error in audio output override: {e}")
+                output = OutputConfig(DEFAULT_SAMPLE_RATE, DEFAULT_FRAMES_PER_BUFFER, 'default')
+            self.soundboard.set_sample_rate(output.sample_rate)
+            self.voice_engine.sample_rate = output.sample_rate
+            self.previews.set_sample_rate(output.sample_rate)
+            startup.note('sample_rate', output.sample_rate)
+            self.audio_output = output
+        return self.audio_output
+    
+    def warm_sounds(self):
+        """Render soundboard templates in the background, one after another."""
+        pending = list(self.soundboard.templates)
+        
+        def step(dt):
+            if pending:
+                self.tasks.run('sound.warm', self.soundboard.ensure_sound, pending.pop(0),
+                               on_done=lambda path: Clock.schedule_once(step, 0.05))
+            else:
+                startup.mark('sounds_ready')
+                startup.note('peak_rss_kb', memory_usage()['peak_rss_kb'])
+                print(f"Startup: {startup.summary()}")
+                self.warm_previews()
+        
+        Clock.schedule_once(step, 0.05)
+    
+    def warm_previews(self):
+        """Render voice preset previews in the background; cached on disk after the first launch."""
+        pending = list(self.voice_engine.VOICE_PRESETS)
+        dsp_mode = self.voice_engine.dsp_mode
+        
+        def step(dt):
+            if pending:
+                self.tasks.run('preview.warm', self.previews.render, preset_params(pending.pop(0), dsp_mode),
+                               on_done=lambda path: Clock.schedule_once(step, 0.05))
+        
+        Clock.schedule_once(step, 0.05)
+    
+    def on_stop(self):
+        self.tasks.close()
+        self._preview_render.cancel()
+        self.settings_manager.close()
+        if self.recorder is not None:
+            self.stop_recording()
+        self.stop_audio_worker()
+        if self.icon_loader is not None:
+            print(f"App icons: {self.icon_loader.stats()}")
+            self.icon_loader.close()
+            self.icon_loader = None
+        if perf.enabled:
+            perf.dump(os.path.join(os.path.expanduser('~'), 'cyn_perf.json'))
+    
+    @perf.timed('ui.build_settings_tab')
     def build_settings_tab(self):
         main_layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
-        header = Label(text='App Settings', size_hint_y=0.1, font_size='20sp', bold=True)
+        header = StaticLabel(text='App Settings', size_hint_y=0.1, font_size='20sp', bold=True)
         main_layout.add_widget(header)
         
-        scroll_view = ScrollView(size_hint=(1, 0.9))
-        self.apps_grid = GridLayout(cols=1, spacing=5, size_hint_y=None)
-        self.apps_grid.bind(minimum_height=self.apps_grid.setter('height'))
+        # Listing packages goes through the PackageManager; show the list when it's in.
+        placeholder = StaticLabel(text='Loading apps...', size_hint=(1, 0.9))
+        main_layout.add_widget(placeholder)
         
-        installed_apps = get_installed_apps()
-        if not installed_apps:
-            self.apps_grid.add_widget(Label(text='No apps found', size_hint_y=None, height=50))
-        else:
-            for app in installed_apps:
-                btn = Button(text=app, size_hint_y=None, height=50, background_color=(0.2, 0.6, 0.8, 1))
-                btn.bind(on_press=self.show_app_settings)
-                self.apps_grid.add_widget(btn)
-        
-        scroll_view.add_widget(self.apps_grid)
-        main_layout.add_widget(scroll_view)
+        @perf.timed('ui.app_list')
+        def show_apps(installed_apps):
+            perf.count('ui.app_list.apps', len(installed_apps))
+            if not installed_apps:
+                scroll_view = ScrollView(size_hint=(1, 0.9))
+                scroll_view.add_widget(StaticLabel(text='No apps found', size_hint_y=None, height=50))
+            else:
+                from app_list import AppListView
+                # Labels and icons load in the background for the rows on screen.
+                scroll_view = AppListView(installed_apps, self.get_icon_loader(), self.show_app_settings,
+                                          size_hint=(1, 0.9))
+                # Weak, so releasing the tab frees the rows' icons.
+                self._app_list = weakref.ref(scroll_view)
+            main_layout.remove_widget(placeholder)
+            main_layout.add_widget(scroll_view)
+        
+        self.tasks.run('apps.list', get_installed_apps, on_done=show_apps)
         return main_layout
     
+    def get_icon_loader(self):
+        """The app label/icon loader, shared by rebuilds of the settings tab."""
+        if self.icon_loader is None:
+            from app_icons import AppIconLoader
+            self.icon_loader = AppIconLoader(os.path.join(os.path.expanduser('~'), 'app_icons'))
+        return self.icon_loader
+    
+    def app_list_view(self):
+        return self._app_list() if self._app_list is not None else None
+    
+    def icon_bytes(self):
+        """Icon textures held by the loader's LRU or by rows of the app list."""
+        if self.icon_loader is None:
+            return 0
+        view = self.app_list_view()
+        return self.icon_loader.cache.held_bytes(view.icon_textures() if view is not None else ())
+    
+    def trim_icons(self, level):
+        """Drop the icon LRU; once the app is out of view, the rows' icons too."""
+        if self.icon_loader is not None:
+            self.icon_loader.cache.clear()
+        view = self.app_list_view()
+        if view is not None and level >= TRIM_MEMORY_UI_HIDDEN:
+            view.release_icons()
+    
+    @perf.timed('ui.settings_popup')
     def show_app_settings(self, instance):
-        app_name = instance.text
+        from kivy.uix.popup import Popup
+        from kivy.uix.slider import Slider
+        from kivy.uix.spinner import Spinner
+        from kivy.uix.switch import Switch
+        
+        app_name = getattr(instance, 'package', instance.text)
         settings = self.settings_manager.get_app_settings(app_name)
         
         content = BoxLayout(orientation='vertical', padding=10, spacing=10)
@@ -388,39 +359,40 @@ class CynEnhancementsApp(App):
         settings_layout.bind(minimum_height=settings_layout.setter('height'))
         
         # FPS Controls
-        settings_layout.add_widget(Label(text='Performance', size_hint_y=None, height=25, bold=True))
+        settings_layout.add_widget(StaticLabel(text='Performance', size_hint_y=None, height=25, bold=True))
         
         for key in ['fps_cap', 'target_fps', 'refresh_rate']:
-            label = Label(text=f'{key}: {int(settings[key])}', size_hint_y=None, height=30)
+            label = NumericLabel(text=f'{key}: {int(settings[key])}', size_hint_y=None, height=30)
             settings_layout.add_widget(label)
             slider = Slider(min=30, max=240, value=settings[key], size_hint_y=None, height=40)
             
-            def update_val(s, k=key, l=label, app=app_name):
-                val = int(s.value)
-                l.text = f'{k}: {val}'
-                self.settings_manager.update_app_setting(app, k, val)
+            def update_val(value, k=key, l=label):
+                l.text = f'{k}: {int(value)}'
             
-            slider.bind(value=update_val)
+            def commit_val(value, k=key, app=app_name):
+                self.settings_manager.update_app_setting(app, k, int(value))
+            
+            bind_coalesced(slider, update_val, commit_val)
             settings_layout.add_widget(slider)
         
         # Graphics
-        settings_layout.add_widget(Label(text='Graphics', size_hint_y=None, height=25, bold=True))
+        settings_layout.add_widget(StaticLabel(text='Graphics', size_hint_y=None, height=25, bold=True))
         
         for key in ['resolution_scale', 'shadow_quality', 'texture_quality']:
-            label = Label(text=f'{key}: {settings[key]}', size_hint_y=None, height=30)
+            label = NumericLabel(text=f'{key}: {settings[key]}', size_hint_y=None, height=30)
             settings_layout.add_widget(label)
             
             if key == 'resolution_scale':
                 slider = Slider(min=0.5, max=1.5, value=settings[key], size_hint_y=None, height=40)
-                def update_res(s, l=label, app=app_name):
-                    val = round(s.value, 2)
-                    l.text = f'resolution_scale: {val}'
-                    self.settings_manager.update_app_setting(app, 'resolution_scale', val)
-                slider.bind(value=update_res)
+                def update_res(value, l=label):
+                    l.text = f'resolution_scale: {round(value, 2)}'
+                def commit_res(value, app=app_name):
+                    self.settings_manager.update_app_setting(app, 'resolution_scale', round(value, 2))
+                bind_coalesced(slider, update_res, commit_res)
             else:
                 spinner = Spinner(
                     text=settings[key],
-                    values=['low', 'medium', 'high', 'ultra'],
+                    values=SETTING_FIELDS[key].choices,
                     size_hint_y=None,
                     height=50
                 )
@@ -433,10 +405,10 @@ class CynEnhancementsApp(App):
             settings_layout.add_widget(slider)
         
         # System
-        settings_layout.add_widget(Label(text='System', size_hint_y=None, height=25, bold=True))
+        settings_layout.add_widget(StaticLabel(text='System', size_hint_y=None, height=25, bold=True))
         
         for key in ['memory_limit', 'touch_sensitivity']:
-            label = Label(text=f'{key}: {settings[key]}', size_hint_y=None, height=30)
+            label = NumericLabel(text=f'{key}: {settings[key]}', size_hint_y=None, height=30)
             settings_layout.add_widget(label)
             slider = Slider(
                 min=1024 if key == 'memory_limit' else 0.5,
@@ -446,20 +418,24 @@ class CynEnhancementsApp(App):
                 height=40
             )
             
-            def update_sys(s, k=key, l=label, app=app_name):
-                val = int(s.value) if k == 'memory_limit' else round(s.value, 2)
-                l.text = f'{k}: {val}'
-                self.settings_manager.update_app_setting(app, k, val)
+            def sys_value(value, k=key):
+                return int(value) if k == 'memory_limit' else round(value, 2)
+            
+            def update_sys(value, k=key, l=label):
+                l.text = f'{k}: {sys_value(value)}'
             
-            slider.bind(value=update_sys)
+            def commit_sys(value, k=key, app=app_name):
+                self.settings_manager.update_app_setting(app, k, sys_value(value))
+            
+            bind_coalesced(slider, update_sys, commit_sys)
             settings_layout.add_widget(slider)
         
         # Toggles
-        settings_layout.add_widget(Label(text='Features', size_hint_y=None, height=25, bold=True))
+        settings_layout.add_widget(StaticLabel(text='Features', size_hint_y=None, height=25, bold=True))
         
         for key in ['motion_smoothing', 'haptic_feedback', 'vsync', 'gpu_boost']:
             row = BoxLayout(size_hint_y=None, height=50, spacing=10)
-            row.add_widget(Label(text=key, size_hint_x=0.7))
+            row.add_widget(StaticLabel(text=key, size_hint_x=0.7))
             switch = Switch(active=settings[key], size_hint_x=0.3)
             
             def update_toggle(s, k=key, app=app_name):
@@ -475,21 +451,34 @@ class CynEnhancementsApp(App):
         close_btn = Button(text='Close', size_hint_y=0.08, background_color=(0.8, 0.2, 0.2, 1))
         popup = Popup(title='Settings', content=content, size_hint=(0.95, 0.95))
         close_btn.bind(on_press=popup.dismiss)
+        popup.bind(on_dismiss=lambda instance: self.flush_settings())
         content.add_widget(close_btn)
         popup.open()
     
+    @perf.timed('ui.settings_flush')
+    def flush_settings(self):
+        """Write pending setting changes now, off the UI thread.
+        
+        Supersedes a flush still waiting to run, and leaves the settings
+        writer thread nothing to do for the changes made so far.
+        """
+        self.tasks.run('settings.save', self.settings_manager.save_settings)
+    
+    @perf.timed('ui.build_soundboard_tab')
     def build_soundboard_tab(self):
+        from kivy.uix.slider import Slider
+        
         layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
-        header = Label(text='Sound Effects', size_hint_y=0.08, font_size='18sp', bold=True)
+        header = StaticLabel(text='Sound Effects', size_hint_y=0.08, font_size='18sp', bold=True)
         layout.add_widget(header)
         
         scroll = ScrollView()
         grid = GridLayout(cols=2, spacing=10, size_hint_y=None, padding=10)
         grid.bind(minimum_height=grid.setter('height'))
         
-        for name in self.soundboard.SOUND_TEMPLATES.keys():
+        for name in self.soundboard.templates:
             btn = Button(text=name.title(), background_color=(0.2, 0.6, 0.8, 1), size_hint_y=None, height=60)
-            btn.bind(on_press=lambda x, s=name: self.soundboard.play_sound(s))
+            btn.bind(on_press=lambda x, s=name: self.play_sound(s))
             grid.add_widget(btn)
         
         scroll.add_widget(grid)
@@ -497,94 +486,320 @@ class CynEnhancementsApp(App):
         
         # Master volume
         vol_layout = BoxLayout(size_hint_y=0.12, spacing=10, padding=10)
-        vol_layout.add_widget(Label(text='Master:', size_hint_x=0.2))
-        master_vol = Slider(min=0, max=1, value=0.7, size_hint_x=0.8)
-        master_vol.bind(value=lambda s: self.soundboard.set_master_volume(s.value))
+        vol_layout.add_widget(StaticLabel(text='Master:', size_hint_x=0.2))
+        master_vol = Slider(min=0, max=1, value=self.soundboard.master_volume, size_hint_x=0.8)
+        bind_coalesced(master_vol, self.soundboard.set_master_volume)
         vol_layout.add_widget(master_vol)
         layout.add_widget(vol_layout)
         
         return layout
     
+    @perf.timed('ui.sound_tap')
+    def play_sound(self, name):
+        """Render a sound in the background, then load and play it.
+        
+        A newer tap cancels the render of an older one, so rapid taps play
+        only the last sound.
+        """
+        self.tasks.run('sound.play', self.soundboard.prepare_sound, name,
+                       on_done=lambda path: self.soundboard.play_file(name, path))
+    
+    @perf.timed('ui.voice_preview')
+    def play_voice_preview(self, instance=None):
+        """Play the preview clip of the current voice settings, rendering it first if needed."""
+        self._preview_render.cancel()
+        generation = self.previews.supersede()
+        self.tasks.run('preview.play', self.previews.render, voice_params(self.voice_engine), generation,
+                       on_done=lambda path: self.soundboard.play_file('preview', path))
+    
+    def schedule_voice_preview(self):
+        """Re-render the preview of the current settings once slider changes pause."""
+        self._preview_render.cancel()
+        self._preview_render()
+    
+    def _render_preview(self, dt):
+        generation = self.previews.supersede()
+        self.tasks.run('preview.render', self.previews.render, voice_params(self.voice_engine), generation)
+    
+    @perf.timed('ui.build_voice_tab')
     def build_voice_tab(self):
+        from kivy.uix.slider import Slider
+        from kivy.uix.spinner import Spinner
+        # Loaded with the tab: the analysis path may pull in NumPy.
+        from analysis_view import LevelSpectrumView
+        
+        # Controls start from the engine state so a released tab rebuilds as it was.
+        engine = self.voice_engine
         layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
-        header = Label(text='Voice Changer', size_hint_y=0.08, font_size='18sp', bold=True)
+        header = StaticLabel(text='Voice Changer', size_hint_y=0.08, font_size='18sp', bold=True)
         layout.add_widget(header)
         
+        self.voice_meters = LevelSpectrumView(self.voice_analysis(), size_hint_y=0.18)
+        layout.add_widget(self.voice_meters)
+        buttons = BoxLayout(size_hint_y=0.07, spacing=10)
+        test_btn = Button(text='Test Signal', background_color=(0.2, 0.6, 0.8, 1))
+        test_btn.bind(on_press=self.play_test_signal)
+        buttons.add_widget(test_btn)
+        record_btn = Button(background_color=(0.7, 0.2, 0.2, 1))
+        buttons.add_widget(record_btn)
+        layout.add_widget(buttons)
+        record_status = Label(text='', size_hint_y=0.04, font_size='12sp')
+        layout.add_widget(record_status)
+        
+        def show_recording_state():
+            stats = self.last_recording
+            if self.recorder is not None:
+                record_btn.text = 'Stop Recording'
+                record_status.text = 'Recording...'
+            else:
+                record_btn.text = 'Record'
+                record_status.text = '' if stats is None else (
+                    f"Saved {os.path.basename(stats['path'])}: {stats['seconds']:.1f} s, "
+                    f"{stats['dropped_blocks']} blocks dropped")
+        
+        def toggle_recording(instance):
+            if self.recorder is None:
+                self.start_recording()
+            else:
+                self.stop_recording()
+        
+        record_btn.bind(on_press=toggle_recording)
+        # Recordings also end outside the tab (on_pause); they refresh it through this.
+        self._show_recording = show_recording_state
+        show_recording_state()
+        
+        def bind_voice_param(slider, on_change, previewed=True):
+            if previewed:
+                bind_coalesced(slider, lambda v: (on_change(v), self.push_voice_params(), self.schedule_voice_preview()))
+            else:
+                bind_coalesced(slider, lambda v: (on_change(v), self.push_voice_params()))
+        
         scroll = ScrollView()
         controls = GridLayout(cols=1, spacing=15, size_hint_y=None, padding=10)
         controls.bind(minimum_height=controls.setter('height'))
         
         # Presets
-        controls.add_widget(Label(text='Voice Presets:', size_hint_y=None, height=25, bold=True))
+        controls.add_widget(StaticLabel(text='Voice Presets:', size_hint_y=None, height=25, bold=True))
         preset_spinner = Spinner(
-            text='Normal',
+            text=self.voice_engine.current_preset.title(),
             values=list(self.voice_engine.VOICE_PRESETS.keys()),
             size_hint_y=None,
             height=50
         )
-        preset_spinner.bind(text=lambda s: self.voice_engine.apply_preset(s.text.lower()))
+        preset_spinner.bind(text=lambda s, text: (self.voice_engine.apply_preset(text.lower()), self.push_voice_params(),
+                                                  self.play_voice_preview()))
         controls.add_widget(preset_spinner)
+        preview_btn = Button(text='Preview', size_hint_y=None, height=50, background_color=(0.2, 0.6, 0.8, 1))
+        preview_btn.bind(on_press=self.play_voice_preview)
+        controls.add_widget(preview_btn)
+        controls.add_widget(StaticLabel(text='Pitch, speed and reverb are not previewed', size_hint_y=None, height=20,
+                                        font_size='12sp'))
         
         # Pitch
-        controls.add_widget(Label(text='Pitch (semitones):', size_hint_y=None, height=25))
-        pitch_label = Label(text='0', size_hint_y=None, height=30)
+        controls.add_widget(StaticLabel(text='Pitch (semitones):', size_hint_y=None, height=25))
+        pitch_label = NumericLabel(text=str(int(engine.pitch_shift)), size_hint_y=None, height=30)
         controls.add_widget(pitch_label)
-        pitch_slider = Slider(min=-24, max=24, value=0, size_hint_y=None, height=40)
-        pitch_slider.bind(value=lambda s: (setattr(self.voice_engine, 'pitch_shift', int(s.value)), pitch_label.__setattr__('text', str(int(s.value)))))
+        pitch_slider = Slider(min=-24, max=24, value=engine.pitch_shift, size_hint_y=None, height=40)
+        bind_voice_param(pitch_slider, lambda v: (setattr(self.voice_engine, 'pitch_shift', int(v)), pitch_label.__setattr__('text', str(int(v)))), previewed=False)
         controls.add_widget(pitch_slider)
         
         # Speed
-        controls.add_widget(Label(text='Speed:', size_hint_y=None, height=25))
-        speed_label = Label(text='1.0x', size_hint_y=None, height=30)
+        controls.add_widget(StaticLabel(text='Speed:', size_hint_y=None, height=25))
+        speed_label = NumericLabel(text=f'{round(engine.speed, 2)}x', size_hint_y=None, height=30)
         controls.add_widget(speed_label)
-        speed_slider = Slider(min=0.5, max=2.0, value=1.0, size_hint_y=None, height=40)
-        speed_slider.bind(value=lambda s: (setattr(self.voice_engine, 'speed', round(s.value, 2)), speed_label.__setattr__('text', f'{round(s.value, 2)}x')))
+        speed_slider = Slider(min=0.5, max=2.0, value=engine.speed, size_hint_y=None, height=40)
+        bind_voice_param(speed_slider, lambda v: (setattr(self.voice_engine, 'speed', round(v, 2)), speed_label.__setattr__('text', f'{round(v, 2)}x')), previewed=False)
         controls.add_widget(speed_slider)
         
         # EQ - Bass
-        controls.add_widget(Label(text='Bass:', size_hint_y=None, height=25))
-        bass_label = Label(text='0', size_hint_y=None, height=30)
+        controls.add_widget(StaticLabel(text='Bass:', size_hint_y=None, height=25))
+        bass_label = NumericLabel(text=str(int(engine.bass)), size_hint_y=None, height=30)
         controls.add_widget(bass_label)
-        bass_slider = Slider(min=-20, max=20, value=0, size_hint_y=None, height=40)
-        bass_slider.bind(value=lambda s: (setattr(self.voice_engine, 'bass', int(s.value)), bass_label.__setattr__('text', str(int(s.value)))))
+        bass_slider = Slider(min=-20, max=20, value=engine.bass, size_hint_y=None, height=40)
+        bind_voice_param(bass_slider, lambda v: (setattr(self.voice_engine, 'bass', int(v)), bass_label.__setattr__('text', str(int(v)))))
         controls.add_widget(bass_slider)
         
         # EQ - Mid
-        controls.add_widget(Label(text='Mid:', size_hint_y=None, height=25))
-        mid_label = Label(text='0', size_hint_y=None, height=30)
+        controls.add_widget(StaticLabel(text='Mid:', size_hint_y=None, height=25))
+        mid_label = NumericLabel(text=str(int(engine.mid)), size_hint_y=None, height=30)
         controls.add_widget(mid_label)
-        mid_slider = Slider(min=-20, max=20, value=0, size_hint_y=None, height=40)
-        mid_slider.bind(value=lambda s: (setattr(self.voice_engine, 'mid', int(s.value)), mid_label.__setattr__('text', str(int(s.value)))))
+        mid_slider = Slider(min=-20, max=20, value=engine.mid, size_hint_y=None, height=40)
+        bind_voice_param(mid_slider, lambda v: (setattr(self.voice_engine, 'mid', int(v)), mid_label.__setattr__('text', str(int(v)))))
         controls.add_widget(mid_slider)
         
         # EQ - Treble
-        controls.add_widget(Label(text='Treble:', size_hint_y=None, height=25))
-        treble_label = Label(text='0', size_hint_y=None, height=30)
+        controls.add_widget(StaticLabel(text='Treble:', size_hint_y=None, height=25))
+        treble_label = NumericLabel(text=str(int(engine.treble)), size_hint_y=None, height=30)
         controls.add_widget(treble_label)
-        treble_slider = Slider(min=-20, max=20, value=0, size_hint_y=None, height=40)
-        treble_slider.bind(value=lambda s: (setattr(self.voice_engine, 'treble', int(s.value)), treble_label.__setattr__('text', str(int(s.value)))))
+        treble_slider = Slider(min=-20, max=20, value=engine.treble, size_hint_y=None, height=40)
+        bind_voice_param(treble_slider, lambda v: (setattr(self.voice_engine, 'treble', int(v)), treble_label.__setattr__('text', str(int(v)))))
         controls.add_widget(treble_slider)
         
         # Effects
-        controls.add_widget(Label(text='Reverb:', size_hint_y=None, height=25))
-        reverb_label = Label(text='0%', size_hint_y=None, height=30)
+        controls.add_widget(StaticLabel(text='Reverb:', size_hint_y=None, height=25))
+        reverb_label = NumericLabel(text=f'{int(engine.reverb_amount)}%', size_hint_y=None, height=30)
         controls.add_widget(reverb_label)
-        reverb_slider = Slider(min=0, max=100, value=0, size_hint_y=None, height=40)
-        reverb_slider.bind(value=lambda s: (setattr(self.voice_engine, 'reverb_amount', int(s.value)), reverb_label.__setattr__('text', f'{int(s.value)}%')))
+        reverb_slider = Slider(min=0, max=100, value=engine.reverb_amount, size_hint_y=None, height=40)
+        bind_voice_param(reverb_slider, lambda v: (setattr(self.voice_engine, 'reverb_amount', int(v)), reverb_label.__setattr__('text', f'{int(v)}%')), previewed=False)
         controls.add_widget(reverb_slider)
         
-        controls.add_widget(Label(text='Distortion:', size_hint_y=None, height=25))
-        distortion_label = Label(text='0%', size_hint_y=None, height=30)
+        controls.add_widget(StaticLabel(text='Distortion:', size_hint_y=None, height=25))
+        distortion_label = NumericLabel(text=f'{int(engine.distortion)}%', size_hint_y=None, height=30)
         controls.add_widget(distortion_label)
-        distortion_slider = Slider(min=0, max=100, value=0, size_hint_y=None, height=40)
-        distortion_slider.bind(value=lambda s: (setattr(self.voice_engine, 'distortion', int(s.value)), distortion_label.__setattr__('text', f'{int(s.value)}%')))
+        distortion_slider = Slider(min=0, max=100, value=engine.distortion, size_hint_y=None, height=40)
+        bind_voice_param(distortion_slider, lambda v: (setattr(self.voice_engine, 'distortion', int(v)), distortion_label.__setattr__('text', f'{int(v)}%')))
         controls.add_widget(distortion_slider)
         
         scroll.add_widget(controls)
         layout.add_widget(scroll)
         
         return layout
+    
+    def release_voice_tab(self, content):
+        """Stop the meters and drop the callbacks of a released Voice tab so it can be collected."""
+        if self.voice_meters is not None:
+            self.voice_meters.stop()
+            self.voice_meters = None
+        self._show_recording = None
+    
+    def show_recording_state(self):
+        """Bring the Voice tab's record button and status up to date, if it's built."""
+        if self._show_recording is not None:
+            self._show_recording()
+    
+    def voice_analysis(self):
+        """Source of the Voice tab meters.
+        
+        The DSP worker while it runs; without one, whatever last went
+        through engine.process() on this thread.
+        """
+        if self.audio_worker is not None:
+            return self.audio_worker.analysis
+        engine = self.voice_engine
+        if engine.analysis is None:
+            from audio_analysis import AnalysisTap
+            engine.analysis = AnalysisTap(sample_rate=engine.sample_rate)
+        return engine.analysis
+    
+    def start_audio_worker(self):
+        """Start the voice DSP worker on first use; returns None if it can't run here."""
+        if self.audio_worker is not None:
+            return self.audio_worker
+        from audio_worker import AudioWorker
+        output = self.configure_audio()
+        worker = AudioWorker(sample_rate=output.sample_rate, block_size=output.block_size(1024))
+        try:
+            worker.start()
+        except (OSError, ValueError) as e:
+            print(f"Error starting audio worker: {e}")
+            return None
+        self.audio_worker = worker
+        self.push_voice_params()
+        if self.voice_meters is not None:
+            self.voice_meters.tap = worker.analysis
+        return worker
+    
+    def stop_audio_worker(self):
+        if self.audio_worker is None:
+            return
+        self.audio_worker.stop()
+        self.audio_worker = None
+        if self.voice_meters is not None:
+            self.voice_meters.tap = self.voice_analysis()
+    
+    def push_voice_params(self):
+        """Send changed voice settings to the DSP worker."""
+        if self.audio_worker is not None:
+            self.audio_worker.send_params(self.voice_engine)
+    
+    def start_recording(self, path=None):
+        """Record the voice DSP output to a WAV file until stop_recording()."""
+        from recorder import WavRecorder
+        if self.recorder is not None:
+            return self.recorder
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), time.strftime('voice-%Y%m%d-%H%M%S.wav'))
+        recorder = WavRecorder(path, sample_rate=self.voice_engine.sample_rate)
+        worker = self.start_audio_worker()
+        if worker is not None and worker.running:
+            # Move the worker's output to the recorder a few times a frame;
+            # the output ring holds a second of audio if the UI is busy.
+            self._ring_dropped = worker.stats()['dropped']
+            # Whatever a previous recording left behind isn't part of this one.
+            worker.pull(worker.layout.ring_capacity)
+            worker.set_output(True)
+            self._record_drain = Clock.schedule_interval(self._drain_worker_output, 1 / 30.0)
+        else:
+            self.voice_engine.recorder = recorder
+        self.voice_engine.is_recording = True
+        self.recorder = recorder
+        self.show_recording_state()
+        return recorder
+    
+    def _drain_worker_output(self, dt=None):
+        samples = self.audio_worker.pull(self.audio_worker.layout.ring_capacity)
+        if samples:
+            self.recorder.write(samples)
+    
+    def stop_recording(self):
+        """Finish the current recording and return the recorder's stats."""
+        recorder = self.recorder
+        if recorder is None:
+            return None
+        ring_dropped = 0
+        if self._record_drain is not None:
+            self._record_drain.cancel()
+            self._record_drain = None
+            self.audio_worker.set_output(False)
+            # Blocks written before the worker saw set_output(False) still
+            # belong to this recording; wait for them, then drain.
+            self.audio_worker.sync()
+            self._drain_worker_output()
+            ring_dropped = self.audio_worker.stats()['dropped'] - self._ring_dropped
+        self.voice_engine.recorder = None
+        self.voice_engine.is_recording = False
+        self.recorder = None
+        stats = recorder.close()
+        # Blocks the worker couldn't queue because the UI fell behind.
+        stats['dropped_blocks'] += ring_dropped
+        print(f"Recording: {stats}")
+        self.last_recording = stats
+        self.show_recording_state()
+        return stats
+    
+    def play_test_signal(self, instance=None, duration=2.0, block_size=1024):
+        """Feed a 100 Hz - 5 kHz sweep through the voice DSP, one block per tick."""
+        worker = self.start_audio_worker()
+        if worker is not None and worker.running:
+            worker.set_source('sweep')
+            Clock.schedule_once(lambda dt: worker.set_source(None), duration)
+            return
+        engine = self.voice_engine
+        rate = engine.sample_rate
+        block_size = self.configure_audio().block_size(block_size)
+        scheduler = QualityScheduler(engine, block_size, rate)
+        total = int(rate * duration)
+        state = {'pos': 0, 'phase': 0.0}
+        
+        def step(dt):
+            start = state['pos']
+            if start >= total:
+                return False
+            block = array.array('h')
+            phase = state['phase']
+            for i in range(start, min(total, start + block_size)):
+                freq = 100.0 * 50.0 ** (i / total)
+                phase += 2.0 * math.pi * freq / rate
+                block.append(int(24000 * math.sin(phase)))
+            state['pos'] += len(block)
+            state['phase'] = phase % (2.0 * math.pi)
+            scheduler.process(block.tobytes())
+            if state['pos'] >= total:
+                print(f"Test signal DSP: {scheduler.stats()}")
+        
+        Clock.schedule_interval(step, block_size / rate)
 
 
 if __name__ == '__main__':
-    CynEnhancementsApp().run()
+    # On asyncio's loop, background tasks report back through the same loop as the UI.
+    asyncio.run(CynEnhancementsApp().async_run(async_lib='asyncio'))
@@ -0,0 +1,224 @@
+import os
+import signal
+import time
+
+from perf import memory_usage, perf
+
+
+# Android ComponentCallbacks2.onTrimMemory levels; higher is more urgent.
+TRIM_MEMORY_RUNNING_MODERATE = 5
+TRIM_MEMORY_RUNNING_LOW = 10
+TRIM_MEMORY_RUNNING_CRITICAL = 15
+TRIM_MEMORY_UI_HIDDEN = 20
+TRIM_MEMORY_BACKGROUND = 40
+TRIM_MEMORY_MODERATE = 60
+TRIM_MEMORY_COMPLETE = 80
+
+LEVEL_NAMES = {
+    TRIM_MEMORY_RUNNING_MODERATE: 'running_moderate',
+    TRIM_MEMORY_RUNNING_LOW: 'running_low',
+    TRIM_MEMORY_RUNNING_CRITICAL: 'running_critical',
+    TRIM_MEMORY_UI_HIDDEN: 'ui_hidden',
+    TRIM_MEMORY_BACKGROUND: 'background',
+    TRIM_MEMORY_MODERATE: 'moderate',
+    TRIM_MEMORY_COMPLETE: 'complete',
+}
+
+DEFAULT_BUDGET_MB = 64.0
+
+
+def level_name(level):
+    return LEVEL_NAMES.get(level, str(level))
+
+
+def budget_from_env():
+    """Budget in bytes from CYN_MEMORY_BUDGET_MB, else DEFAULT_BUDGET_MB."""
+    value = os.environ.get('CYN_MEMORY_BUDGET_MB')
+    if value:
+        try:
+            return int(float(value) * 1024 * 1024)
+        except ValueError:
+            print(f"Error in CYN_MEMORY_BUDGET_MB: {value!r} is not a number")
+    return int(DEFAULT_BUDGET_MB * 1024 * 1024)
+
+
+class _Consumer:
+
+    __slots__ = ('name', 'resident', 'trim', 'priority', 'level', 'ui')
+
+    def __init__(self, name, resident, trim, priority, level, ui):
+        self.name = name
+        self.resident = resident
+        self.trim = trim
+        self.priority = priority
+        self.level = level
+        self.ui = ui
+
+
+class MemoryBudget:
+    """Resident bytes of the app's caches against one budget, and trimming.
+
+    Subsystems register resident() -> bytes and trim(level), which drops
+    what it can at that onTrimMemory level. trim(level) calls every
+    consumer registered for that level or lower in priority order, the
+    cheapest to rebuild first; check() trims the same way, but only while
+    the total is over max_bytes and no deeper than TRIM_MEMORY_RUNNING_CRITICAL.
+    TRIM_MEMORY_UI_HIDDEN means the app only went out of view, not that
+    memory is short, so it trims just the consumers registered with ui=True.
+    Each trim returns a report of what every consumer held before and
+    after, which is also kept in last_report.
+
+    Bytes are what the subsystems account for (texture, sample and decoded
+    settings buffers, estimated widget trees), not the process RSS; freed
+    Python memory isn't always returned to the OS at once.
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = budget_from_env() if max_bytes is None else max_bytes
+        self._consumers = []
+        self.last_report = None
+        self.counts = {'trims': 0, 'checks': 0, 'over_budget': 0}
+
+    def register(self, name, resident, trim, priority, level=TRIM_MEMORY_RUNNING_MODERATE, ui=False):
+        """Account for a subsystem; lower priority is trimmed first, from pressure level on."""
+        self.unregister(name)
+        self._consumers.append(_Consumer(name, resident, trim, priority, level, ui))
+        self._consumers.sort(key=lambda c: c.priority)
+
+    def unregister(self, name):
+        self._consumers = [c for c in self._consumers if c.name != name]
+
+    def _resident(self, consumer):
+        try:
+            return int(consumer.resident())
+        except Exception as e:
+            print(f"Error measuring {consumer.name}: {e}")
+            return 0
+
+    def usage(self):
+        """{consumer name: resident bytes}, in priority order."""
+        return {c.name: self._resident(c) for c in self._consumers}
+
+    def total(self):
+        return sum(self.usage().values())
+
+    def trim(self, level, reason='pressure', until_bytes=None):
+        """Trim every consumer registered at or below level, stopping once under until_bytes."""
+        start = time.perf_counter()
+        rss_before = memory_usage()['rss_kb']
+        before = self.usage()
+        remaining = sum(before.values())
+        after = dict(before)
+        trimmed = []
+        for consumer in self._consumers:
+            if until_bytes is not None and remaining <= until_bytes:
+                break
+            if consumer.level > level or not before[consumer.name]:
+                continue
+            if level == TRIM_MEMORY_UI_HIDDEN and not consumer.ui:
+                continue
+            with perf.span(f'memory.trim.{consumer.name}'):
+                try:
+                    consumer.trim(level)
+                except Exception as e:
+                    print(f"Error trimming {consumer.name}: {e}")
+            after[consumer.name] = self._resident(consumer)
+            remaining -= before[consumer.name] - after[consumer.name]
+            trimmed.append(consumer.name)
+        self.counts['trims'] += 1
+        perf.count('memory.trims')
+        report = {
+            'reason': reason,
+            'level': level_name(level),
+            'before_bytes': sum(before.values()),
+            'after_bytes': sum(after.values()),
+            'trimmed': trimmed,
+            'consumers': {name: (before[name], after[name]) for name in before},
+            'rss_kb': (rss_before, memory_usage()['rss_kb']),
+            'ms': (time.perf_counter() - start) * 1000,
+        }
+        self.last_report = report
+        print(f"Memory trim: {format_report(report)}")
+        return report
+
+    def check(self):
+        """Trim while the accounted total is over max_bytes; returns the report or None."""
+        self.counts['checks'] += 1
+        total = self.total()
+        if total <= self.max_bytes:
+            return None
+        self.counts['over_budget'] += 1
+        return self.trim(TRIM_MEMORY_RUNNING_CRITICAL, 'over budget', until_bytes=self.max_bytes)
+
+    def stats(self):
+        usage = self.usage()
+        return dict(self.counts, max_bytes=self.max_bytes, total_bytes=sum(usage.values()), usage=usage)
+
+
+def format_report(report):
+    freed = report['before_bytes'] - report['after_bytes']
+    parts = [f"{report['reason']} at {report['level']}: freed {freed / 1024:.0f} of "
+             f"{report['before_bytes'] / 1024:.0f} KiB in {report['ms']:.1f} ms"]
+    for name in report['trimmed']:
+        before, after = report['consumers'][name]
+        parts.append(f'{name} {before / 1024:.0f}->{after / 1024:.0f}')
+    rss_before, rss_after = report['rss_kb']
+    parts.append(f'RSS {rss_before / 1024:.1f}->{rss_after / 1024:.1f} MiB')
+    return ', '.join(parts)
+
+
+def install_android_callbacks(budget):
+    """Forward onTrimMemory/onLowMemory to budget.trim on the UI thread.
+
+    Returns the registered callbacks object, which must be kept referenced,
+    or None off Android.
+    """
+    try:
+        from jnius import PythonJavaClass, autoclass, java_method
+    except ImportError:
+        return None
+    from kivy.clock import Clock
+
+    class TrimCallbacks(PythonJavaClass):
+        __javainterfaces__ = ['android/content/ComponentCallbacks2']
+        __javacontext__ = 'app'
+
+        @java_method('(I)V')
+        def onTrimMemory(self, level):
+            Clock.schedule_once(lambda dt: budget.trim(level, 'onTrimMemory'))
+
+        @java_method('()V')
+        def onLowMemory(self):
+            Clock.schedule_once(lambda dt: budget.trim(TRIM_MEMORY_COMPLETE, 'onLowMemory'))
+
+        @java_method('(Landroid/content/res/Configuration;)V')
+        def onConfigurationChanged(self, config):
+            pass
+
+    try:
+        callbacks = TrimCallbacks()
+        autoclass('org.kivy.android.PythonActivity').mActivity.registerComponentCallbacks(callbacks)
+    except Exception as e:
+        print(f"Error registering trim callbacks: {e}")
+        return None
+    return callbacks
+
+
+def install_pressure_signals(budget):
+    """Simulate memory pressure on desktop: SIGUSR1 trims at running_critical, SIGUSR2 at complete.
+
+    Returns False where the signals don't exist.
+    """
+    if not hasattr(signal, 'SIGUSR1'):
+        return False
+    from kivy.clock import Clock
+
+    levels = {signal.SIGUSR1: TRIM_MEMORY_RUNNING_CRITICAL, signal.SIGUSR2: TRIM_MEMORY_COMPLETE}
+
+    def handler(signum, frame):
+        level = levels[signum]
+        Clock.schedule_once(lambda dt: budget.trim(level, 'simulated'))
+
+    for signum in levels:
+        signal.signal(signum, handler)
+    return True
@@ -0,0 +1,235 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+class _NullSpan:
+    """Shared no-op context manager handed out while instrumentation is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('perf', 'name', 'start')
+
+    def __init__(self, perf, name):
+        self.perf = perf
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.perf.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class FrameStats:
+    """Rolling FPS and frame-time jitter fed from Clock callbacks."""
+
+    def __init__(self, window=240):
+        self.frame_times = deque(maxlen=window)
+
+    def tick(self, dt):
+        self.frame_times.append(dt)
+
+    def snapshot(self):
+        times = list(self.frame_times)
+        if not times:
+            return {'fps': 0.0, 'frame_ms_mean': 0.0, 'jitter_ms': 0.0, 'frame_ms_p99': 0.0}
+        mean = sum(times) / len(times)
+        variance = sum((t - mean) ** 2 for t in times) / len(times)
+        return {
+            'fps': 1.0 / mean if mean else 0.0,
+            'frame_ms_mean': mean * 1000,
+            'jitter_ms': variance ** 0.5 * 1000,
+            'frame_ms_p99': percentile(sorted(times), 99) * 1000,
+        }
+
+
+def process_start_time():
+    """Wall-clock time the interpreter process started, or None if unknown."""
+    try:
+        with open('/proc/self/stat', 'r') as f:
+            # Field 22 is the start time in clock ticks since boot; the command
+            # name in field 2 may contain spaces, so split after its ')'.
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime', 'r') as f:
+            uptime = float(f.read().split()[0])
+        boot_time = time.time() - uptime
+        return boot_time + start_ticks / os.sysconf('SC_CLK_TCK')
+    except Exception:
+        return None
+
+
+def memory_usage():
+    """Current and peak resident set size in KiB (0 where unavailable)."""
+    rss_kb = peak_kb = 0
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    rss_kb = int(line.split()[1])
+                elif line.startswith('VmHWM:'):
+                    peak_kb = int(line.split()[1])
+    except Exception:
+        try:
+            import resource
+            peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        except Exception:
+            pass
+    return {'rss_kb': rss_kb, 'peak_rss_kb': peak_kb}
+
+
+class StartupProbe:
+    """Timestamps from process start to first frame to interactive.
+
+    Marks are always recorded; there are only a handful per run.
+    """
+
+    def __init__(self):
+        self.origin = process_start_time()
+        self.created = time.time()
+        if self.origin is None or self.origin > self.created:
+            self.origin = self.created
+        self.marks = []
+        self.notes = {}
+
+    def mark(self, name):
+        self.marks.append((name, time.time()))
+
+    def note(self, name, value):
+        """Attach a non-timing figure (widget count, memory) to the report."""
+        self.notes[name] = value
+
+    def elapsed(self, name):
+        for mark, ts in self.marks:
+            if mark == name:
+                return ts - self.origin
+        return None
+
+    def report(self):
+        return {name: (ts - self.origin) * 1000 for name, ts in self.marks}
+
+    def summary(self):
+        parts = [f'{name}={ms:.0f}ms' for name, ms in self.report().items()]
+        parts.extend(f'{name}={value}' for name, value in self.notes.items())
+        return '  '.join(parts)
+
+
+class Instrumentation:
+    """Span timers and counters with rolling percentiles.
+
+    Disabled by default; set CYN_PERF=1 to turn it on. While disabled,
+    span() returns a shared no-op and timed() skips straight to the call.
+    """
+
+    def __init__(self, enabled=False, window=512):
+        self.enabled = enabled
+        self.window = window
+        self.spans = {}
+        self.totals = {}
+        self.counters = {}
+        self.frames = FrameStats()
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name):
+        """Decorator form of span()."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds):
+        with self._lock:
+            samples = self.spans.get(name)
+            if samples is None:
+                samples = self.spans[name] = deque(maxlen=self.window)
+                self.totals[name] = [0, 0.0]
+            samples.append(seconds)
+            total = self.totals[name]
+            total[0] += 1
+            total[1] += seconds
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.totals.clear()
+            self.counters.clear()
+            self.frames = FrameStats()
+
+    def stats(self):
+        """Per-span p50/p95/p99 over the rolling window, in milliseconds."""
+        with self._lock:
+            items = [(name, sorted(samples), list(self.totals[name]))
+                     for name, samples in self.spans.items()]
+        result = {}
+        for name, samples, (calls, total) in items:
+            result[name] = {
+                'calls': calls,
+                'total_ms': total * 1000,
+                'p50_ms': percentile(samples, 50) * 1000,
+                'p95_ms': percentile(samples, 95) * 1000,
+                'p99_ms': percentile(samples, 99) * 1000,
+                'max_ms': samples[-1] * 1000 if samples else 0.0,
+            }
+        return result
+
+    def report(self):
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            'spans': self.stats(),
+            'counters': counters,
+            'frames': self.frames.snapshot(),
+            'startup_ms': startup.report(),
+            'startup_notes': dict(startup.notes),
+        }
+
+    def dump(self, path):
+        try:
+            with open(path, 'w') as f:
+                json.dump(self.report(), f, indent=2, sort_keys=True)
+        except Exception as e:
+            print(f"Error writing perf report: {e}")
+
+
+startup = StartupProbe()
+perf = Instrumentation(enabled=os.environ.get('CYN_PERF') == '1')
@@ -0,0 +1,70 @@
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.graphics import Color, Rectangle
+from kivy.uix.label import Label
+
+from perf import perf
+
+
+class PerfHUD(Label):
+    """On-screen overlay with FPS, jitter and the slowest spans.
+
+    Triple-tap anywhere to show or hide it.
+    """
+
+    REFRESH_INTERVAL = 0.5
+    MAX_SPANS = 6
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('font_size', '11sp')
+        kwargs.setdefault('halign', 'left')
+        kwargs.setdefault('valign', 'top')
+        kwargs.setdefault('size_hint', (None, None))
+        super().__init__(**kwargs)
+        self.visible = False
+        with self.canvas.before:
+            Color(0, 0, 0, 0.6)
+            self._bg = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self._update_bg, size=self._update_bg, texture_size=self._fit)
+        self._refresh_event = None
+
+    @classmethod
+    def install(cls):
+        """Start frame sampling and attach the triple-tap toggle to the window."""
+        hud = cls()
+        Clock.schedule_interval(perf.frames.tick, 0)
+        Window.bind(on_touch_down=hud._on_window_touch)
+        return hud
+
+    def _update_bg(self, *args):
+        self._bg.pos = self.pos
+        self._bg.size = self.size
+
+    def _fit(self, *args):
+        self.size = self.texture_size
+        self.pos = (0, Window.height - self.height)
+
+    def _on_window_touch(self, window, touch):
+        if getattr(touch, 'is_triple_tap', False):
+            self.toggle()
+        return False
+
+    def toggle(self):
+        if self.visible:
+            self._refresh_event.cancel()
+            Window.remove_widget(self)
+        else:
+            Window.add_widget(self)
+            self.refresh()
+            self._refresh_event = Clock.schedule_interval(self.refresh, self.REFRESH_INTERVAL)
+        self.visible = not self.visible
+
+    def refresh(self, *args):
+        frames = perf.frames.snapshot()
+        lines = [f"{frames['fps']:.0f} fps  {frames['frame_ms_mean']:.1f} ms  "
+                 f"jitter {frames['jitter_ms']:.1f} ms"]
+        spans = sorted(perf.stats().items(), key=lambda item: item[1]['p95_ms'], reverse=True)
+        for name, stats in spans[:self.MAX_SPANS]:
+            lines.append(f"{name}  p50 {stats['p50_ms']:.1f}  p95 {stats['p95_ms']:.1f}  "
+                         f"p99 {stats['p99_ms']:.1f}")
+        self.text = '\n'.join(lines)
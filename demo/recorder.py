@@ -0,0 +1,171 @@
+import struct
+import threading
+import time
+
+
+# Canonical 44-byte PCM WAV header. The RIFF and data sizes are written as
+# placeholders and patched by close(); until then they read as "to the end
+# of the file", which most players accept if the app dies mid-recording.
+WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+RIFF_SIZE_OFFSET = 4
+DATA_SIZE_OFFSET = 40
+UNKNOWN_SIZE = 0xFFFFFFFF
+MAX_DATA_BYTES = UNKNOWN_SIZE - (WAV_HEADER.size - 8)
+
+
+def wav_header(sample_rate, channels, sample_width, data_bytes):
+    block_align = channels * sample_width
+    riff_size = UNKNOWN_SIZE if data_bytes == UNKNOWN_SIZE else WAV_HEADER.size - 8 + data_bytes
+    return WAV_HEADER.pack(b'RIFF', riff_size, b'WAVE', b'fmt ', 16, 1, channels,
+                           sample_rate, sample_rate * block_align, block_align,
+                           sample_width * 8, b'data', data_bytes)
+
+
+class WavRecorder:
+    """Streams 16-bit PCM blocks to a WAV file from a background thread.
+
+    write() copies each block into one of two fixed buffers and returns
+    without touching the disk. When the buffer being filled is full it is
+    handed to the writer thread and filling continues in the other one, so
+    memory use stays at two buffers however long the recording runs. If the
+    writer still holds the other buffer (storage stalled for longer than a
+    buffer's worth of audio), the block is dropped and counted instead of
+    blocking the caller.
+    """
+
+    def __init__(self, path, sample_rate=44100, channels=1, buffer_seconds=0.5):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = 2
+        block_align = channels * self.sample_width
+        self.buffer_size = max(block_align, int(sample_rate * buffer_seconds) * block_align)
+        self._buffers = (bytearray(self.buffer_size), bytearray(self.buffer_size))
+        self._fill = 0
+        self._used = 0
+        # (buffer index, length) owned by the writer thread, or None.
+        self._pending = None
+        self._closing = False
+        self._cond = threading.Condition()
+
+        self.blocks = 0
+        self.dropped_blocks = 0
+        self.dropped_bytes = 0
+        self.data_bytes = 0
+        self.max_write_s = 0.0
+        self.error = None
+        self._accepted_bytes = 0
+        self._started = time.perf_counter()
+
+        self._file = open(path, 'wb')
+        self._file.write(wav_header(sample_rate, channels, self.sample_width, UNKNOWN_SIZE))
+        self._writer = threading.Thread(target=self._writer_loop, name='wav-writer', daemon=True)
+        self._writer.start()
+
+    @property
+    def closed(self):
+        return self._file is None
+
+    def write(self, samples):
+        """Queue a block of samples (bytes or array('h')); False if it was dropped."""
+        data = memoryview(samples).cast('B')
+        if len(data) > self.buffer_size:
+            accepted = True
+            for start in range(0, len(data), self.buffer_size):
+                accepted = self.write(data[start:start + self.buffer_size]) and accepted
+            return accepted
+        with self._cond:
+            if self._closing:
+                raise ValueError("write to a closed recorder")
+            if self.error is not None or self._accepted_bytes + len(data) > MAX_DATA_BYTES:
+                return self._drop(len(data))
+            if self._used + len(data) > self.buffer_size and not self._hand_off():
+                return self._drop(len(data))
+            self._buffers[self._fill][self._used:self._used + len(data)] = data
+            self._used += len(data)
+            self._accepted_bytes += len(data)
+            self.blocks += 1
+            return True
+
+    def _drop(self, length):
+        self.dropped_blocks += 1
+        self.dropped_bytes += length
+        return False
+
+    def _hand_off(self):
+        """Give the filled buffer to the writer; False while it is still busy."""
+        if self._pending is not None:
+            return False
+        self._pending = (self._fill, self._used)
+        self._fill ^= 1
+        self._used = 0
+        self._cond.notify_all()
+        return True
+
+    def _write_buffer(self, data):
+        self._file.write(data)
+
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closing:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                index, length = self._pending
+            start = time.perf_counter()
+            try:
+                self._write_buffer(memoryview(self._buffers[index])[:length])
+            except OSError as e:
+                print(f"Error writing recording: {e}")
+                written = 0
+                error = e
+            else:
+                written = length
+                error = None
+            elapsed = time.perf_counter() - start
+            with self._cond:
+                self.data_bytes += written
+                if error is not None and self.error is None:
+                    self.error = error
+                self.max_write_s = max(self.max_write_s, elapsed)
+                self._pending = None
+                self._cond.notify_all()
+
+    def close(self):
+        """Flush what is buffered, patch the header and return stats()."""
+        if self._file is None:
+            return self.stats()
+        with self._cond:
+            while self._pending is not None:
+                self._cond.wait()
+            if self._used:
+                self._hand_off()
+            self._closing = True
+            self._cond.notify_all()
+        self._writer.join()
+        try:
+            self._file.seek(RIFF_SIZE_OFFSET)
+            self._file.write(struct.pack('<I', WAV_HEADER.size - 8 + self.data_bytes))
+            self._file.seek(DATA_SIZE_OFFSET)
+            self._file.write(struct.pack('<I', self.data_bytes))
+        except OSError as e:
+            print(f"Error finishing recording: {e}")
+            self.error = self.error or e
+        finally:
+            self._file.close()
+            self._file = None
+        return self.stats()
+
+    def stats(self):
+        frame_bytes = self.channels * self.sample_width
+        return {
+            'path': self.path,
+            'seconds': self.data_bytes / frame_bytes / self.sample_rate,
+            'blocks': self.blocks,
+            'dropped_blocks': self.dropped_blocks,
+            'dropped_seconds': self.dropped_bytes / frame_bytes / self.sample_rate,
+            'max_write_ms': self.max_write_s * 1000,
+            'buffer_bytes': 2 * self.buffer_size,
+            'wall_seconds': time.perf_counter() - self._started,
+        }
@@ -0,0 +1,371 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+from perf import perf
+from settings_schema import default_settings, validate_setting
+from settings_store import SettingsStore, StoreSettings
+from synth_graph import validate_graph
+
+
+class AppSettingsManager:
+    """Manages comprehensive app settings.
+    
+    Safe to use from several threads. Per-app settings dicts are replaced,
+    never mutated, so a dict returned by get_app_settings is a consistent
+    snapshot that readers can use without locking (treat it as read-only).
+    Writers are serialised by a lock, and persisting is left to a single
+    background writer thread that batches everything dirtied in the last
+    WRITE_DELAY seconds into one slot write pass and one msync.
+    """
+    
+    # Defaults, types, ranges and enums live in settings_schema.SETTINGS_SCHEMA.
+    DEFAULT_SETTINGS = default_settings()
+    
+    # Built-in profiles; each only lists the keys it changes.
+    PROFILES = {
+        'battery_saver': {
+            'fps_cap': 30,
+            'target_fps': 30,
+            'refresh_rate': 60,
+            'resolution_scale': 0.75,
+            'graphics_quality': 'low',
+            'shadow_quality': 'low',
+            'texture_quality': 'medium',
+            'power_profile': 'powersave',
+            'cpu_threads': 2,
+            'gpu_boost': False,
+            'cpu_governor': 'powersave',
+        },
+        'balanced': {
+            'fps_cap': 60,
+            'target_fps': 60,
+            'refresh_rate': 60,
+            'resolution_scale': 1.0,
+            'graphics_quality': 'high',
+            'shadow_quality': 'medium',
+            'texture_quality': 'high',
+            'power_profile': 'balanced',
+            'cpu_threads': 4,
+            'gpu_boost': False,
+            'cpu_governor': 'schedutil',
+        },
+        'performance': {
+            'fps_cap': 120,
+            'target_fps': 120,
+            'refresh_rate': 120,
+            'resolution_scale': 1.0,
+            'graphics_quality': 'ultra',
+            'shadow_quality': 'high',
+            'texture_quality': 'ultra',
+            'power_profile': 'performance',
+            'cpu_threads': 8,
+            'gpu_boost': True,
+            'cpu_governor': 'performance',
+        },
+    }
+    
+    # Seconds the writer thread waits to batch further updates into one sync.
+    WRITE_DELAY = 0.05
+    # A failed write is retried after this, doubling up to MAX_RETRY_DELAY.
+    RETRY_DELAY = 0.5
+    MAX_RETRY_DELAY = 30.0
+    
+    def __init__(self, settings_file=None):
+        self.settings_file = settings_file or os.path.join(os.path.expanduser('~'), 'app_settings.bin')
+        # Settings written by older versions as JSON are migrated on first load.
+        self.legacy_file = os.path.splitext(self.settings_file)[0] + '.json'
+        self.profiles_file = os.path.splitext(self.settings_file)[0] + '_profiles.json'
+        self.sounds_file = os.path.splitext(self.settings_file)[0] + '_sounds.json'
+        self.legacy_skipped = 0
+        self.store = None
+        self._write_lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._local = threading.local()
+        self._save_requested = threading.Event()
+        self._closed = threading.Event()
+        self._retry_delay = 0.0
+        self._writer = None
+        self._closing = False
+        self.settings = self.load_settings()
+        self.profiles = dict(self.PROFILES)
+        self.profiles.update(self.load_profiles())
+        self.custom_sounds = self.load_sounds()
+    
+    @property
+    def skipped_records(self):
+        """Corrupt records or slots skipped so far instead of failing the load."""
+        return self.legacy_skipped + (self.store.skipped if self.store else 0)
+    
+    @perf.timed('settings.load')
+    def load_settings(self):
+        """Map the settings store; only the package-name index is read here."""
+        with self._flush_lock, self._write_lock:
+            return self._load_settings()
+    
+    def _load_settings(self):
+        if self.store is not None:
+            self.store.close()
+        self.store = SettingsStore(self.settings_file)
+        try:
+            opened = self.store.open()
+        except Exception as e:
+            print(f"Error loading settings: {e}")
+            os.replace(self.settings_file, self.settings_file + '.corrupt')
+            opened = False
+        if not opened:
+            self.store.create(self.load_legacy_settings())
+        if self.skipped_records:
+            print(f"Skipped {self.skipped_records} corrupt settings record(s)")
+        return StoreSettings(self.store)
+    
+    def load_legacy_settings(self):
+        if not os.path.exists(self.legacy_file):
+            return {}
+        try:
+            with open(self.legacy_file, 'r') as f:
+                data = json.load(f)
+        except:
+            return {}
+        settings = {}
+        for app_name, values in data.items():
+            if isinstance(values, dict):
+                settings[app_name] = self._validated(values)
+            else:
+                self.legacy_skipped += 1
+        return settings
+    
+    def _validated(self, values):
+        """Defaults overlaid with every valid entry of `values`."""
+        result = self.DEFAULT_SETTINGS.copy()
+        for key, value in values.items():
+            try:
+                result[key] = validate_setting(key, value)
+            except (KeyError, ValueError):
+                pass
+        return result
+    
+    @perf.timed('settings.save')
+    def save_settings(self):
+        """Write every dirty app now and sync once (deferred inside batch()).
+        
+        Returns False if the write failed; the apps stay dirty and the
+        writer thread retries them with a growing delay.
+        """
+        if getattr(self._local, 'batch_depth', 0):
+            return True
+        # Snapshot and write under one flush lock so two savers can never
+        # write an older snapshot over a newer one; updates only wait for
+        # the snapshot, not for the write.
+        with self._flush_lock:
+            with self._write_lock:
+                pending = self.settings.take_dirty()
+            try:
+                self.settings.write(pending)
+            except Exception as e:
+                print(f"Error saving settings: {e}")
+                # Newer values set meanwhile are in the cache and get written too.
+                for app_name in pending:
+                    self.settings.mark_dirty(app_name)
+                self._retry_delay = min(max(self._retry_delay * 2, self.RETRY_DELAY), self.MAX_RETRY_DELAY)
+                return False
+        self._retry_delay = 0.0
+        return True
+    
+    def request_save(self):
+        """Ask the writer thread to persist dirty apps soon."""
+        if getattr(self._local, 'batch_depth', 0):
+            return
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._writer_loop, name='settings-writer', daemon=True)
+            self._writer.start()
+        self._save_requested.set()
+    
+    def _writer_loop(self):
+        while not self._closing:
+            self._save_requested.wait()
+            if self._closing:
+                break
+            # Let a burst of updates settle so it costs one sync.
+            self._save_requested.clear()
+            self._save_requested.wait(self.WRITE_DELAY)
+            self._save_requested.clear()
+            if not self.save_settings():
+                # Back off before the retry; close() cuts the wait short.
+                self._closed.wait(self._retry_delay)
+                self.request_save()
+    
+    def close(self):
+        """Persist pending changes, stop the writer thread and unmap the store."""
+        self._closing = True
+        self._closed.set()
+        self._save_requested.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self.save_settings()
+        with self._flush_lock:
+            self.store.close()
+    
+    def resident_bytes(self):
+        return self.settings.cached_bytes()
+    
+    def trim_memory(self, level):
+        """Drop decoded settings of apps without unsaved changes; they decode again on access."""
+        # Under the flush lock no saved snapshot is half-written.
+        with self._flush_lock:
+            return self.settings.evict_clean()
+    
+    @contextmanager
+    def batch(self):
+        """Group changes into one transaction with a single write on exit.
+        
+        Other threads' updates wait until the batch is finished, and the
+        writer thread never persists a half-applied batch.
+        """
+        with self._write_lock:
+            self._local.batch_depth = getattr(self._local, 'batch_depth', 0) + 1
+            try:
+                yield self
+            finally:
+                self._local.batch_depth -= 1
+        if not self._local.batch_depth and self.settings.dirty:
+            self.save_settings()
+    
+    def get_app_settings(self, app_name):
+        settings = self.settings.get(app_name)
+        if settings is None:
+            with self._write_lock:
+                if app_name not in self.settings:
+                    self.settings[app_name] = self.DEFAULT_SETTINGS.copy()
+                settings = self.settings[app_name]
+            self.request_save()
+        return settings
+    
+    def update_app_setting(self, app_name, key, value):
+        value = validate_setting(key, value)
+        with self._write_lock:
+            current = self.settings.get(app_name) or self.DEFAULT_SETTINGS
+            updated = dict(current)
+            updated[key] = value
+            self.settings[app_name] = updated
+        self.request_save()
+    
+    def load_profiles(self):
+        if os.path.exists(self.profiles_file):
+            try:
+                with open(self.profiles_file, 'r') as f:
+                    return json.load(f)
+            except:
+                return {}
+        return {}
+    
+    def save_profile(self, name, values):
+        """Define or replace a named profile from DEFAULT_SETTINGS keys."""
+        unknown = set(values) - set(self.DEFAULT_SETTINGS)
+        if unknown:
+            raise KeyError(f"Unknown setting(s) in profile {name!r}: {', '.join(sorted(unknown))}")
+        self.profiles[name] = {key: validate_setting(key, value) for key, value in values.items()}
+        custom = {key: value for key, value in self.profiles.items() if key not in self.PROFILES}
+        try:
+            with open(self.profiles_file, 'w') as f:
+                json.dump(custom, f, indent=2)
+        except Exception as e:
+            print(f"Error saving profiles: {e}")
+    
+    def load_sounds(self):
+        """User sound graphs saved next to the settings; invalid ones are skipped."""
+        if not os.path.exists(self.sounds_file):
+            return {}
+        try:
+            with open(self.sounds_file, 'r') as f:
+                stored = json.load(f)
+        except Exception:
+            return {}
+        sounds = {}
+        for name, graph in stored.items():
+            try:
+                sounds[name] = validate_graph(graph)
+            except ValueError as e:
+                print(f"Skipping custom sound {name!r}: {e}")
+        return sounds
+    
+    def save_sound(self, name, graph):
+        """Define or replace a custom sound graph and write it; raises ValueError if invalid."""
+        graph = self.define_sound(name, graph)
+        self.write_sounds()
+        return graph
+    
+    def define_sound(self, name, graph):
+        """Define or replace a custom sound graph without writing it; see write_sounds()."""
+        self.custom_sounds[name] = validate_graph(graph)
+        return self.custom_sounds[name]
+    
+    def delete_sound(self, name):
+        if self.custom_sounds.pop(name, None) is not None:
+            self.write_sounds()
+    
+    def write_sounds(self):
+        """Write all custom sounds; safe to call from another thread."""
+        sounds = dict(self.custom_sounds)
+        try:
+            tmp_file = self.sounds_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(sounds, f, indent=2)
+            os.replace(tmp_file, self.sounds_file)
+        except Exception as e:
+            print(f"Error saving sounds: {e}")
+    
+    def apply_profile(self, apps, profile):
+        """Apply a profile (name or dict) to many apps with one write.
+        
+        Only keys whose value actually changes are touched, and nothing is
+        written if no key changed. Returns the number of changed keys.
+        """
+        values = self.profiles[profile] if isinstance(profile, str) else profile
+        values = {key: validate_setting(key, value) for key, value in values.items()}
+        changed = 0
+        with self.batch():
+            for app_name in apps:
+                current = self.settings.get(app_name)
+                if current is None:
+                    current = self.settings[app_name] = self.DEFAULT_SETTINGS.copy()
+                diff = {key: value for key, value in values.items() if current.get(key) != value}
+                if diff:
+                    updated = dict(current)
+                    updated.update(diff)
+                    self.settings[app_name] = updated
+                    changed += len(diff)
+        return changed
+    
+    def export_settings(self, path):
+        """Stream settings to a JSON-lines file, one app per line.
+        
+        Each line only carries the keys that differ from DEFAULT_SETTINGS.
+        """
+        defaults = self.DEFAULT_SETTINGS
+        with open(path, 'w') as f:
+            for app_name, values in self.settings.items():
+                diff = {key: value for key, value in values.items() if defaults.get(key) != value}
+                f.write(json.dumps([app_name, diff], separators=(',', ':')))
+                f.write('\n')
+    
+    def import_settings(self, path):
+        """Load settings written by export_settings() in one transaction.
+        
+        Malformed lines and invalid values are skipped. Returns the number of apps imported.
+        """
+        imported = 0
+        with self.batch():
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        app_name, diff = json.loads(line)
+                    except (ValueError, TypeError):
+                        continue
+                    if not isinstance(diff, dict):
+                        continue
+                    self.settings[app_name] = self._validated(diff)
+                    imported += 1
+        return imported
@@ -0,0 +1,230 @@
+import json
+import struct
+import zlib
+
+
+QUALITY_LEVELS = ['low', 'medium', 'high', 'ultra']
+
+
+class SettingField:
+    """One typed setting: its default, allowed range or enum, and struct code."""
+
+    def __init__(self, name, kind, default, lo=None, hi=None, choices=None):
+        self.name = name
+        self.kind = kind
+        self.default = default
+        self.lo = lo
+        self.hi = hi
+        self.choices = list(choices) if choices else None
+
+    @property
+    def code(self):
+        # Floats are stored as fixed-point thousandths so they round-trip exactly.
+        return {'bool': '?', 'int': 'H', 'float': 'h', 'enum': 'B'}[self.kind]
+
+    def validate(self, value):
+        """Return value coerced to this field's type, or raise ValueError."""
+        if self.kind == 'bool':
+            if not isinstance(value, bool):
+                raise ValueError(f"{self.name} must be a bool, got {value!r}")
+            return value
+        if self.kind == 'enum':
+            if value not in self.choices:
+                raise ValueError(f"{self.name} must be one of {self.choices}, got {value!r}")
+            return value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{self.name} must be a number, got {value!r}")
+        value = int(value) if self.kind == 'int' else round(float(value), 3)
+        if not self.lo <= value <= self.hi:
+            raise ValueError(f"{self.name} must be within [{self.lo}, {self.hi}], got {value!r}")
+        return value
+
+    def encode(self, value):
+        if self.kind == 'enum':
+            return self.choices.index(value)
+        if self.kind == 'float':
+            return int(round(value * 1000))
+        return value
+
+    def decode(self, raw):
+        if self.kind == 'enum':
+            return self.choices[raw]
+        if self.kind == 'float':
+            return raw / 1000.0
+        if self.kind == 'bool':
+            return bool(raw)
+        return raw
+
+    def describe(self):
+        return [self.name, self.kind, self.choices]
+
+
+SETTINGS_SCHEMA = [
+    SettingField('fps_cap', 'int', 60, 15, 240),
+    SettingField('target_fps', 'int', 60, 15, 240),
+    SettingField('refresh_rate', 'int', 60, 30, 240),
+    SettingField('resolution_scale', 'float', 1.0, 0.25, 2.0),
+    SettingField('graphics_quality', 'enum', 'high', choices=QUALITY_LEVELS),
+    SettingField('motion_smoothing', 'bool', True),
+    SettingField('ambient_occlusion', 'bool', False),
+    SettingField('shadow_quality', 'enum', 'medium', choices=QUALITY_LEVELS),
+    SettingField('texture_quality', 'enum', 'high', choices=QUALITY_LEVELS),
+    SettingField('anti_aliasing', 'enum', 'fxaa', choices=['off', 'fxaa', 'msaa2x', 'msaa4x', 'taa']),
+    SettingField('memory_limit', 'int', 2048, 256, 16384),
+    SettingField('touch_sensitivity', 'float', 1.0, 0.1, 5.0),
+    SettingField('haptic_feedback', 'bool', True),
+    SettingField('frame_timing', 'enum', 'adaptive', choices=['fixed', 'adaptive', 'unlocked']),
+    SettingField('power_profile', 'enum', 'balanced', choices=['powersave', 'balanced', 'performance']),
+    SettingField('cpu_threads', 'int', 4, 1, 16),
+    SettingField('gpu_boost', 'bool', False),
+    SettingField('memory_compression', 'bool', True),
+    SettingField('vsync', 'bool', True),
+    SettingField('cpu_governor', 'enum', 'schedutil',
+                 choices=['schedutil', 'powersave', 'performance', 'ondemand', 'interactive', 'conservative']),
+    SettingField('gpu_frequency', 'enum', 'auto', choices=['auto', 'low', 'medium', 'high', 'max']),
+]
+
+FIELDS = {field.name: field for field in SETTINGS_SCHEMA}
+
+
+def default_settings():
+    return {field.name: field.default for field in SETTINGS_SCHEMA}
+
+
+def validate_setting(key, value):
+    field = FIELDS.get(key)
+    if field is None:
+        raise KeyError(f"Unknown setting: {key!r}")
+    return field.validate(value)
+
+
+# Binary settings file:
+#   header:  magic, version, record size, record count, schema length,
+#            followed by the schema as a small JSON list (read once per load)
+#   records: crc32 of the rest of the record, package name length and bytes
+#            (fixed NAME_SIZE), then one fixed-width value per schema field.
+MAGIC = b'CYNS'
+VERSION = 1
+NAME_SIZE = 255
+HEADER = struct.Struct('<4sBHIH')
+RECORD_PREFIX = struct.Struct(f'<IB{NAME_SIZE}s')
+
+
+class RecordCodec:
+    """Packs settings dicts into fixed-width records for a given schema."""
+
+    def __init__(self, schema=SETTINGS_SCHEMA):
+        self.schema = schema
+        self.values = struct.Struct('<' + ''.join(field.code for field in schema))
+        self.record_size = RECORD_PREFIX.size + self.values.size
+        self.names = [field.name for field in schema]
+        # Only enums and fixed-point floats need converting after unpacking.
+        self.converters = [(i, field.decode) for i, field in enumerate(schema)
+                           if field.kind in ('enum', 'float')]
+
+    def schema_bytes(self):
+        return json.dumps([field.describe() for field in self.schema], separators=(',', ':')).encode()
+
+    def encode_values(self, settings):
+        values = []
+        for field in self.schema:
+            value = settings.get(field.name, field.default)
+            try:
+                value = field.validate(value)
+            except ValueError:
+                value = field.default
+            values.append(field.encode(value))
+        return self.values.pack(*values)
+
+    def decode_values(self, buf, offset):
+        values = list(self.values.unpack_from(buf, offset))
+        for i, decode in self.converters:
+            values[i] = decode(values[i])
+        return dict(zip(self.names, values))
+
+    def encode(self, app_name, settings):
+        name = app_name.encode('utf-8')
+        if len(name) > NAME_SIZE:
+            raise ValueError(f"Package name too long: {app_name!r}")
+        body = struct.pack(f'<B{NAME_SIZE}s', len(name), name) + self.encode_values(settings)
+        return struct.pack('<I', zlib.crc32(body)) + body
+
+    def decode(self, buf, offset):
+        """Return (app_name, settings) or None if the record is corrupt."""
+        end = offset + self.record_size
+        crc, name_len, name = RECORD_PREFIX.unpack_from(buf, offset)
+        if crc != zlib.crc32(buf[offset + 4:end]) or name_len > NAME_SIZE:
+            return None
+        try:
+            app_name = name[:name_len].decode('utf-8')
+            return app_name, self.decode_values(buf, offset + RECORD_PREFIX.size)
+        except (UnicodeDecodeError, IndexError):
+            return None
+
+
+def schema_from_description(description):
+    """Rebuild the schema a file was written with, so old files stay readable."""
+    schema = []
+    for name, kind, choices in description:
+        current = FIELDS.get(name)
+        default = current.default if current else None
+        schema.append(SettingField(name, kind, default, choices=choices))
+    return schema
+
+
+def encode_settings(settings):
+    codec = RecordCodec()
+    schema = codec.schema_bytes()
+    parts = [HEADER.pack(MAGIC, VERSION, codec.record_size, len(settings), len(schema)), schema]
+    for app_name, values in settings.items():
+        parts.append(codec.encode(app_name, values))
+    return b''.join(parts)
+
+
+def decode_settings(buf):
+    """Decode a binary settings buffer (bytes or mmap).
+
+    Returns (settings, skipped) where skipped counts corrupt records. Values
+    are mapped onto the current schema by name: fields the file lacks get
+    their defaults, and values the current schema rejects are reset.
+    """
+    magic, version, record_size, count, schema_len = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not a settings file')
+    offset = HEADER.size
+    description = json.loads(bytes(buf[offset:offset + schema_len]))
+    offset += schema_len
+    codec = RecordCodec(schema_from_description(description))
+    if codec.record_size != record_size:
+        raise ValueError('Settings file schema does not match its record size')
+
+    settings = {}
+    skipped = 0
+    defaults = default_settings()
+    available = (len(buf) - offset) // record_size
+    # Files written with the current schema were validated on encode and are
+    # covered by the record checksum, so they skip per-value revalidation.
+    current = description == [field.describe() for field in SETTINGS_SCHEMA]
+    for i in range(min(count, available)):
+        record = codec.decode(buf, offset + i * record_size)
+        if record is None:
+            skipped += 1
+            continue
+        app_name, stored = record
+        settings[app_name] = stored if current else upgrade_values(stored, defaults)
+    skipped += max(0, count - available)
+    return settings, skipped
+
+
+def upgrade_values(stored, defaults=None):
+    """Map values decoded with an older schema onto the current one."""
+    values = dict(defaults or default_settings())
+    for key, value in stored.items():
+        field = FIELDS.get(key)
+        if field is None:
+            continue
+        try:
+            values[key] = field.validate(value)
+        except ValueError:
+            pass
+    return values
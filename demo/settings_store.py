@@ -0,0 +1,342 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from collections.abc import MutableMapping
+
+from settings_schema import (
+    MAGIC as RECORDS_MAGIC, NAME_SIZE, SETTINGS_SCHEMA, RecordCodec, decode_settings,
+    default_settings, schema_from_description, upgrade_values,
+)
+
+
+# Memory-mapped settings store:
+#   header:  magic, version, capacity, slot size, schema length and a crc of
+#            the header and schema, then the schema as JSON, padded to
+#            HEADER_SIZE. Only ever written as part of a whole new file.
+#   index:   `capacity` entries of crc32, package name length and name.
+#   slots:   two copies per app of crc32, sequence number and the packed
+#            values. A write goes to the older copy, so a torn write leaves
+#            the previous value readable.
+STORE_MAGIC = b'CYNM'
+STORE_VERSION = 1
+HEADER_SIZE = 4096
+STORE_HEADER = struct.Struct('<4sBIHHI')
+INDEX_ENTRY = struct.Struct(f'<IB{NAME_SIZE}s')
+SLOT_PREFIX = struct.Struct('<II')
+INITIAL_CAPACITY = 64
+
+
+class SettingsStore:
+    """Fixed-layout settings file accessed through mmap.
+
+    open() only reads the header and the package-name index; values are
+    decoded per app on read(), and write() updates one slot in place.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.codec = RecordCodec()
+        self.slot_size = SLOT_PREFIX.size + self.codec.values.size
+        self.capacity = 0
+        self.index = {}
+        self.names = []
+        self.skipped = 0
+        self._file = None
+        self._map = None
+
+    @property
+    def index_offset(self):
+        return HEADER_SIZE
+
+    @property
+    def slots_offset(self):
+        return HEADER_SIZE + self.capacity * INDEX_ENTRY.size
+
+    def _slot_offset(self, slot, copy):
+        return self.slots_offset + (slot * 2 + copy) * self.slot_size
+
+    def open(self):
+        """Map an existing store. Returns False if there is nothing to open.
+
+        Older whole-file record files and stores written with a different
+        schema are converted in place.
+        """
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < STORE_HEADER.size:
+            return False
+        with open(self.path, 'rb') as f:
+            head = f.read(HEADER_SIZE)
+        if head[:4] == RECORDS_MAGIC:
+            with open(self.path, 'rb') as f:
+                settings, self.skipped = decode_settings(f.read())
+            self.create(settings)
+            return True
+
+        magic, version, capacity, slot_size, schema_len, crc = STORE_HEADER.unpack_from(head, 0)
+        schema = head[STORE_HEADER.size:STORE_HEADER.size + schema_len]
+        check = STORE_HEADER.pack(magic, version, capacity, slot_size, schema_len, 0) + schema
+        if magic != STORE_MAGIC or version != STORE_VERSION or crc != zlib.crc32(check):
+            raise ValueError('Not a settings store')
+
+        description = json.loads(schema)
+        if description != [field.describe() for field in SETTINGS_SCHEMA]:
+            self._migrate_schema(description, capacity)
+            return True
+
+        self.capacity = capacity
+        self._map_file()
+        self._load_index()
+        return True
+
+    def _map_file(self):
+        self._file = open(self.path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _load_index(self):
+        self.index = {}
+        self.names = []
+        buf = self._map
+        for i in range(self.capacity):
+            offset = self.index_offset + i * INDEX_ENTRY.size
+            crc, name_len, name = INDEX_ENTRY.unpack_from(buf, offset)
+            if crc == 0 and name_len == 0:
+                break
+            if crc != zlib.crc32(buf[offset + 4:offset + INDEX_ENTRY.size]) or name_len > NAME_SIZE:
+                # Keep the slot reserved so later entries keep their positions.
+                self.skipped += 1
+                self.names.append(None)
+                continue
+            app_name = name[:name_len].decode('utf-8', 'replace')
+            self.index[app_name] = len(self.names)
+            self.names.append(app_name)
+
+    def _migrate_schema(self, description, capacity):
+        """Rewrite a store whose schema differs from SETTINGS_SCHEMA."""
+        old = SettingsStore(self.path)
+        old.codec = RecordCodec(schema_from_description(description))
+        old.slot_size = SLOT_PREFIX.size + old.codec.values.size
+        old.capacity = capacity
+        old._map_file()
+        try:
+            old._load_index()
+            settings = {}
+            for name in old.index:
+                values = old.read(name)
+                if values is not None:
+                    settings[name] = upgrade_values(values)
+            self.skipped = old.skipped
+        finally:
+            old.close()
+        self.create(settings)
+
+    def create(self, settings, capacity=None):
+        """Write a new store holding `settings` and map it."""
+        self.close()
+        capacity = max(capacity or INITIAL_CAPACITY, len(settings))
+        schema = json.dumps([field.describe() for field in SETTINGS_SCHEMA], separators=(',', ':')).encode()
+        header = STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, capacity, self.slot_size, len(schema), 0)
+        crc = zlib.crc32(header + schema)
+        header = STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, capacity, self.slot_size, len(schema), crc)
+        if len(header) + len(schema) > HEADER_SIZE:
+            raise ValueError('Settings schema does not fit in the store header')
+
+        index = bytearray(capacity * INDEX_ENTRY.size)
+        slots = bytearray(capacity * 2 * self.slot_size)
+        for i, (app_name, values) in enumerate(settings.items()):
+            struct.pack_into(f'<{INDEX_ENTRY.size}s', index, i * INDEX_ENTRY.size, self._index_entry(app_name))
+            slot = self._slot_bytes(1, values)
+            slots[i * 2 * self.slot_size:i * 2 * self.slot_size + self.slot_size] = slot
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(header + schema + bytes(HEADER_SIZE - len(header) - len(schema)))
+            f.write(index)
+            f.write(slots)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        self.capacity = capacity
+        self._map_file()
+        self.names = list(settings)
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+    def _index_entry(self, app_name):
+        name = app_name.encode('utf-8')
+        if len(name) > NAME_SIZE:
+            raise ValueError(f"Package name too long: {app_name!r}")
+        body = struct.pack(f'<B{NAME_SIZE}s', len(name), name)
+        return struct.pack('<I', zlib.crc32(body)) + body
+
+    def _slot_bytes(self, seq, values):
+        body = struct.pack('<I', seq) + self.codec.encode_values(values)
+        return struct.pack('<I', zlib.crc32(body)) + body
+
+    def _read_copy(self, slot, copy):
+        """Return (seq, offset) of a valid slot copy, or None if torn or empty."""
+        offset = self._slot_offset(slot, copy)
+        crc, seq = SLOT_PREFIX.unpack_from(self._map, offset)
+        if seq == 0 or crc != zlib.crc32(self._map[offset + 4:offset + self.slot_size]):
+            return None
+        return seq, offset
+
+    def read(self, app_name):
+        """Decode one app's values from its newest valid slot copy.
+
+        Returns None if the app is unknown or both copies are corrupt.
+        """
+        slot = self.index.get(app_name)
+        if slot is None:
+            return None
+        copies = [c for c in (self._read_copy(slot, 0), self._read_copy(slot, 1)) if c]
+        if not copies:
+            self.skipped += 1
+            return None
+        seq, offset = max(copies)
+        return self.codec.decode_values(self._map, offset + SLOT_PREFIX.size)
+
+    def write(self, app_name, values):
+        """Write one app's values in place, appending it if it is new."""
+        slot = self.index.get(app_name)
+        if slot is None:
+            slot = self._append(app_name)
+        first, second = self._read_copy(slot, 0), self._read_copy(slot, 1)
+        seqs = [c[0] for c in (first, second) if c]
+        if first is None:
+            target = 0
+        elif second is None:
+            target = 1
+        else:
+            target = 0 if first[0] < second[0] else 1
+        offset = self._slot_offset(slot, target)
+        self._map[offset:offset + self.slot_size] = self._slot_bytes(max(seqs, default=0) + 1, values)
+
+    def _append(self, app_name):
+        if len(self.names) >= self.capacity:
+            self._grow()
+        slot = len(self.names)
+        offset = self.index_offset + slot * INDEX_ENTRY.size
+        self._map[offset:offset + INDEX_ENTRY.size] = self._index_entry(app_name)
+        self.names.append(app_name)
+        self.index[app_name] = slot
+        return slot
+
+    def _grow(self):
+        settings = {}
+        for name in self.names:
+            if name is None:
+                continue
+            values = self.read(name)
+            settings[name] = values if values is not None else default_settings()
+        self.create(settings, capacity=self.capacity * 2)
+
+    def flush(self):
+        """Sync written slots to storage (one msync)."""
+        if self._map is not None:
+            self._map.flush()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class StoreSettings(MutableMapping):
+    """dict-like view of a SettingsStore that decodes apps on first access.
+
+    Lookups of already decoded apps take no lock. Decoding a new app and
+    writing slots share one lock, because growing the store remaps it.
+    Assigning an app marks it dirty until write(); code that mutates a
+    returned settings dict in place must call mark_dirty() itself.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.cache = {}
+        self.dirty = set()
+        self.lock = threading.RLock()
+
+    def __getitem__(self, app_name):
+        values = self.cache.get(app_name)
+        if values is None:
+            with self.lock:
+                values = self.cache.get(app_name)
+                if values is None:
+                    if app_name not in self.store.index:
+                        raise KeyError(app_name)
+                    values = self.store.read(app_name)
+                    if values is None:
+                        values = default_settings()
+                    self.cache[app_name] = values
+        return values
+
+    def __setitem__(self, app_name, values):
+        with self.lock:
+            self.cache[app_name] = values
+            self.dirty.add(app_name)
+
+    def __delitem__(self, app_name):
+        raise TypeError('Settings entries cannot be deleted')
+
+    def __contains__(self, app_name):
+        return app_name in self.cache or app_name in self.store.index
+
+    def __iter__(self):
+        for name in list(self.store.names):
+            if name is not None:
+                yield name
+        for name in list(self.cache):
+            if name not in self.store.index:
+                yield name
+
+    def __len__(self):
+        return len(self.store.index) + sum(1 for name in list(self.cache) if name not in self.store.index)
+
+    def mark_dirty(self, app_name):
+        with self.lock:
+            self.dirty.add(app_name)
+
+    def take_dirty(self):
+        """Snapshot and clear the dirty apps as {app_name: values}."""
+        with self.lock:
+            pending = {name: self.cache[name] for name in self.dirty}
+            self.dirty.clear()
+        return pending
+
+    def write(self, pending):
+        """Write a take_dirty() snapshot to the store and sync once."""
+        with self.lock:
+            for app_name in sorted(pending):
+                self.store.write(app_name, pending[app_name])
+            self.store.flush()
+
+    def flush(self):
+        self.write(self.take_dirty())
+
+    def cached_bytes(self):
+        """Estimate of the decoded apps' size, from one entry times the count."""
+        with self.lock:
+            if not self.cache:
+                return 0
+            name, values = next(iter(self.cache.items()))
+            entry = (sys.getsizeof(name) + sys.getsizeof(values)
+                     + sum(sys.getsizeof(v) for v in values.values()))
+            return entry * len(self.cache)
+
+    def evict_clean(self):
+        """Forget decoded apps that match the store; returns how many.
+
+        The caller must make sure no take_dirty() snapshot is still being
+        written, or an evicted app could be read back from its old slot.
+        """
+        with self.lock:
+            clean = [name for name in self.cache if name not in self.dirty and name in self.store.index]
+            for name in clean:
+                del self.cache[name]
+        return len(clean)
@@ -0,0 +1,207 @@
+import glob
+import os
+import threading
+import wave
+
+from perf import perf
+from synth_graph import clear_plan_cache, compile_graph, validate_graph
+
+
+class SoundBoardManager:
+    """Enhanced soundboard with customization."""
+    
+    # Sound graphs (see synth_graph). The old list templates started step k
+    # at k / (len - 1) of the duration, so their last step begins at the very
+    # end and is silent; it is kept so the sounds render exactly as before.
+    # 'sweep'/'down' computed sin(2*pi*f(i)*i/sr) with f falling from 2000 to
+    # 500 Hz, which is a linear glide from 2000 Hz to -1000 Hz.
+    SOUND_TEMPLATES = {
+        'beep': {'duration': 0.5, 'volume': 0.7, 'voices': [{'osc': 'sine', 'freq': 800, 'gain': 0.5}]},
+        'success': {'duration': 0.8, 'volume': 0.7,
+                    'voices': [{'osc': 'sine', 'steps': [[0, 600], [1, 900]], 'gain': 0.3}]},
+        'error': {'duration': 0.6, 'volume': 0.7,
+                  'voices': [{'osc': 'sine', 'steps': [[0, 300], [1, 150]], 'gain': 0.3}]},
+        'click': {'duration': 0.1, 'volume': 0.7, 'voices': [{'osc': 'sine', 'freq': 1000, 'gain': 0.5}]},
+        'notification': {'duration': 0.4, 'volume': 0.6,
+                         'voices': [{'osc': 'sine', 'steps': [[0, 500], [0.5, 700], [1, 900]], 'gain': 0.3}]},
+        'alert': {'duration': 0.5, 'volume': 0.8,
+                  'voices': [{'osc': 'sine', 'freq': 2000, 'glide_to': -1000, 'gain': 0.4,
+                              'env': [[0, 1.0], [1, 0.2]]}]},
+        'chime': {'duration': 0.6, 'volume': 0.5, 'voices': [{'osc': 'sine', 'freq': 1200, 'gain': 0.5}]},
+        'laser': {'duration': 0.2, 'volume': 0.6,
+                  'voices': [{'osc': 'sine', 'freq': 2000, 'glide_to': -1000, 'gain': 0.4,
+                              'env': [[0, 1.0], [1, 0.0]]}]},
+        'pop': {'duration': 0.15, 'volume': 0.5, 'voices': [{'osc': 'sine', 'freq': 150, 'gain': 0.5}]},
+        'whoosh': {'duration': 0.3, 'volume': 0.6,
+                   'voices': [{'osc': 'sine', 'freq': 2000, 'glide_to': -1000, 'gain': 0.4,
+                               'env': [[0, 1.0], [1, 0.2]]}]},
+    }
+    
+    def __init__(self, sound_dir=None, preload=True, sample_rate=44100):
+        self.sound_dir = sound_dir or os.path.expanduser('~')
+        self.sounds = {}
+        self.sound_config = {}
+        self.master_volume = 1.0
+        self.current_sound = None
+        self.sample_rate = sample_rate
+        # Built-in templates plus any sounds added with define_sound().
+        self.templates = dict(self.SOUND_TEMPLATES)
+        self.plans = {}
+        # Renders may run on background threads; one at a time.
+        self._render_lock = threading.Lock()
+        for name, config in self.templates.items():
+            self._add_config(name, config)
+        if preload:
+            self._generate_all_sounds()
+    
+    def _add_config(self, name, config):
+        self.sound_config[name] = {
+            'volume': config['volume'],
+            'pitch': 1.0,
+            'enabled': True,
+            'loop': False
+        }
+    
+    def define_sound(self, name, graph):
+        """Add or replace a sound from a synth graph; returns the validated graph."""
+        graph = validate_graph(graph)
+        self.templates[name] = graph
+        self._add_config(name, graph)
+        self.plans.pop(name, None)
+        self.sounds.pop(name, None)
+        return graph
+    
+    def set_sample_rate(self, sample_rate):
+        """Render at sample_rate from now on (e.g. the output device's native rate)."""
+        if sample_rate != self.sample_rate:
+            self.sample_rate = sample_rate
+            # Renders are keyed by graph and rate; forget the paths of the old ones.
+            self.plans.clear()
+            self.sounds.clear()
+    
+    def plan(self, name):
+        """The compiled render plan of a template, compiled on first use."""
+        plan = self.plans.get(name)
+        if plan is None:
+            plan = self.plans[name] = compile_graph(self.templates[name], self.sample_rate)
+        return plan
+    
+    def _generate_all_sounds(self):
+        """Generate all sound files."""
+        for name in self.templates:
+            self.ensure_sound(name)
+    
+    def ensure_sound(self, name):
+        """Render a template on first use and return its file path; thread-safe."""
+        path = self.sounds.get(name)
+        if path is None and name in self.templates:
+            with self._render_lock:
+                path = self.sounds.get(name)
+                if path is None:
+                    path = self.sounds[name] = self._create_sound(name)
+        return path
+    
+    @perf.timed('sound.render')
+    def _create_sound(self, name):
+        """Render a sound graph into the sound cache and return the file path.
+        
+        Files are keyed by a digest of the graph and sample rate, so editing
+        a sound never plays a stale render.
+        """
+        plan = self.plan(name)
+        sound_file = os.path.join(self.sound_dir, f'{name}-{plan.digest}.wav')
+        if not os.path.exists(sound_file):
+            try:
+                tmp_file = sound_file + '.tmp'
+                with wave.open(tmp_file, 'w') as wav_file:
+                    wav_file.setnchannels(1)
+                    wav_file.setsampwidth(2)
+                    wav_file.setframerate(plan.sample_rate)
+                    for block in plan.blocks():
+                        wav_file.writeframes(block.tobytes())
+                os.replace(tmp_file, sound_file)
+                self._remove_stale(name, sound_file)
+            except Exception as e:
+                print(f"Error rendering sound {name}: {e}")
+        return sound_file
+    
+    def _remove_stale(self, name, current):
+        """Delete older renders of a sound, including pre-digest '{name}.wav' files."""
+        stale = [os.path.join(self.sound_dir, f'{name}.wav')]
+        stale += glob.glob(os.path.join(glob.escape(self.sound_dir), f'{glob.escape(name)}-{"[0-9a-f]" * 12}.wav'))
+        for path in stale:
+            if path != current and os.path.exists(path):
+                os.remove(path)
+    
+    def play_sound(self, sound_name):
+        self.play_file(sound_name, self.prepare_sound(sound_name))
+    
+    def prepare_sound(self, sound_name):
+        """Render a sound if needed and return its file; the blocking half of play_sound, safe off the UI thread."""
+        try:
+            config = self.sound_config.get(sound_name, {})
+            if not config.get('enabled', True):
+                return None
+            return self.ensure_sound(sound_name)
+        except Exception as e:
+            print(f"Error rendering sound: {e}")
+        return None
+    
+    def play_file(self, sound_name, sound_file):
+        """Stop the current sound and play sound_file instead; on the UI thread.
+        
+        Kivy sounds are created here rather than with the render: on
+        Android they wrap a MediaPlayer, which belongs to the UI thread.
+        """
+        try:
+            sound = None
+            if sound_file:
+                from kivy.core.audio import SoundLoader
+                with perf.span('sound.load'):
+                    sound = SoundLoader.load(sound_file)
+            if self.current_sound:
+                self.current_sound.stop()
+            self.current_sound = sound
+            if sound:
+                config = self.sound_config.get(sound_name, {})
+                sound.volume = config.get('volume', 0.7) * self.master_volume
+                sound.play()
+        except Exception as e:
+            print(f"Error playing sound: {e}")
+    
+    def stop_sound(self):
+        if self.current_sound:
+            self.current_sound.stop()
+            self.current_sound = None
+    
+    def resident_bytes(self):
+        """Bytes held by compiled plans and the loaded sound (estimated from its WAV size)."""
+        total = sum(plan.nbytes for plan in list(self.plans.values()))
+        sound = self.current_sound
+        if sound is not None and sound.source:
+            try:
+                total += os.path.getsize(sound.source)
+            except OSError:
+                pass
+        return total
+    
+    def trim_memory(self, level):
+        """Drop compiled plans, and the loaded sound unless it is playing.
+        
+        Renders stay on disk, so this only costs a recompile on the next
+        tap of a sound that wasn't rendered yet.
+        """
+        with self._render_lock:
+            self.plans.clear()
+            clear_plan_cache()
+        sound = self.current_sound
+        if sound is not None and sound.state != 'play':
+            sound.unload()
+            self.current_sound = None
+    
+    def set_sound_volume(self, sound_name, volume):
+        if sound_name in self.sound_config:
+            self.sound_config[sound_name]['volume'] = volume
+    
+    def set_master_volume(self, volume):
+        self.master_volume = volume
@@ -0,0 +1,262 @@
+import array
+import hashlib
+import json
+import random
+import sys
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import chain, cycle, islice, repeat
+from operator import add, mul
+
+from wavetable import glide_sine, phases, ramp, sine, steady_period
+
+
+# A sound is a small declarative graph of voices that are mixed together:
+#
+#   {'duration': 0.5, 'volume': 0.7, 'voices': [
+#       {'osc': 'sine', 'freq': 2000, 'glide_to': 500, 'gain': 0.4,
+#        'env': [[0, 1.0], [1, 0.2]]},
+#       {'osc': 'noise', 'gain': 0.1, 'seed': 3, 'env': [[0, 1], [0.1, 0]]},
+#   ]}
+#
+# Positions in 'env' and 'steps' are fractions of the duration. A sine voice
+# plays either 'freq' (optionally gliding linearly to 'glide_to') or 'steps',
+# a list of [position, freq]; each step sounds as if its oscillator had been
+# running since the start. 'gain' is a fraction of full scale and 'env' is a
+# piecewise-linear level (default: constant 1). 'volume' is the playback
+# volume and does not affect rendering.
+FULL_SCALE = 32767
+MAX_DURATION = 10.0
+MAX_VOICES = 8
+MAX_FREQ = 20000.0
+OSCILLATORS = ('sine', 'noise')
+
+
+def _number(value, what, lo, hi):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not lo <= value <= hi:
+        raise ValueError(f"{what} must be a number within [{lo}, {hi}], got {value!r}")
+    return value
+
+
+def _breakpoints(points, what, lo, hi):
+    if not isinstance(points, list) or not points:
+        raise ValueError(f"{what} must be a non-empty list of [position, value] pairs")
+    result = []
+    for point in points:
+        if not isinstance(point, (list, tuple)) or len(point) != 2:
+            raise ValueError(f"{what} entries must be [position, value] pairs, got {point!r}")
+        position = _number(point[0], f"{what} position", 0, 1)
+        if result and position < result[-1][0]:
+            raise ValueError(f"{what} positions must not decrease")
+        result.append([position, _number(point[1], f"{what} value", lo, hi)])
+    if result[0][0] != 0:
+        raise ValueError(f"{what} must start at position 0")
+    return result
+
+
+def validate_graph(graph):
+    """Return a normalised copy of a sound graph, or raise ValueError."""
+    if not isinstance(graph, dict):
+        raise ValueError(f"A sound graph must be a dict, got {type(graph).__name__}")
+    voices = graph.get('voices')
+    if not isinstance(voices, list) or not 1 <= len(voices) <= MAX_VOICES:
+        raise ValueError(f"voices must be a list of 1 to {MAX_VOICES} voices")
+    result = {
+        'duration': _number(graph.get('duration', 0.5), 'duration', 0.01, MAX_DURATION),
+        'volume': _number(graph.get('volume', 0.7), 'volume', 0, 1),
+        'voices': [],
+    }
+    for voice in voices:
+        if not isinstance(voice, dict):
+            raise ValueError(f"A voice must be a dict, got {voice!r}")
+        unknown = set(voice) - {'osc', 'gain', 'freq', 'glide_to', 'steps', 'env', 'seed'}
+        if unknown:
+            raise ValueError(f"Unknown voice field(s): {', '.join(sorted(unknown))}")
+        osc = voice.get('osc', 'sine')
+        if osc not in OSCILLATORS:
+            raise ValueError(f"osc must be one of {list(OSCILLATORS)}, got {osc!r}")
+        checked = {'osc': osc, 'gain': _number(voice.get('gain', 0.5), 'gain', 0, 1)}
+        if 'env' in voice:
+            checked['env'] = _breakpoints(voice['env'], 'env', 0, 1)
+        if osc == 'noise':
+            seed = voice.get('seed', 0)
+            if isinstance(seed, bool) or not isinstance(seed, int):
+                raise ValueError(f"seed must be an int, got {seed!r}")
+            checked['seed'] = seed
+        elif ('freq' in voice) == ('steps' in voice):
+            raise ValueError("A sine voice needs exactly one of 'freq' or 'steps'")
+        elif 'freq' in voice:
+            checked['freq'] = _number(voice['freq'], 'freq', 0, MAX_FREQ)
+            if 'glide_to' in voice:
+                checked['glide_to'] = _number(voice['glide_to'], 'glide_to', -MAX_FREQ, MAX_FREQ)
+        else:
+            if 'glide_to' in voice:
+                raise ValueError("glide_to only applies to a single 'freq'")
+            checked['steps'] = _breakpoints(voice['steps'], 'steps', 0, MAX_FREQ)
+        result['voices'].append(checked)
+    return result
+
+
+def tone(freq, duration=0.5, volume=0.7, glide_to=None, gain=0.5):
+    """Graph for a single sine tone, optionally gliding to glide_to."""
+    voice = {'osc': 'sine', 'freq': freq, 'gain': gain}
+    if glide_to is not None:
+        voice['glide_to'] = glide_to
+    return {'duration': duration, 'volume': volume, 'voices': [voice]}
+
+
+def canonical(graph):
+    return json.dumps(graph, sort_keys=True, separators=(',', ':'))
+
+
+def graph_digest(graph, sample_rate):
+    """Short stable key for a graph rendered at sample_rate."""
+    return hashlib.sha1(f'{canonical(graph)}@{sample_rate}'.encode()).hexdigest()[:12]
+
+
+def _position_index(position, num_samples):
+    """First sample at or after a duration fraction."""
+    return bisect_left(range(num_samples), position, key=lambda i: i / num_samples)
+
+
+class _Piece:
+    """A run of samples from one voice: a repeating cycle or a fresh stream."""
+
+    __slots__ = ('length', 'cycle', 'stream')
+
+    def __init__(self, length, cycle=None, stream=None):
+        self.length = length
+        self.cycle = cycle
+        self.stream = stream
+
+    def values(self):
+        if self.cycle is not None:
+            return islice(cycle(self.cycle), self.length)
+        return self.stream()
+
+
+class RenderPlan:
+    """A validated graph compiled for one sample rate.
+
+    Everything that does not depend on the output position is done here
+    once: envelope segments, step boundaries, one-period cycles of steady
+    tones and noise buffers. blocks() then only walks iterators, and a
+    single steady voice is produced by repeating whole int16 periods.
+    """
+
+    def __init__(self, graph, sample_rate):
+        self.graph = graph
+        self.sample_rate = sample_rate
+        self.num_samples = int(sample_rate * graph['duration'])
+        self.digest = graph_digest(graph, sample_rate)
+        # Bytes held by precomputed cycles and noise buffers (an estimate for lists).
+        self.nbytes = 0
+        self.voices = [self._compile_voice(voice) for voice in graph['voices']]
+        # One voice of whole periods without an envelope: tile int16 periods.
+        self.tiles = None
+        if len(self.voices) == 1:
+            pieces, env = self.voices[0]
+            if env is None and all(piece.cycle is not None for piece in pieces):
+                self.tiles = [(piece.length, array.array('h', map(int, piece.cycle))) for piece in pieces]
+                self.nbytes += sum(2 * len(period) for _, period in self.tiles)
+
+    def _compile_voice(self, voice):
+        n = self.num_samples
+        rate = self.sample_rate
+        amplitude = FULL_SCALE * voice['gain']
+        env = voice.get('env')
+        # With an envelope the pieces stay at unit level and the envelope
+        # carries the gain, so the product is formed once per sample.
+        scale = 1.0 if env else amplitude
+        if voice['osc'] == 'noise':
+            rng = random.Random(voice['seed'])
+            noise = array.array('h', rng.getrandbits(16 * n).to_bytes(2 * n, 'little')) if n else array.array('h')
+            self.nbytes += 2 * n
+            pieces = [_Piece(n, stream=lambda: map(mul, repeat(scale / 32768.0), noise))]
+        elif 'steps' in voice:
+            starts = [_position_index(position, n) for position, _ in voice['steps']]
+            pieces = []
+            for (_, freq), begin, end in zip(voice['steps'], starts, starts[1:] + [n]):
+                if end > begin:
+                    pieces.append(self._steady(end - begin, freq, scale, freq * begin / rate))
+        elif voice.get('glide_to', voice['freq']) != voice['freq']:
+            freq, glide_to = voice['freq'], voice['glide_to']
+            pieces = [_Piece(n, stream=lambda: map(mul, repeat(scale), glide_sine(n, freq, glide_to, rate)))]
+        else:
+            pieces = [self._steady(n, voice['freq'], scale, 0.0)]
+
+        if env is None:
+            return pieces, None
+        segments = []
+        for (p0, l0), (p1, l1) in zip(env, env[1:] + [[1, env[-1][1]]]):
+            begin, end = _position_index(p0, n), _position_index(p1, n)
+            if end > begin:
+                segments.append((end - begin, amplitude * l0, amplitude * l1))
+        return pieces, segments
+
+    def _steady(self, length, freq, scale, phase):
+        period = steady_period(freq, self.sample_rate)
+        if period and period * 2 <= length:
+            unit = sine(phases(period, freq, sample_rate=self.sample_rate, phase=phase))
+            values = list(map(mul, repeat(scale), unit))
+            self.nbytes += sys.getsizeof(values) + len(values) * sys.getsizeof(0.0)
+            return _Piece(length, cycle=values)
+        rate = self.sample_rate
+        return _Piece(length, stream=lambda: map(mul, repeat(scale), sine(phases(length, freq, sample_rate=rate, phase=phase))))
+
+    def _voice_values(self, pieces, segments):
+        values = chain.from_iterable(piece.values() for piece in pieces)
+        if segments is None:
+            return values
+        levels = chain.from_iterable(ramp(start, end, length) for length, start, end in segments)
+        return map(mul, levels, values)
+
+    def _mix(self):
+        streams = [self._voice_values(pieces, env) for pieces, env in self.voices]
+        mixed = streams[0]
+        if len(streams) > 1:
+            for stream in streams[1:]:
+                mixed = map(add, mixed, stream)
+            # Voices can sum past full scale; clip rather than wrap.
+            mixed = map(max, repeat(-32768.0), map(min, repeat(32767.0), mixed))
+        return map(int, mixed)
+
+    def blocks(self, block_size=4096):
+        """Yield the rendered sound as array('h') blocks of block_size samples."""
+        if self.tiles is not None:
+            pending = array.array('h')
+            for length, period in self.tiles:
+                pending.extend((period * -(-length // len(period)))[:length])
+                while len(pending) >= block_size:
+                    yield pending[:block_size]
+                    del pending[:block_size]
+            if pending:
+                yield pending
+            return
+        samples = self._mix()
+        while True:
+            block = array.array('h', islice(samples, block_size))
+            if not block:
+                return
+            yield block
+
+    def render(self):
+        samples = array.array('h')
+        for block in self.blocks(block_size=1 << 16):
+            samples.extend(block)
+        return samples
+
+
+@lru_cache(maxsize=64)
+def _compile(text, sample_rate):
+    return RenderPlan(json.loads(text), sample_rate)
+
+
+def compile_graph(graph, sample_rate=44100):
+    """Validate and compile a graph; plans are cached per graph and sample rate."""
+    return _compile(canonical(validate_graph(graph)), sample_rate)
+
+
+def clear_plan_cache():
+    """Forget cached plans; callers holding a plan keep it."""
+    _compile.cache_clear()
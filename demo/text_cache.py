@@ -0,0 +1,234 @@
+import weakref
+from collections import OrderedDict
+from string import printable
+
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Color, Rectangle
+from kivy.metrics import sp
+from kivy.properties import BooleanProperty, ColorProperty, ListProperty, NumericProperty, StringProperty
+from kivy.uix.widget import Widget
+
+
+# Characters a GlyphAtlas renders; anything else falls back to a whole-string texture.
+ATLAS_CHARSET = ''.join(ch for ch in printable if ch.isprintable())
+
+
+def texture_bytes(texture):
+    return texture.width * texture.height * 4
+
+
+class GlyphAtlas:
+    """One texture holding ATLAS_CHARSET for a font, sliced into per-glyph regions.
+
+    Advances come from the font's extents of each prefix of the charset, so
+    a string laid out glyph by glyph matches the whole-string rendering for
+    fonts without kerning pairs in ASCII digits (any tabular-figure font).
+    """
+
+    def __init__(self, font_name, font_size, bold=False, color=(1, 1, 1, 1)):
+        self._label = CoreLabel(text=ATLAS_CHARSET, font_name=font_name, font_size=font_size,
+                                bold=bold, color=color)
+        self._label.refresh()
+        self.texture = self._label.texture
+        self.height = self.texture.height
+        extents = self._label.get_cached_extents()
+        self.glyphs = {}
+        x = 0
+        for i, ch in enumerate(ATLAS_CHARSET):
+            end = extents(ATLAS_CHARSET[:i + 1])[0]
+            self.glyphs[ch] = (self.texture.get_region(x, 0, end - x, self.height), end - x)
+            x = end
+
+    @property
+    def bytes(self):
+        return texture_bytes(self.texture)
+
+    def covers(self, text):
+        return all(ch in self.glyphs for ch in text)
+
+
+class TextureCache:
+    """LRU cache of rendered text textures keyed by (text, font, size, bold, color).
+
+    The CoreLabel is kept with its texture so Kivy can re-render it after
+    the GL context is lost (Android pause/resume). Textures still shown by
+    a widget stay valid after eviction; they are only no longer shared, so
+    unshared_bytes() is what clear() actually frees.
+    """
+
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._labels = OrderedDict()
+        self._atlases = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Live widgets drawing from this cache.
+        self.users = weakref.WeakSet()
+
+    def texture(self, text, font_name='Roboto', font_size=15, bold=False, color=(1, 1, 1, 1)):
+        key = (text, font_name, round(font_size, 2), bold, tuple(color))
+        label = self._labels.get(key)
+        if label is not None:
+            self._labels.move_to_end(key)
+            self.hits += 1
+            return label.texture
+        self.misses += 1
+        label = CoreLabel(text=text, font_name=font_name, font_size=font_size, bold=bold, color=tuple(color))
+        label.refresh()
+        self._labels[key] = label
+        self.bytes += texture_bytes(label.texture)
+        while self.bytes > self.max_bytes and len(self._labels) > 1:
+            _, old = self._labels.popitem(last=False)
+            self.bytes -= texture_bytes(old.texture)
+            self.evictions += 1
+        return label.texture
+
+    def atlas(self, font_name='Roboto', font_size=15, bold=False, color=(1, 1, 1, 1)):
+        key = (font_name, round(font_size, 2), bold, tuple(color))
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            atlas = self._atlases[key] = GlyphAtlas(font_name, font_size, bold, tuple(color))
+            self.bytes += atlas.bytes
+        return atlas
+
+    def clear(self):
+        self._labels.clear()
+        self._atlases.clear()
+        self.bytes = 0
+
+    def unshared_bytes(self):
+        """Bytes of cached textures no live widget draws from."""
+        used = {id(texture) for widget in list(self.users) for texture in widget.cached_textures()}
+        textures = [label.texture for label in self._labels.values()]
+        textures += [atlas.texture for atlas in self._atlases.values()]
+        return sum(texture_bytes(texture) for texture in textures if id(texture) not in used)
+
+    def stats(self):
+        return {
+            'textures': len(self._labels),
+            'atlases': len(self._atlases),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+texture_cache = TextureCache()
+
+
+def prepare_atlas(font_size=15, bold=False):
+    """Build the atlas of NumericLabel(font_size=f'{font_size}sp') ahead of its first use.
+
+    Rendering the charset takes a few ms, which would otherwise land on
+    the first popup or tab that shows a readout.
+    """
+    return texture_cache.atlas(font_size=sp(font_size), bold=bold)
+
+
+class _TextWidget(Widget):
+    """Label-compatible text properties, drawn centred like a Label."""
+
+    text = StringProperty('')
+    font_name = StringProperty('Roboto')
+    font_size = NumericProperty('15sp')
+    bold = BooleanProperty(False)
+    color = ColorProperty([1, 1, 1, 1])
+    texture_size = ListProperty([0, 0])
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        with self.canvas:
+            Color(1, 1, 1, 1)
+        self.fbind('text', self._render)
+        for name in ('font_name', 'font_size', 'bold', 'color'):
+            self.fbind(name, self._restyle)
+        self.fbind('pos', self._layout)
+        self.fbind('size', self._layout)
+        self._restyle()
+        texture_cache.users.add(self)
+
+    def _restyle(self, *args):
+        self._render()
+
+    def cached_textures(self):
+        return []
+
+
+class StaticLabel(_TextWidget):
+    """A Label for fixed text whose texture is shared through texture_cache.
+
+    Only for text that repeats, such as headers and captions; one-off text
+    like a title naming an app belongs in a plain Label, or it crowds
+    shared textures out of the LRU.
+    """
+
+    def _render(self, *args):
+        texture = texture_cache.texture(self.text, self.font_name, self.font_size, self.bold, self.color)
+        if not hasattr(self, '_rect'):
+            self._rect = Rectangle()
+            self.canvas.add(self._rect)
+        self._rect.texture = texture
+        self._rect.size = texture.size
+        self.texture_size = texture.size
+        self._layout()
+
+    def cached_textures(self):
+        return [self._rect.texture]
+
+    def _layout(self, *args):
+        width, height = self.texture_size
+        self._rect.pos = (int(self.center_x - width / 2.0), int(self.center_y - height / 2.0))
+
+
+class NumericLabel(_TextWidget):
+    """A Label for changing readouts, drawn glyph by glyph from a GlyphAtlas.
+
+    Setting text only swaps texture regions on existing Rectangles; nothing
+    is rasterised unless the text has characters outside the atlas.
+    """
+
+    def __init__(self, **kwargs):
+        self._rects = []
+        self._glyphs = []
+        super().__init__(**kwargs)
+
+    def _restyle(self, *args):
+        self._atlas = texture_cache.atlas(self.font_name, self.font_size, self.bold, self.color)
+        self._render()
+
+    def _render(self, *args):
+        text = self.text
+        if self._atlas.covers(text):
+            glyphs = [self._atlas.glyphs[ch] for ch in text]
+            self._fallback = None
+        else:
+            texture = texture_cache.texture(text, self.font_name, self.font_size, self.bold, self.color)
+            glyphs = [(texture, texture.width)]
+            self._fallback = texture
+        while len(self._rects) < len(glyphs):
+            rect = Rectangle()
+            self.canvas.add(rect)
+            self._rects.append(rect)
+        for rect, (texture, advance) in zip(self._rects, glyphs):
+            rect.texture = texture
+            rect.size = (advance, texture.height)
+        for rect in self._rects[len(glyphs):]:
+            rect.size = (0, 0)
+        self._glyphs = glyphs
+        height = max((texture.height for texture, _ in glyphs), default=self._atlas.height)
+        self.texture_size = [sum(advance for _, advance in glyphs), height]
+        self._layout()
+
+    def cached_textures(self):
+        return [self._atlas.texture] + ([self._fallback] if self._fallback is not None else [])
+
+    def _layout(self, *args):
+        width, height = self.texture_size
+        x = self.center_x - width / 2.0
+        y = int(self.center_y - height / 2.0)
+        for rect, (_, advance) in zip(self._rects, self._glyphs):
+            rect.pos = (int(x), y)
+            x += advance
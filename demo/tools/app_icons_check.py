@@ -0,0 +1,146 @@
+"""Scroll a long app list and report icon cache hit rates and UI frame times.
+
+Builds an AppListView of --apps synthetic packages and scrolls it top to
+bottom three times: with an empty disk cache, again in the same session
+(texture LRU), and with a fresh loader over the same disk cache. The
+package source sleeps --fetch-ms per icon to stand in for PackageManager.
+"icon UI max" is the longest the UI thread spent on icons in one go;
+frame times also include drawing, which dominates with a software GL.
+"held KiB" counts every icon texture still referenced by a row or the
+LRU, which should stay near the LRU bound however long the list is, and
+"row widgets" the rows the RecycleView actually created; "build" is the
+time to construct the list:
+Needs a display or the offscreen driver:
+
+    SDL_VIDEODRIVER=offscreen KIVY_GL_BACKEND=sdl2 python tools/app_icons_check.py
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from kivy.app import App
+from kivy.clock import Clock
+from kivy.core.window import Window
+
+from app_icons import AppIconLoader, PackageSource
+from app_list import AppListView
+from perf import perf, percentile
+
+
+class SlowSource(PackageSource):
+    """Placeholder icons that take fetch_s each, like a real PackageManager call."""
+
+    def __init__(self, fetch_s):
+        super().__init__()
+        self.fetch_s = fetch_s
+
+    def describe(self, package):
+        time.sleep(self.fetch_s)
+        return super().describe(package)
+
+
+class CheckApp(App):
+
+    def __init__(self, args, **kwargs):
+        super().__init__(**kwargs)
+        self.args = args
+        self.cache_dir = tempfile.mkdtemp(prefix='cyn_icons_')
+        self.packages = [f'com.example.app{i:04d}' for i in range(args.apps)]
+        self.results = []
+        self.passes = [('cold disk', True), ('memory', False), ('warm disk', True)]
+
+    def build(self):
+        Window.size = (400, 900)
+        self.view = None
+        Clock.schedule_once(self.next_pass, 0.5)
+        from kivy.uix.widget import Widget
+        self.root_widget = Widget()
+        return self.root_widget
+
+    def next_pass(self, dt):
+        if not self.passes:
+            shutil.rmtree(self.cache_dir)
+            self.stop()
+            return
+        name, new_loader = self.passes.pop(0)
+        if new_loader:
+            if self.view is not None:
+                self.view.loader.close()
+            loader = AppIconLoader(self.cache_dir, source=SlowSource(self.args.fetch_ms / 1000.0))
+        else:
+            loader = self.view.loader
+        if self.view is not None:
+            self.root_widget.remove_widget(self.view)
+        before = dict(loader.counts)
+        start = time.perf_counter()
+        self.view = AppListView(self.packages, loader, lambda row: None, size=Window.size)
+        self.root_widget.add_widget(self.view)
+        build = time.perf_counter() - start
+        # Let the list lay out and draw its rows before timing the scroll.
+        Clock.schedule_once(lambda dt: self.scroll(name, loader, before, build), 1.0)
+
+    def scroll(self, name, loader, before, build):
+        perf.reset()
+        frames = []
+        state = {'last': time.perf_counter(), 'start': time.perf_counter()}
+
+        def tick(dt):
+            now = time.perf_counter()
+            frames.append(now - state['last'])
+            state['last'] = now
+            progress = (now - state['start']) / self.args.scroll_s
+            if progress < 1.0:
+                self.view.scroll_y = 1.0 - progress
+                return True
+            self.view.scroll_y = 0.0
+            Clock.schedule_once(lambda dt: self.finish_pass(name, loader, before, frames, build), 1.0)
+            return False
+
+        Clock.schedule_interval(tick, 0)
+
+    def finish_pass(self, name, loader, before, frames, build):
+        counts = {key: loader.counts[key] - before[key] for key in loader.counts}
+        lookups = counts['memory_hits'] + counts['disk_hits'] + counts['fetches']
+        loaded = self.view.loaded_count()
+        rows = list(self.view.layout_manager.children)
+        shown = self.view.icon_textures() + [row.icon for row in rows if row.icon is not None]
+        held = loader.cache.held_bytes(shown)
+        ordered = sorted(frames[1:])
+        # UI-thread time spent on icons: visible-range requests plus texture uploads.
+        spans = perf.stats()
+        ui_max = max(spans.get(key, {}).get('max_ms', 0.0) for key in ('ui.app_list.visible', 'icons.deliver'))
+        self.results.append((name, counts, lookups, loaded, len(rows), build, ordered, ui_max, loader.cache.bytes,
+                             held))
+        Clock.schedule_once(self.next_pass, 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--apps', type=int, default=300, help='packages in the list')
+    parser.add_argument('--scroll-s', type=float, default=3.0, help='time to scroll top to bottom')
+    parser.add_argument('--fetch-ms', type=float, default=20.0, help='simulated PackageManager time per icon')
+    args = parser.parse_args(argv)
+
+    perf.enabled = True
+    app = CheckApp(args)
+    app.run()
+    print(f"{'pass':10} {'mem hit':>8} {'disk hit':>9} {'fetched':>8} {'skipped':>8} {'rows loaded':>12} "
+          f"{'row widgets':>12} {'build':>9} {'frame p50':>10} {'frame max':>10} {'icon UI max':>12} "
+          f"{'LRU KiB':>8} {'held KiB':>9}")
+    for name, counts, lookups, loaded, widgets, build, ordered, ui_max, resident, held in app.results:
+        rate = lambda key: counts[key] / lookups if lookups else 0.0
+        print(f"{name:10} {rate('memory_hits'):8.0%} {rate('disk_hits'):9.0%} {counts['fetches']:8} "
+              f"{counts['skipped']:8} {loaded:12} {widgets:12} {build * 1000:7.1f}ms "
+              f"{percentile(ordered, 50) * 1000:8.1f}ms {ordered[-1] * 1000:8.1f}ms {ui_max:10.2f}ms "
+              f"{resident / 1024:8.0f} {held / 1024:9.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
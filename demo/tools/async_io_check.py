@@ -0,0 +1,140 @@
+"""UI-thread stall during file and platform I/O, run inline and on asyncio.
+
+Starts the app twice in child processes, once with App.run() (jobs run
+inline in UI callbacks, as before) and once on asyncio with async_run()
+(jobs run on the TaskRunner pool), and scripts the same session in both:
+rapid soundboard taps that each need a render, spaced taps, opening the
+settings tab with a package listing that takes --list-ms, and closing a
+settings popup and saving a custom sound, which write files. Background
+warming of the soundboard is off so the taps do the rendering.
+
+Reports the longest time the UI thread spent in each entry point, and the
+longest frame. Needs a display or the offscreen driver:
+
+    SDL_VIDEODRIVER=offscreen KIVY_GL_BACKEND=sdl2 python tools/async_io_check.py
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+DEMO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# UI-thread entry points of the scripted session.
+SPANS = ('ui.sound_tap', 'ui.build_settings_tab', 'ui.settings_flush', 'ui.custom_sound',
+         'tasks.sound.play.done', 'tasks.apps.list.done')
+SOUNDS = ('beep', 'laser', 'pop', 'chime', 'alert', 'whoosh', 'success', 'error')
+
+
+def child(mode, list_ms):
+    sys.path.insert(0, DEMO_DIR)
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    import asyncio
+
+    from kivy.clock import Clock
+    from kivy.core.window import Window
+    from kivy.uix.button import Button
+
+    import main as app_main
+    from perf import perf
+
+    perf.enabled = True
+    listed = app_main.get_installed_apps()
+
+    def slow_listing():
+        time.sleep(list_ms / 1000.0)
+        return listed
+
+    app_main.get_installed_apps = slow_listing
+    frames = []
+
+    class CheckApp(app_main.CynEnhancementsApp):
+
+        def warm_sounds(self):
+            pass
+
+        def on_interactive(self):
+            super().on_interactive()
+            Clock.schedule_once(self.rapid_taps, 0.5)
+
+        def rapid_taps(self, dt):
+            self.last_frame = time.perf_counter()
+            Clock.schedule_interval(self.frame, 0)
+            for name in SOUNDS[:4]:
+                self.play_sound(name)
+            taps = list(SOUNDS[4:])
+
+            def spaced(dt):
+                if taps:
+                    self.play_sound(taps.pop(0))
+                    return True
+                Clock.schedule_once(self.settings, 0.5)
+                return False
+
+            Clock.schedule_interval(spaced, 0.3)
+
+        def frame(self, dt):
+            now = time.perf_counter()
+            frames.append(now - self.last_frame)
+            self.last_frame = now
+
+        def settings(self, dt):
+            panel = self.tab_panel
+            settings_tab = panel.tab_list[-1]
+            settings_tab.release()
+            panel.switch_to(settings_tab)
+            Clock.schedule_once(self.popup, 1.0 + list_ms / 1000.0)
+
+        def popup(self, dt):
+            self.show_app_settings(Button(text='com.example.game1'))
+            self.settings_manager.update_app_setting('com.example.game1', 'fps_cap', 75)
+            Window.children[0].dismiss(animation=False)
+            with perf.span('ui.custom_sound'):
+                self.save_custom_sound('check', {'duration': 0.3, 'volume': 0.5,
+                                                 'voices': [{'osc': 'sine', 'freq': 700, 'gain': 0.4}]})
+            Clock.schedule_once(lambda dt: self.stop(), 1.0)
+
+    app = CheckApp()
+    if mode == 'async':
+        asyncio.run(app.async_run(async_lib='asyncio'))
+    else:
+        app.run()
+    stats = perf.stats()
+    result = {name: stats.get(name, {}).get('max_ms', 0.0) for name in SPANS}
+    result['frame_max'] = max(frames) * 1000 if frames else 0.0
+    result['tasks'] = app.tasks.stats()
+    print('RESULT ' + json.dumps(result))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--list-ms', type=float, default=300.0, help='simulated package listing time')
+    parser.add_argument('--child', choices=('sync', 'async'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child(args.child, args.list_ms)
+        return 0
+
+    results = {}
+    for mode in ('sync', 'async'):
+        env = dict(os.environ, HOME=tempfile.mkdtemp(prefix='cyn_async_'))
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode,
+                              '--list-ms', str(args.list_ms)],
+                             env=env, capture_output=True, text=True).stdout
+        lines = [line for line in out.splitlines() if line.startswith('RESULT ')]
+        if not lines:
+            print(f"{mode}: no result\n{out}")
+            return 1
+        results[mode] = json.loads(lines[-1][len('RESULT '):])
+
+    print(f"{'UI-thread max ms':24} {'inline':>8} {'asyncio':>8}")
+    for name in SPANS + ('frame_max',):
+        print(f"{name:24} {results['sync'][name]:8.1f} {results['async'][name]:8.1f}")
+    print(f"tasks (asyncio): {results['async']['tasks']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
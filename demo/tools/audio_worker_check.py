@@ -0,0 +1,165 @@
+"""UI frame times while the voice DSP runs inline, in a thread and in the worker.
+
+Simulates a 60 fps UI loop doing a fixed amount of Python work per frame
+and measures how long each frame really takes while the DSP chain runs:
+
+    idle     no DSP
+    inline   DSP on the UI thread at the real-time rate
+    thread   DSP at full load in a thread of the UI process (GIL contention)
+    process  DSP at full load in the AudioWorker child process
+
+Exits non-zero if the worker-process frame p99 exceeds the idle p99 by more
+than --tolerance-ms (on machines with more than one CPU):
+
+    python tools/audio_worker_check.py --seconds 3
+"""
+import argparse
+import array
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_worker import AudioWorker
+from perf import percentile
+from voice_engine import VoiceChangerEngine
+
+
+FRAME_S = 1 / 60.0
+BLOCK_SIZE = 1024
+SAMPLE_RATE = 44100
+
+
+def ui_work(iterations):
+    """Stand-in for a frame's layout and drawing work."""
+    total = 0
+    for i in range(iterations):
+        total += i * i
+    return total
+
+
+def calibrate(target_ms):
+    iterations = 10000
+    start = time.perf_counter()
+    ui_work(iterations)
+    elapsed = time.perf_counter() - start
+    return max(1, int(iterations * target_ms / 1000.0 / elapsed))
+
+
+def busy_engine():
+    engine = VoiceChangerEngine()
+    engine.bass, engine.mid, engine.treble = 10, -5, 5
+    engine.distortion = 30
+    return engine
+
+
+def test_block():
+    return array.array('h', (int(24000 * math.sin(2.0 * math.pi * 440 * i / SAMPLE_RATE))
+                             for i in range(BLOCK_SIZE))).tobytes()
+
+
+def run_frames(seconds, iterations, per_frame=None):
+    """Run the simulated UI loop; returns frame durations in seconds."""
+    frames = []
+    next_frame = time.perf_counter()
+    end = next_frame + seconds
+    while next_frame < end:
+        ui_work(iterations)
+        if per_frame is not None:
+            per_frame()
+        # Measured from when the frame was due, so waiting for the GIL or
+        # the CPU after the sleep counts against the frame.
+        frames.append(time.perf_counter() - next_frame)
+        next_frame += FRAME_S
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_frame = time.perf_counter()
+    return frames
+
+
+def summarize(frames, samples, seconds):
+    ordered = sorted(frames)
+    return {
+        'frames': len(frames),
+        'p50_ms': percentile(ordered, 50) * 1000,
+        'p99_ms': percentile(ordered, 99) * 1000,
+        'max_ms': ordered[-1] * 1000,
+        'over_budget': sum(1 for f in frames if f > FRAME_S),
+        'dsp_realtime_x': samples / (seconds * SAMPLE_RATE),
+    }
+
+
+def phase_idle(seconds, iterations):
+    return summarize(run_frames(seconds, iterations), 0, seconds)
+
+
+def phase_inline(seconds, iterations):
+    engine = busy_engine()
+    block = test_block()
+    state = {'due': 0.0, 'samples': 0}
+
+    def per_frame():
+        # Process whatever audio arrived since the last frame.
+        state['due'] += FRAME_S * SAMPLE_RATE
+        while state['due'] >= BLOCK_SIZE:
+            engine.process(block)
+            state['due'] -= BLOCK_SIZE
+            state['samples'] += BLOCK_SIZE
+
+    frames = run_frames(seconds, iterations, per_frame)
+    return summarize(frames, state['samples'], seconds)
+
+
+def phase_worker(seconds, iterations, mode):
+    worker = AudioWorker(sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, mode=mode)
+    worker.start()
+    try:
+        worker.send_params(busy_engine())
+        worker.set_realtime(False)
+        worker.set_output(True)
+        worker.set_source('sweep')
+        time.sleep(0.2)
+        before = worker.stats()['blocks']
+        frames = run_frames(seconds, iterations, lambda: worker.pull(1 << 20))
+        processed = worker.stats()['blocks'] - before
+    finally:
+        worker.stop()
+    return summarize(frames, processed * BLOCK_SIZE, seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=3.0, help='duration of each phase')
+    parser.add_argument('--work-ms', type=float, default=3.0, help='UI work per frame')
+    parser.add_argument('--tolerance-ms', type=float, default=2.0,
+                        help='allowed p99 increase of the process phase over idle')
+    args = parser.parse_args(argv)
+
+    iterations = calibrate(args.work_ms)
+    results = {
+        'idle': phase_idle(args.seconds, iterations),
+        'inline': phase_inline(args.seconds, iterations),
+        'thread': phase_worker(args.seconds, iterations, 'thread'),
+        'process': phase_worker(args.seconds, iterations, 'process'),
+    }
+    print(f"{'phase':8} {'frames':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'>16.7ms':>8} {'DSP x rt':>9}")
+    for name, r in results.items():
+        print(f"{name:8} {r['frames']:7} {r['p50_ms']:8.2f} {r['p99_ms']:8.2f} {r['max_ms']:8.2f} "
+              f"{r['over_budget']:8} {r['dsp_realtime_x']:9.1f}")
+    growth = results['process']['p99_ms'] - results['idle']['p99_ms']
+    if (os.cpu_count() or 1) < 2:
+        print('Only one CPU: the worker process competes with the UI for it, so the check is skipped.',
+              file=sys.stderr)
+        return 0
+    if growth > args.tolerance_ms:
+        print(f'FAIL worker process raised UI p99 by {growth:.2f} ms', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""Headless benchmarks for the synth, DSP and settings hot paths.
+
+Runs without Kivy or a display. Examples:
+
+    python tools/benchmark.py --output bench.json
+    python tools/benchmark.py --compare bench.json --threshold 0.15
+"""
+import argparse
+import array
+import itertools
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_analysis import AnalysisTap
+from settings_manager import AppSettingsManager
+from soundboard import SoundBoardManager
+from voice_engine import VoiceChangerEngine
+
+
+DSP_BLOCK_SIZES = [256, 1024, 4096]
+SETTINGS_APP_COUNTS = [10, 100, 1000]
+
+
+def measure(func, repeat):
+    """Run func `repeat` times and return timing stats in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        'runs': repeat,
+        'min_s': times[0],
+        'median_s': times[len(times) // 2],
+        'mean_s': sum(times) / len(times),
+    }
+
+
+def test_signal(num_samples, freq=440.0, sample_rate=44100):
+    """A loud sine so both EQ clamping and distortion clipping do work."""
+    samples = array.array('h', (
+        int(30000 * math.sin(2.0 * math.pi * freq * i / sample_rate))
+        for i in range(num_samples)
+    ))
+    return samples.tobytes()
+
+
+def bench_synth(workdir, repeat):
+    results = {}
+    soundboard = SoundBoardManager(sound_dir=workdir)
+    for name, config in soundboard.SOUND_TEMPLATES.items():
+        path = soundboard.sounds[name]
+
+        def render(name=name, path=path):
+            os.remove(path)
+            soundboard._create_sound(name)
+
+        stats = measure(render, repeat)
+        stats['samples'] = int(soundboard.sample_rate * config.get('duration', 0.5))
+        results[f'synth.{name}'] = stats
+    return results
+
+
+def bench_dsp(repeat):
+    results = {}
+    engine = VoiceChangerEngine()
+    engine.bass, engine.mid, engine.treble = 10, -5, 5
+    engine.distortion = 30
+    for block_size in DSP_BLOCK_SIZES:
+        block = test_signal(block_size)
+        for stage in ('apply_equalizer', 'apply_distortion'):
+            func = getattr(engine, stage)
+            stats = measure(lambda func=func: func(block), repeat)
+            stats['samples'] = block_size
+            stats['samples_per_s'] = block_size / stats['median_s'] if stats['median_s'] else 0.0
+            results[f'dsp.{stage}.{block_size}'] = stats
+        tap = AnalysisTap(sample_rate=engine.sample_rate)
+        stats = measure(lambda: tap.feed(block), repeat)
+        stats['samples'] = block_size
+        results[f'dsp.analysis_feed.{block_size}'] = stats
+
+    # One spectrum per UI refresh; feed() in between so the cache is stale.
+    for bands in (32, 64):
+        tap = AnalysisTap(sample_rate=engine.sample_rate, bands=bands)
+        block = test_signal(4096)
+
+        def analyse(tap=tap, block=block):
+            tap.feed(block)
+            tap.spectrum()
+
+        stats = measure(analyse, repeat)
+        stats['bands'] = bands
+        stats['numpy'] = tap.uses_numpy
+        results[f'dsp.analysis_spectrum.{bands}'] = stats
+    return results
+
+
+def bench_settings(workdir, repeat):
+    results = {}
+    for count in SETTINGS_APP_COUNTS:
+        path = os.path.join(workdir, f'settings_{count}.bin')
+        manager = AppSettingsManager(settings_file=path)
+        for i in range(count):
+            manager.settings[f'com.bench.app{i}'] = AppSettingsManager.DEFAULT_SETTINGS.copy()
+
+        def save_all():
+            for name in manager.settings:
+                manager.settings.mark_dirty(name)
+            manager.save_settings()
+
+        stats = measure(save_all, repeat)
+        stats['apps'] = count
+        stats['bytes'] = os.path.getsize(path)
+        results[f'settings.save.{count}'] = stats
+
+        stats = measure(lambda: manager.update_app_setting('com.bench.app0', 'fps_cap', 90), repeat)
+        stats['apps'] = count
+        results[f'settings.update.{count}'] = stats
+
+        def reload():
+            manager.settings = manager.load_settings()
+
+        stats = measure(reload, repeat)
+        stats['apps'] = count
+        results[f'settings.load.{count}'] = stats
+
+        def reload_and_get():
+            reload()
+            manager.get_app_settings(f'com.bench.app{count // 2}')
+
+        stats = measure(reload_and_get, repeat)
+        stats['apps'] = count
+        results[f'settings.load_get.{count}'] = stats
+
+        # The pre-store path: one JSON document parsed in full at startup.
+        json_path = os.path.join(workdir, f'settings_{count}.json')
+        with open(json_path, 'w') as f:
+            json.dump({name: dict(manager.settings[name]) for name in manager.settings}, f, indent=2)
+
+        def load_json():
+            with open(json_path, 'r') as f:
+                json.load(f)
+
+        stats = measure(load_json, repeat)
+        stats['apps'] = count
+        stats['bytes'] = os.path.getsize(json_path)
+        results[f'settings.load_json.{count}'] = stats
+
+        apps = list(manager.settings)
+        profiles = itertools.cycle(['battery_saver', 'performance'])
+        stats = measure(lambda: manager.apply_profile(apps, next(profiles)), repeat)
+        stats['apps'] = count
+        results[f'settings.apply_profile.{count}'] = stats
+
+        export_path = os.path.join(workdir, f'export_{count}.jsonl')
+        stats = measure(lambda: manager.export_settings(export_path), repeat)
+        stats['apps'] = count
+        stats['bytes'] = os.path.getsize(export_path)
+        results[f'settings.export.{count}'] = stats
+
+        stats = measure(lambda: manager.import_settings(export_path), repeat)
+        stats['apps'] = count
+        results[f'settings.import.{count}'] = stats
+    return results
+
+
+def run(repeat, only=None):
+    workdir = tempfile.mkdtemp(prefix='cyn_bench_')
+    try:
+        results = {}
+        if not only or 'synth' in only:
+            results.update(bench_synth(workdir, repeat))
+        if not only or 'dsp' in only:
+            results.update(bench_dsp(repeat))
+        if not only or 'settings' in only:
+            results.update(bench_settings(workdir, repeat))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'timestamp': time.time(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Return a list of (name, baseline_s, current_s, ratio) that regressed."""
+    regressions = []
+    for name, stats in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base or not base.get('median_s'):
+            continue
+        ratio = stats['median_s'] / base['median_s']
+        if ratio > 1.0 + threshold:
+            regressions.append((name, base['median_s'], stats['median_s'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per case')
+    parser.add_argument('--only', nargs='*', choices=['synth', 'dsp', 'settings'],
+                        help='restrict to these groups')
+    parser.add_argument('--output', help='write results JSON here (default: stdout)')
+    parser.add_argument('--compare', metavar='BASELINE', help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='allowed median slowdown before flagging (0.15 = 15%%)')
+    args = parser.parse_args(argv)
+
+    report = run(args.repeat, args.only)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, base_s, cur_s, ratio in regressions:
+            print(f'REGRESSION {name}: {base_s * 1000:.3f} ms -> {cur_s * 1000:.3f} ms ({ratio:.2f}x)',
+                  file=sys.stderr)
+        if regressions:
+            return 1
+        print(f'No regressions beyond {args.threshold:.0%}', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Check the fixed-point DSP kernels against the float path, and time both.
+
+For every voice preset and a sweep of gains, runs a test block through
+the previous per-sample float loop, the float kernels and the fixed-point
+kernels (pure Python, and the NumPy integer path when NumPy is installed).
+The float kernels must match the old loop exactly, the fixed-point ones
+must stay within dsp_kernels.FIXED_TOLERANCE of them, and the NumPy path
+must give exactly what the pure-Python path gives:
+
+    python tools/dsp_fixed_check.py
+"""
+import argparse
+import array
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dsp_kernels
+from dsp_kernels import FIXED_TOLERANCE, MAX_GAIN, clip, gain_fixed, gain_float
+from voice_engine import VoiceChangerEngine
+
+
+def loop_gain(samples, factor):
+    """apply_equalizer's original per-sample loop."""
+    result = array.array('h')
+    for sample in samples:
+        result.append(max(-32768, min(32767, int(sample * factor))))
+    return result
+
+
+def loop_clip(samples, threshold):
+    result = array.array('h')
+    for sample in samples:
+        result.append(threshold if sample > threshold else -threshold if sample < -threshold else sample)
+    return result
+
+
+def test_block(size, seed=1):
+    """Two tones plus noise, driven into full scale so saturation is covered."""
+    rng = random.Random(seed)
+    values = (36000 * math.sin(i * 0.031) + 9000 * math.sin(i * 0.47) + rng.uniform(-2000, 2000)
+              for i in range(size))
+    return array.array('h', (max(-32768, min(32767, int(v))) for v in values))
+
+
+def max_error(a, b):
+    return max(abs(x - y) for x, y in zip(a, b))
+
+
+def bench(func, *args, runs=50):
+    start = time.perf_counter()
+    for _ in range(runs):
+        func(*args)
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def engine_outputs(block, mode):
+    engine = VoiceChangerEngine()
+    engine.dsp_mode = mode
+    engine.distortion = 25
+    outputs = {}
+    for name in engine.VOICE_PRESETS:
+        engine.apply_preset(name)
+        out = array.array('h')
+        out.frombytes(engine.process(block.tobytes()))
+        outputs[name] = out
+    return outputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--block', type=int, default=1024, help='samples per test block')
+    args = parser.parse_args(argv)
+
+    block = test_block(args.block)
+    quiet = array.array('h', (s // 4 for s in block))
+    gains = [g / 16.0 for g in range(-32, 65)] + [0.731, 1.2 ** 3, MAX_GAIN]
+    backends = [('pure', None)]
+    if dsp_kernels.np is not None:
+        backends.append(('numpy', dsp_kernels.np))
+
+    failed = False
+    exact = all(gain_float(block, g) == loop_gain(block, g) for g in gains)
+    exact &= all(clip(block, t) == loop_clip(block, t) for t in (0, 1000, 24575, 32767))
+    print(f"float kernels match the per-sample loops: {exact}")
+    failed |= not exact
+
+    numpy = dsp_kernels.np
+    if numpy is not None:
+        outputs = []
+        for module in (None, numpy):
+            dsp_kernels.np = module
+            outputs.append(([gain_fixed(block, g) for g in gains],
+                            [clip(block, t) for t in (0, 1000, 24575, 32767)],
+                            engine_outputs(block, 'fixed')))
+        same = outputs[0] == outputs[1]
+        print(f"numpy kernels match the pure-Python ones: {same}")
+        failed |= not same
+    else:
+        print("numpy kernels: not checked, NumPy is not installed")
+
+    for name, module in backends:
+        dsp_kernels.np = module
+        worst = max(max_error(gain_fixed(block, g), gain_float(block, g)) for g in gains)
+        presets = engine_outputs(block, 'float'), engine_outputs(block, 'fixed')
+        preset_worst = max(max_error(presets[0][p], presets[1][p]) for p in presets[0])
+        ok = worst <= FIXED_TOLERANCE and preset_worst <= FIXED_TOLERANCE
+        failed |= not ok
+        print(f"fixed ({name}): max error {worst} LSB over gains, {preset_worst} LSB over presets, "
+              f"tolerance {FIXED_TOLERANCE}: {'OK' if ok else 'FAIL'}")
+
+        # Timed at a speech-like level, where saturation is rare.
+        factor = 1.2 * 0.97 * 1.05
+        print(f"  gain us/block: loop {bench(loop_gain, quiet, factor):8.1f}  "
+              f"float {bench(gain_float, quiet, factor):8.1f}  fixed {bench(gain_fixed, quiet, factor):8.1f}")
+        print(f"  clip us/block: loop {bench(loop_clip, quiet, 4096):8.1f}  "
+              f"kernel {bench(clip, quiet, 4096):8.1f}")
+    print(f"default mode on this machine: {dsp_kernels.default_mode()}")
+    print('FAIL' if failed else 'OK')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
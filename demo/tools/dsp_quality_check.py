@@ -0,0 +1,112 @@
+"""Deadline misses of the voice DSP chain with and without adaptive quality.
+
+Runs the engine and analysis tap on a real-time test signal for each
+--slowdown factor (simulated slower CPUs), once at fixed full quality and
+once with the QualityScheduler stepping quality down and back up. Then
+runs the AudioWorker with the largest factor for a while and at normal
+speed for a while, to check that its quality level drops and recovers:
+
+    python tools/dsp_quality_check.py --seconds 4 --slowdown 1 16 32
+
+Exits non-zero if adaptive quality misses more deadlines than fixed
+quality at a factor where fixed quality misses any, or the worker doesn't
+recover to full quality.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_analysis import AnalysisTap
+from audio_worker import AudioWorker, sweep_blocks
+from dsp_scheduler import QUALITY_LEVELS, QualityScheduler
+from voice_engine import VoiceChangerEngine
+
+
+BLOCK_SIZE = 1024
+SAMPLE_RATE = 44100
+
+
+def busy_engine():
+    engine = VoiceChangerEngine(SAMPLE_RATE)
+    engine.bass, engine.mid, engine.treble = 10, -5, 5
+    engine.distortion = 30
+    engine.analysis = AnalysisTap(sample_rate=SAMPLE_RATE)
+    return engine
+
+
+def run_chain(seconds, slowdown, adaptive):
+    """The worker's loop in-process: one block per period, spectrum at up to 30 Hz."""
+    engine = busy_engine()
+    scheduler = QualityScheduler(engine, BLOCK_SIZE, SAMPLE_RATE, slowdown=slowdown, adaptive=adaptive)
+    source = sweep_blocks(SAMPLE_RATE, BLOCK_SIZE)
+    start = next_block = analysed = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        block = next(source).tobytes()
+        now = time.perf_counter()
+        if scheduler.spectrum_due(now - analysed):
+            scheduler.timed(engine.analysis.spectrum)
+            analysed = now
+        scheduler.process(block)
+        next_block += BLOCK_SIZE / SAMPLE_RATE
+        delay = next_block - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_block = time.perf_counter()
+    return scheduler.stats()
+
+
+def run_worker(seconds, slowdown):
+    """(stats while slowed down, stats after as long again at normal speed)."""
+    worker = AudioWorker(SAMPLE_RATE, BLOCK_SIZE)
+    worker.start()
+    try:
+        engine = busy_engine()
+        worker.send_params(engine)
+        worker.set_slowdown(slowdown)
+        worker.set_source('sweep')
+        time.sleep(seconds)
+        slowed = worker.stats()
+        worker.set_slowdown(1.0)
+        # Recovery steps up one level per couple of seconds of headroom.
+        time.sleep(seconds + 2.5 * len(QUALITY_LEVELS))
+        worker.set_source(None)
+        time.sleep(0.2)
+        return slowed, worker.stats()
+    finally:
+        worker.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=4.0, help='run time per case')
+    parser.add_argument('--slowdown', type=float, nargs='+', default=[1.0, 16.0, 32.0],
+                        help='simulated CPU slowdown factors')
+    args = parser.parse_args(argv)
+
+    failed = False
+    print(f"{'slowdown':>8} {'quality':8} {'blocks':>7} {'misses':>7} {'down':>5} {'up':>4} "
+          f"{'load':>6}  blocks per level")
+    for slowdown in args.slowdown:
+        fixed = run_chain(args.seconds, slowdown, adaptive=False)
+        adaptive = run_chain(args.seconds, slowdown, adaptive=True)
+        for name, stats in (('fixed', fixed), ('adaptive', adaptive)):
+            print(f"{slowdown:8.1f} {name:8} {stats['blocks']:7} {stats['misses']:7} {stats['steps_down']:5} "
+                  f"{stats['steps_up']:4} {stats['load']:6.2f}  {stats['blocks_at_level']}")
+        if fixed['misses'] and adaptive['misses'] > fixed['misses']:
+            failed = True
+
+    slowed, recovered = run_worker(args.seconds, max(args.slowdown))
+    print(f"worker at {max(args.slowdown):.0f}x: {slowed}")
+    print(f"worker after recovery: {recovered}")
+    if recovered['quality_level'] != 0:
+        failed = True
+    print('FAIL' if failed else 'OK')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
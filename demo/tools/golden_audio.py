@@ -0,0 +1,199 @@
+"""Compare the sound and voice DSP output against a golden corpus.
+
+The corpus in tools/golden holds one WAV per case: every soundboard
+template rendered through SoundBoardManager._create_sound, and a fixed
+test signal (a full-scale sweep over two tones, so the gain and clipping
+paths saturate) through VoiceChangerEngine.process with every voice
+preset and with distortion. Each case is compared by max absolute error,
+RMS error and SNR; any changed case is listed, and the run fails if one
+exceeds --max-error or falls below --min-snr-db, or is missing. After an
+intended change, refresh the corpus and commit it:
+
+    python tools/golden_audio.py                 # compare
+    python tools/golden_audio.py --regenerate    # rewrite the goldens
+    python tools/golden_audio.py --dsp-mode fixed --report report.json
+
+Goldens are always rendered with the float DSP path; the default limits
+admit the fixed-point path (dsp_kernels.FIXED_TOLERANCE).
+"""
+import argparse
+import array
+import hashlib
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import wave
+from operator import mul, sub
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dsp_kernels import FIXED_TOLERANCE, MODES, np
+from soundboard import SoundBoardManager
+from voice_engine import VoiceChangerEngine
+
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+MANIFEST = 'manifest.json'
+SAMPLE_RATE = 44100
+SIGNAL_SECONDS = 0.5
+BLOCK_SIZE = 1024
+DISTORTION_LEVELS = (25, 60)
+
+
+def test_signal(sample_rate=SAMPLE_RATE, seconds=SIGNAL_SECONDS):
+    """A 100 Hz - 8 kHz exponential sweep over 220 and 1760 Hz tones, peaking past full scale."""
+    n = int(sample_rate * seconds)
+    samples = array.array('h')
+    phase = 0.0
+    for i in range(n):
+        phase += 2.0 * math.pi * 100.0 * 80.0 ** (i / n) / sample_rate
+        t = i / sample_rate
+        value = (24000 * math.sin(phase) + 9000 * math.sin(2.0 * math.pi * 220.0 * t)
+                 + 4000 * math.sin(2.0 * math.pi * 1760.0 * t))
+        samples.append(max(-32768, min(32767, int(value))))
+    return samples
+
+
+def read_wav(path):
+    with wave.open(path, 'rb') as f:
+        samples = array.array('h')
+        samples.frombytes(f.readframes(f.getnframes()))
+        return samples, f.getframerate()
+
+
+def write_wav(path, samples, sample_rate):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+
+
+def render_cases(dsp_mode='float'):
+    """{case name: array('h')} of the current code's output for every case."""
+    cases = {}
+    sound_dir = tempfile.mkdtemp(prefix='cyn_golden_')
+    try:
+        board = SoundBoardManager(sound_dir=sound_dir, preload=False, sample_rate=SAMPLE_RATE)
+        for name in board.SOUND_TEMPLATES:
+            cases[f'sound-{name}'] = read_wav(board.ensure_sound(name))[0]
+    finally:
+        shutil.rmtree(sound_dir)
+
+    signal = test_signal()
+    settings = [(f'voice-{preset}', preset, 0) for preset in VoiceChangerEngine.VOICE_PRESETS]
+    settings += [(f'distortion-{level}', 'normal', level) for level in DISTORTION_LEVELS]
+    for case, preset, distortion in settings:
+        engine = VoiceChangerEngine(SAMPLE_RATE)
+        engine.dsp_mode = dsp_mode
+        engine.apply_preset(preset)
+        engine.distortion = distortion
+        out = array.array('h')
+        for start in range(0, len(signal), BLOCK_SIZE):
+            out.frombytes(engine.process(signal[start:start + BLOCK_SIZE].tobytes()))
+        cases[case] = out
+    return cases
+
+
+def compare(golden, current):
+    """(max abs error, RMS error, SNR in dB) of current against golden, in int16 units."""
+    if len(golden) != len(current):
+        return None
+    if golden == current:
+        return 0, 0.0, math.inf
+    if np is not None:
+        g = np.frombuffer(golden, dtype=np.int16).astype(np.float64)
+        diff = np.frombuffer(current, dtype=np.int16).astype(np.float64) - g
+        max_error = int(np.abs(diff).max())
+        noise = float(np.dot(diff, diff))
+        power = float(np.dot(g, g))
+    else:
+        diff = list(map(sub, current, golden))
+        max_error = max(max(diff), -min(diff))
+        noise = float(sum(map(mul, diff, diff)))
+        power = float(sum(map(mul, golden, golden)))
+    rms = math.sqrt(noise / len(golden))
+    snr = 10.0 * math.log10(power / noise) if power else -math.inf
+    return max_error, rms, snr
+
+
+def regenerate(golden_dir):
+    os.makedirs(golden_dir, exist_ok=True)
+    cases = render_cases()
+    manifest = {'sample_rate': SAMPLE_RATE, 'signal_seconds': SIGNAL_SECONDS, 'block_size': BLOCK_SIZE,
+                'cases': {}}
+    for name, samples in sorted(cases.items()):
+        write_wav(os.path.join(golden_dir, name + '.wav'), samples, SAMPLE_RATE)
+        manifest['cases'][name] = {'samples': len(samples),
+                                   'sha256': hashlib.sha256(samples.tobytes()).hexdigest()}
+    # Goldens of cases that no longer exist would only confuse later runs.
+    for entry in os.listdir(golden_dir):
+        if entry.endswith('.wav') and entry[:-4] not in cases:
+            os.remove(os.path.join(golden_dir, entry))
+    with open(os.path.join(golden_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"wrote {len(cases)} goldens to {golden_dir}")
+
+
+def check(golden_dir, dsp_mode, max_error, min_snr_db, report_path):
+    with open(os.path.join(golden_dir, MANIFEST)) as f:
+        manifest = json.load(f)
+    cases = render_cases(dsp_mode)
+    rows = []
+    for name in sorted(set(cases) | set(manifest['cases'])):
+        if name not in manifest['cases']:
+            rows.append({'case': name, 'status': 'missing golden'})
+            continue
+        if name not in cases:
+            rows.append({'case': name, 'status': 'no longer rendered'})
+            continue
+        golden, _ = read_wav(os.path.join(golden_dir, name + '.wav'))
+        result = compare(golden, cases[name])
+        if result is None:
+            rows.append({'case': name, 'status': f'length {len(cases[name])}, golden {len(golden)}'})
+            continue
+        err, rms, snr = result
+        status = 'same' if err == 0 else 'changed'
+        if err > max_error or snr < min_snr_db:
+            status = 'FAIL'
+        rows.append({'case': name, 'status': status, 'max_error': err, 'rms_error': rms, 'snr_db': snr})
+
+    print(f"{'case':22} {'status':10} {'max err':>8} {'RMS err':>8} {'SNR dB':>8}")
+    for row in rows:
+        if 'max_error' in row:
+            print(f"{row['case']:22} {row['status']:10} {row['max_error']:8} {row['rms_error']:8.3f} "
+                  f"{row['snr_db']:8.1f}")
+        else:
+            print(f"{row['case']:22} {row['status']}")
+    changed = [row for row in rows if row['status'] != 'same']
+    failed = [row for row in changed if row['status'] not in ('changed', 'no longer rendered')]
+    print(f"{len(rows)} cases, {len(changed)} changed, {len(failed)} failed")
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump({'dsp_mode': dsp_mode, 'max_error': max_error, 'min_snr_db': min_snr_db, 'changed': changed}, f, indent=2)
+    if failed:
+        print("If the change is intended, run with --regenerate and commit tools/golden.")
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--regenerate', action='store_true', help='rewrite the goldens from the current code')
+    parser.add_argument('--golden-dir', default=GOLDEN_DIR)
+    parser.add_argument('--dsp-mode', choices=MODES, default='float', help='voice engine arithmetic to check')
+    parser.add_argument('--max-error', type=int, default=FIXED_TOLERANCE, help='largest allowed sample error')
+    parser.add_argument('--min-snr-db', type=float, default=60.0, help='lowest allowed SNR of changed cases')
+    parser.add_argument('--report', help='write the changed cases as JSON here')
+    args = parser.parse_args(argv)
+    if args.regenerate:
+        regenerate(args.golden_dir)
+        return 0
+    return check(args.golden_dir, args.dsp_mode, args.max_error, args.min_snr_db, args.report)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
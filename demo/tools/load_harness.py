@@ -0,0 +1,321 @@
+"""Headless run of the app at phone-like scale with a scripted session.
+
+Generates a synthetic package list (--apps) and a settings store holding
+--settings-apps apps with random values in a scratch home directory, then
+starts the app on SDL's offscreen video driver with the package list in
+place of get_installed_apps() and scripts a session: waiting for the app
+list, scrolling it, opening show_app_settings for --popups apps and
+dragging a slider in each, tapping soundboard buttons, dragging a voice
+slider and switching tabs. Touches go through the window like real ones.
+
+For every phase it reports frame times, the widget count, resident
+memory, bytes and write calls issued by the process, settings saves and
+files changed in the home directory (the settings store is written
+through a memory map, so it shows up under saves rather than files).
+Needs no GPU (Mesa's software GL is enough):
+
+    python tools/load_harness.py --apps 600 --settings-apps 5000
+    python tools/load_harness.py --generate-only /tmp/cyn_load   # just the files
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+DEMO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DEMO_DIR)
+
+VENDORS = ['acme', 'globex', 'initech', 'umbrella', 'hooli', 'vandelay', 'wonka', 'stark',
+           'tyrell', 'cyberdyne', 'soylent', 'aperture', 'massive', 'oscorp', 'wayne', 'gringotts']
+WORDS = ['chess', 'racer', 'notes', 'camera', 'music', 'maps', 'weather', 'chat', 'puzzle',
+         'fitness', 'wallet', 'reader', 'studio', 'arena', 'quest', 'farm', 'clock', 'scanner']
+
+
+def synthetic_packages(count, seed=0):
+    """count distinct, sorted, plausible package names."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add(f'com.{rng.choice(VENDORS)}.{rng.choice(WORDS)}{rng.randrange(1000)}')
+    return sorted(names)
+
+
+def random_settings(rng):
+    from settings_schema import SETTINGS_SCHEMA
+
+    values = {}
+    for field in SETTINGS_SCHEMA:
+        if field.kind == 'bool':
+            values[field.name] = rng.random() < 0.5
+        elif field.kind == 'enum':
+            values[field.name] = rng.choice(field.choices)
+        elif field.kind == 'int':
+            values[field.name] = rng.randint(field.lo, field.hi)
+        else:
+            values[field.name] = round(rng.uniform(field.lo, field.hi), 2)
+    return values
+
+
+def write_settings(path, packages, total, seed=0):
+    """A settings store for total apps: every package, then made-up uninstalled ones."""
+    from settings_manager import AppSettingsManager
+
+    rng = random.Random(seed)
+    names = list(packages[:total])
+    names += [f'com.removed.app{i}' for i in range(total - len(names))]
+    manager = AppSettingsManager(settings_file=path)
+    with manager.batch():
+        for name in names:
+            manager.settings[name] = random_settings(rng)
+    manager.close()
+    return os.path.getsize(path)
+
+
+def home_files(home):
+    """{path: (size, mtime)} of files under home, leaving out Kivy's own config and logs."""
+    files = {}
+    for root, dirs, names in os.walk(home):
+        dirs[:] = [d for d in dirs if d != '.kivy']
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            files[path] = (info.st_size, info.st_mtime_ns)
+    return files
+
+
+def process_io():
+    """(bytes written, write calls) of this process so far; zeros off Linux.
+
+    Settings go through a memory map, so their writes only show up in
+    the settings save count.
+    """
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(':') for line in f)
+        return int(fields['wchar']), int(fields['syscw'])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+
+def run_session(args, home, packages):
+    from kivy.clock import Clock
+    from kivy.core.window import Window
+    from kivy.tests.common import UnitTestTouch
+    from kivy.uix.popup import Popup
+    from kivy.uix.slider import Slider
+
+    import main as app_main
+    from app_list import AppListView, AppRow
+    from lazy_tabs import count_widgets
+    from perf import memory_usage, percentile, perf
+
+    perf.enabled = True
+    app_main.get_installed_apps = lambda: list(packages)
+    rng = random.Random(args.seed)
+    results = []
+
+    def tab(name):
+        return next(t for t in app.tab_panel.tab_list if t.text == name)
+
+    def find(root, kind):
+        return [w for w in root.walk(restrict=True) if isinstance(w, kind)]
+
+    def drag(widget, steps=10, span=0.6):
+        """Press near the left of widget, move right through span of its width, release."""
+        x, y = widget.to_window(widget.x + widget.width * 0.2, widget.center_y)
+        touch = UnitTestTouch(x, y)
+        touch.touch_down()
+        # Hold still first: inside a ScrollView, a quick move would scroll.
+        yield 0.35
+        for i in range(1, steps + 1):
+            touch.touch_move(x + widget.width * span * i / steps, y)
+            yield 1 / 60.0
+        touch.touch_up()
+
+    def tap(widget):
+        touch = UnitTestTouch(*widget.to_window(*widget.center))
+        touch.touch_down()
+        touch.touch_up()
+
+    def startup():
+        while not find(tab('Settings').content, AppListView):
+            yield 0.05
+
+    def scroll():
+        view = find(tab('Settings').content, AppListView)[0]
+        start = time.perf_counter()
+        while time.perf_counter() - start < args.scroll_s:
+            view.scroll_y = 1.0 - (time.perf_counter() - start) / args.scroll_s
+            yield 0
+        view.scroll_y = 0.0
+        yield 0.5
+
+    def popups():
+        view = find(tab('Settings').content, AppListView)[0]
+        for _ in range(args.popups):
+            app.show_app_settings(rng.choice(find(view, AppRow)))
+            yield 0.2
+            popup = next(w for w in Window.children if isinstance(w, Popup))
+            yield from drag(find(popup, Slider)[0])
+            yield 0.1
+            popup.dismiss(animation=False)
+            yield 0.2
+
+    def soundboard():
+        app.tab_panel.switch_to(tab('Soundboard'))
+        yield 0.3
+        buttons = [w for w in tab('Soundboard').content.walk(restrict=True)
+                   if w.__class__.__name__ == 'Button']
+        for button in rng.sample(buttons, min(args.taps, len(buttons))):
+            tap(button)
+            yield 0.15
+        yield 0.5
+
+    def voice():
+        app.tab_panel.switch_to(tab('Voice'))
+        yield 0.3
+        for slider in find(tab('Voice').content, Slider)[:3]:
+            yield from drag(slider)
+            yield 0.1
+
+    def tabs():
+        for _ in range(args.switches):
+            for name in ('Settings', 'Soundboard', 'Voice'):
+                app.tab_panel.switch_to(tab(name))
+                yield 0.2
+
+    phases = [('startup', startup), ('scroll', scroll), ('popups', popups),
+              ('soundboard', soundboard), ('voice', voice), ('tabs', tabs)]
+
+    class HarnessApp(app_main.CynEnhancementsApp):
+
+        def on_interactive(self):
+            super().on_interactive()
+            self.frames = []
+            self.last_frame = time.perf_counter()
+            Clock.schedule_interval(self.frame, 0)
+            self.next_phase()
+
+        def frame(self, dt):
+            now = time.perf_counter()
+            self.frames.append(now - self.last_frame)
+            self.last_frame = now
+
+        def next_phase(self):
+            if not phases:
+                Clock.schedule_once(lambda dt: self.stop(), 0)
+                return
+            name, script = phases.pop(0)
+            self.phase = {'name': name, 'start': time.perf_counter(), 'io': process_io(),
+                          'files': home_files(home), 'saves': self.save_calls()}
+            self.frames = []
+            steps = script()
+
+            def step(dt):
+                try:
+                    delay = next(steps)
+                except StopIteration:
+                    self.end_phase()
+                    return
+                Clock.schedule_once(step, delay)
+
+            Clock.schedule_once(step, 0)
+
+        def save_calls(self):
+            return perf.stats().get('settings.save', {}).get('calls', 0)
+
+        def end_phase(self):
+            phase = self.phase
+            written, calls = process_io()
+            before = phase['files']
+            changed = {path: info for path, info in home_files(home).items() if before.get(path) != info}
+            frames = sorted(self.frames)
+            widgets = self.tab_panel.widget_count() + sum(
+                count_widgets(w) for w in Window.children if w is not self.tab_panel)
+            results.append({
+                'phase': phase['name'],
+                'seconds': time.perf_counter() - phase['start'],
+                'frames': len(frames),
+                'frame_p50_ms': percentile(frames, 50) * 1000 if frames else 0.0,
+                'frame_p95_ms': percentile(frames, 95) * 1000 if frames else 0.0,
+                'frame_max_ms': frames[-1] * 1000 if frames else 0.0,
+                'widgets': widgets,
+                'rss_kb': memory_usage()['rss_kb'],
+                'written_kb': (written - phase['io'][0]) / 1024,
+                'write_calls': calls - phase['io'][1],
+                'settings_saves': self.save_calls() - phase['saves'],
+                'files_changed': len(changed),
+                'changed_kb': sum(size for size, _ in changed.values()) / 1024,
+            })
+            self.next_phase()
+
+    import asyncio
+
+    app = HarnessApp()
+    asyncio.run(app.async_run(async_lib='asyncio'))
+    return results, memory_usage()['peak_rss_kb']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--apps', type=int, default=600, help='installed packages')
+    parser.add_argument('--settings-apps', type=int, default=5000,
+                        help='apps in the settings store; it grows in doubling steps, 5000 makes 2.7 MB')
+    parser.add_argument('--popups', type=int, default=5, help='settings popups to open')
+    parser.add_argument('--taps', type=int, default=6, help='soundboard buttons to tap')
+    parser.add_argument('--switches', type=int, default=3, help='rounds of tab switching')
+    parser.add_argument('--scroll-s', type=float, default=3.0, help='time to scroll the app list')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the results here')
+    parser.add_argument('--keep', action='store_true', help='keep the scratch home directory')
+    parser.add_argument('--generate-only', metavar='DIR', help='write the synthetic files to DIR and exit')
+    args = parser.parse_args(argv)
+
+    home = args.generate_only or tempfile.mkdtemp(prefix='cyn_load_')
+    os.makedirs(home, exist_ok=True)
+    # Before Kivy is imported: it keeps its config under HOME and picks the
+    # window and audio drivers at import.
+    os.environ['HOME'] = home
+    os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    os.environ.setdefault('KIVY_GL_BACKEND', 'sdl2')
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+    packages = synthetic_packages(args.apps, args.seed)
+    start = time.perf_counter()
+    size = write_settings(os.path.join(home, 'app_settings.bin'), packages, args.settings_apps, args.seed)
+    print(f"generated {len(packages)} packages and {args.settings_apps} apps of settings "
+          f"({size / 1024:.0f} KiB) in {time.perf_counter() - start:.1f} s under {home}")
+    if args.generate_only:
+        with open(os.path.join(home, 'packages.txt'), 'w') as f:
+            f.write('\n'.join(packages) + '\n')
+        return 0
+
+    try:
+        results, peak_kb = run_session(args, home, packages)
+    finally:
+        if not args.keep:
+            shutil.rmtree(home, ignore_errors=True)
+
+    print(f"{'phase':11} {'secs':>5} {'frames':>6} {'p50 ms':>7} {'p95 ms':>7} {'max ms':>7} "
+          f"{'widgets':>7} {'RSS MiB':>8} {'written KiB':>11} {'writes':>6} {'saves':>5} {'files':>5}")
+    for r in results:
+        print(f"{r['phase']:11} {r['seconds']:5.1f} {r['frames']:6} {r['frame_p50_ms']:7.1f} "
+              f"{r['frame_p95_ms']:7.1f} {r['frame_max_ms']:7.1f} {r['widgets']:7} {r['rss_kb'] / 1024:8.1f} "
+              f"{r['written_kb']:11.1f} {r['write_calls']:6} {r['settings_saves']:5} {r['files_changed']:5}")
+    print(f"peak RSS {peak_kb / 1024:.1f} MiB")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'phases': results, 'peak_rss_kb': peak_kb}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Memory held by the app's caches, and what simulated pressure frees.
+
+Starts the app headless with --apps installed packages and their settings,
+fills the caches (every tab built, soundboard taps, voice previews,
+settings of --decode apps read), then pauses and resumes it (a trim at
+ui_hidden) and sends itself SIGUSR1 and SIGUSR2, the desktop stand-ins for
+onTrimMemory(RUNNING_CRITICAL) and onTrimMemory(COMPLETE). Prints what
+each registered subsystem held before and after each trim, then uses
+every tab again to check the app recovers:
+
+    python tools/memory_pressure_check.py --apps 600 --decode 2000
+
+Exits non-zero if the pause trimmed decoded settings or the soundboard, a
+signalled trim freed nothing, or a tab doesn't rebuild.
+"""
+import argparse
+import os
+import shutil
+import signal
+import sys
+import tempfile
+
+DEMO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DEMO_DIR)
+
+from load_harness import synthetic_packages, write_settings
+
+
+def run(args, packages):
+    from kivy.clock import Clock
+    from kivy.uix.button import Button
+
+    import main as app_main
+
+    app_main.get_installed_apps = lambda: packages[:args.apps]
+    reports = []
+    usage = {}
+    rebuilt = {}
+
+    class CheckApp(app_main.CynEnhancementsApp):
+
+        def on_interactive(self):
+            super().on_interactive()
+            steps = self.script()
+            Clock.schedule_once(lambda dt: self.step(steps), 0.5)
+
+        def step(self, steps):
+            try:
+                delay = next(steps)
+            except StopIteration:
+                self.stop()
+                return
+            Clock.schedule_once(lambda dt: self.step(steps), delay)
+
+        def tab(self, name):
+            return next(t for t in self.tab_panel.tab_list if t.text == name)
+
+        def script(self):
+            for name in ('Soundboard', 'Voice', 'Settings'):
+                self.tab_panel.switch_to(self.tab(name))
+                yield 1.0
+            for sound in list(self.soundboard.templates)[:args.taps]:
+                self.play_sound(sound)
+                yield 0.3
+            self.play_voice_preview()
+            yield 3.0
+            for package in packages[:args.decode]:
+                self.settings_manager.get_app_settings(package)
+            self.show_app_settings(Button(text=packages[0]))
+            yield 0.5
+            self.root_window.children[0].dismiss(animation=False)
+            yield 0.5
+            usage['filled'] = self.memory.usage()
+            self.on_pause()
+            reports.append(self.memory.last_report)
+            self.on_resume()
+            yield 0.5
+            for signum in (signal.SIGUSR1, signal.SIGUSR2):
+                os.kill(os.getpid(), signum)
+                yield 0.5
+                reports.append(self.memory.last_report)
+            for name in ('Soundboard', 'Voice', 'Settings'):
+                self.tab_panel.switch_to(self.tab(name))
+                yield 1.0
+                rebuilt[name] = self.tab(name).built
+            self.play_sound('beep')
+            yield 0.5
+            usage['after'] = self.memory.usage()
+
+    import asyncio
+
+    app = CheckApp()
+    asyncio.run(app.async_run(async_lib='asyncio'))
+    return usage, reports, rebuilt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--apps', type=int, default=600, help='installed packages')
+    parser.add_argument('--decode', type=int, default=2000, help='apps whose settings are read')
+    parser.add_argument('--taps', type=int, default=6, help='soundboard sounds to play')
+    args = parser.parse_args(argv)
+
+    home = tempfile.mkdtemp(prefix='cyn_memory_')
+    os.environ['HOME'] = home
+    os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    os.environ.setdefault('KIVY_GL_BACKEND', 'sdl2')
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    packages = synthetic_packages(max(args.apps, args.decode))
+    write_settings(os.path.join(home, 'app_settings.bin'), packages, len(packages))
+    try:
+        usage, reports, rebuilt = run(args, packages)
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    failed = len(reports) != 3 or None in reports
+    names = list(usage.get('filled', {}))
+    header = f"{'KiB':16} {'filled':>8}" + ''.join(f" {r['level']:>17}" for r in reports if r)
+    print(header + f" {'after reuse':>12}")
+    for name in names:
+        row = f"{name:16} {usage['filled'][name] / 1024:8.0f}"
+        row += ''.join(f" {r['consumers'][name][1] / 1024:17.0f}" for r in reports if r)
+        print(row + f" {usage['after'][name] / 1024:12.0f}")
+    for report in reports:
+        if report:
+            freed = report['before_bytes'] - report['after_bytes']
+            print(f"{report['level']}: freed {freed / 1024:.0f} KiB in {report['ms']:.1f} ms, "
+                  f"RSS {report['rss_kb'][0] / 1024:.1f} -> {report['rss_kb'][1] / 1024:.1f} MiB")
+            if report['reason'] == 'pause':
+                kept = [name for name in ('settings', 'soundboard') if name not in report['trimmed']]
+                if len(kept) != 2:
+                    failed = True
+            elif freed <= 0:
+                failed = True
+    print(f"tabs rebuilt: {rebuilt}")
+    if not rebuilt or not all(rebuilt.values()):
+        failed = True
+    print('FAIL' if failed else 'OK')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
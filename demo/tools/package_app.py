@@ -0,0 +1,399 @@
+"""Stage the app as the APK ships it and report size and startup time.
+
+The APK build does three things to the Python payload, configured in
+buildozer.spec: python-for-android byte-compiles the sources with -OO,
+source.exclude_patterns leaves out dead files (main_old.py, the
+pre-rewrite app that imports numpy, scipy and a matplotlib garden
+backend), and android.blacklist_src drops the Kivy modules listed in
+tools/apk_blacklist.txt, a hand-kept list. --check verifies that list
+against the Kivy modules a real headless session imports, the app's own
+kivy imports, and every import statement in the Kivy modules that ship,
+so a listed module can't fail to import on the device only. Without
+--check this script reproduces
+the build's payload in a stage directory and reports its size next to
+every source byte-compiled and unpruned Kivy, and the
+interpreter-start-to-first-frame time with raw sources (no bytecode, then
+cached bytecode) and with the staged -OO bytecode. Payload sizes are zip-compressed like an APK entry;
+desktop Kivy binaries stand in for the Android ones, so compare the
+differences rather than the totals, or pass two built APKs with --apk:
+
+    python tools/package_app.py --check          # verify tools/apk_blacklist.txt
+    python tools/package_app.py --runs 5
+    python tools/package_app.py --apk bin/before.apk bin/after.apk
+"""
+import argparse
+import ast
+import configparser
+import fnmatch
+import io
+import json
+import os
+import py_compile
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+DEMO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SPEC = os.path.join(DEMO_DIR, 'buildozer.spec')
+BLACKLIST = os.path.join(DEMO_DIR, 'tools', 'apk_blacklist.txt')
+# Always skipped by buildozer.
+SKIP_DIRS = ('.buildozer', 'bin', '__pycache__')
+
+# Imports in shipped Kivy modules of blacklisted ones that never run on
+# Android, with the reason; any other such import fails --check.
+GUARDED_IMPORTS = {
+    ('kivy/app.py', 'kivy.uix.settings'): 'only in App.create_settings(), which open_settings() never reaches',
+    ('kivy/core/audio/__init__.py', 'kivy.lib.gstplayer'): 'inside try/except ImportError',
+    ('kivy/core/text/__init__.py', 'kivy.core.text.text_pango'): 'only when Pango is the text provider',
+    ('kivy/input/providers/mtdev.py', 'kivy.lib.mtdev'): 'a Linux-only input provider',
+}
+
+
+def read_spec():
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read(SPEC)
+    app = parser['app']
+
+    def values(key):
+        return [v.strip() for v in app.get(key, '').split(',') if v.strip()]
+
+    return {'include_exts': values('source.include_exts'), 'exclude_dirs': values('source.exclude_dirs'),
+            'exclude_patterns': values('source.exclude_patterns')}
+
+
+def app_files(spec, excludes=True):
+    """Paths relative to DEMO_DIR that buildozer copies; without excludes, as before exclude_patterns."""
+    files = []
+    for root, dirs, names in os.walk(DEMO_DIR):
+        rel_root = os.path.relpath(root, DEMO_DIR)
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d not in SKIP_DIRS
+                         and os.path.normpath(os.path.join(rel_root, d)) not in spec['exclude_dirs'])
+        for name in sorted(names):
+            rel = os.path.normpath(os.path.join(rel_root, name))
+            if os.path.splitext(name)[1][1:] not in spec['include_exts']:
+                continue
+            if excludes and any(fnmatch.fnmatch(rel, p) for p in spec['exclude_patterns']):
+                continue
+            files.append(rel)
+    return files
+
+
+def stage(spec, dest, excludes=True):
+    """Copy the shipped files to dest with every .py compiled to a sourceless -OO .pyc."""
+    shutil.rmtree(dest, ignore_errors=True)
+    for rel in app_files(spec, excludes):
+        target = os.path.join(dest, rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if rel.endswith('.py'):
+            py_compile.compile(os.path.join(DEMO_DIR, rel), cfile=target + 'c', dfile=rel, optimize=2,
+                               doraise=True)
+        else:
+            shutil.copy2(os.path.join(DEMO_DIR, rel), target)
+    return dest
+
+
+def zipped_size(base, files):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for rel in files:
+            zf.write(os.path.join(base, rel), rel)
+    return buf.tell()
+
+
+def kivy_dir():
+    import importlib.util
+    return os.path.dirname(importlib.util.find_spec('kivy').origin)
+
+
+def kivy_files():
+    """Paths under site-packages of every file in the Kivy package, bytecode caches aside."""
+    base = os.path.dirname(kivy_dir())
+    files = []
+    for root, dirs, names in os.walk(os.path.join(base, 'kivy')):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        files.extend(os.path.relpath(os.path.join(root, name), base) for name in sorted(names))
+    return base, files
+
+
+def module_name(rel):
+    """Dotted module of a .py or extension file, None for data files."""
+    parts = rel.replace(os.sep, '/').split('/')
+    stem, ext = os.path.splitext(parts[-1])
+    if ext == '.so':
+        stem = stem.split('.')[0]
+    elif ext != '.py':
+        return None
+    parts[-1] = stem
+    if stem == '__init__':
+        parts.pop()
+    return '.'.join(parts)
+
+
+def imports_in(path):
+    """(line, module) of every absolute import statement in a source file, run or not."""
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), path)
+    found = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            found.extend((node.lineno, alias.name) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            found.append((node.lineno, node.module))
+            found.extend((node.lineno, f'{node.module}.{alias.name}') for alias in node.names)
+    return found
+
+
+def static_kivy_imports(spec):
+    """Kivy modules named by import statements in the shipped sources."""
+    found = set()
+    for rel in app_files(spec):
+        if rel.endswith('.py'):
+            found.update(name for _, name in imports_in(os.path.join(DEMO_DIR, rel)))
+    return {name for name in found if name == 'kivy' or name.startswith('kivy.')}
+
+
+def blacklisted(rel, patterns):
+    # python-for-android matches each pattern as '*/' + pattern against the bundled path.
+    path = '_python_bundle/site-packages/' + rel.replace(os.sep, '/')
+    return any(fnmatch.fnmatch(path, '*/' + p) for p in patterns)
+
+
+def read_blacklist():
+    if not os.path.exists(BLACKLIST):
+        return []
+    with open(BLACKLIST) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def child_env(home):
+    # Bytecode of every case, Kivy and the stdlib included, is cached under
+    # home, like the APK where all of it ships precompiled; -B runs compile
+    # everything from source.
+    env = dict(os.environ, HOME=home, SDL_VIDEODRIVER=os.environ.get('SDL_VIDEODRIVER', 'offscreen'),
+               SDL_AUDIODRIVER=os.environ.get('SDL_AUDIODRIVER', 'dummy'),
+               KIVY_GL_BACKEND=os.environ.get('KIVY_GL_BACKEND', 'sdl2'), KIVY_NO_ARGS='1',
+               PYTHONPYCACHEPREFIX=os.path.join(home, 'pycache'))
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+
+# Run from a file (Kivy looks up the app class's source) with the
+# interpreter flags under test, in the app directory.
+STARTUP_CHILD = '''
+import json
+import os
+import sys
+sys.path.insert(0, os.getcwd())
+import main as app_main
+from perf import startup
+
+class StartupApp(app_main.CynEnhancementsApp):
+    def on_interactive(self):
+        super().on_interactive()
+        print('RESULT ' + json.dumps(startup.report()))
+        self.stop()
+
+StartupApp().run()
+'''
+
+
+def run_child(command, app_dir, home):
+    """Run command in app_dir with HOME=home; returns the JSON it prints after RESULT, or None."""
+    done = subprocess.run(command, cwd=app_dir, env=child_env(home), capture_output=True, text=True)
+    lines = [line for line in done.stdout.splitlines() if line.startswith('RESULT ')]
+    if not lines:
+        print(f"{command[1:]} in {app_dir}: no result\n{done.stderr[-2000:]}")
+        return None
+    return json.loads(lines[-1][len('RESULT '):])
+
+
+def child_trace(app_dir):
+    """A session touching every tab and sound path; prints the Kivy modules imported."""
+    sys.path.insert(0, app_dir)
+    import asyncio
+
+    from kivy.clock import Clock
+    from kivy.uix.button import Button
+
+    import main as app_main
+
+    class TraceApp(app_main.CynEnhancementsApp):
+
+        def on_interactive(self):
+            super().on_interactive()
+            steps = self.script()
+            Clock.schedule_once(lambda dt: self.step(steps), 0.5)
+
+        def step(self, steps):
+            try:
+                delay = next(steps)
+            except StopIteration:
+                self.stop()
+                return
+            Clock.schedule_once(lambda dt: self.step(steps), delay)
+
+        def script(self):
+            for tab in list(self.tab_panel.tab_list):
+                self.tab_panel.switch_to(tab)
+                yield 1.0
+            for name in list(self.soundboard.templates)[:3]:
+                self.play_sound(name)
+                yield 0.3
+            self.play_voice_preview()
+            self.play_test_signal(duration=0.5)
+            yield 1.5
+            self.show_app_settings(Button(text='com.example.game1'))
+            yield 0.5
+            self.root_window.children[0].dismiss(animation=False)
+            yield 0.5
+
+    app = TraceApp()
+    asyncio.run(app.async_run(async_lib='asyncio'))
+    print('RESULT ' + json.dumps(sorted(name for name in sys.modules if name.startswith('kivy'))))
+
+
+def check(spec):
+    """Fail if anything the APK can import is in tools/apk_blacklist.txt."""
+    patterns = read_blacklist()
+    base, files = kivy_files()
+    modules = {module_name(rel): rel for rel in files if module_name(rel)}
+    shipped = [rel for rel in files if not blacklisted(rel, patterns)]
+
+    def dropped(name):
+        rel = modules.get(name)
+        return rel is not None and blacklisted(rel, patterns)
+
+    home = tempfile.mkdtemp(prefix='cyn_package_')
+    traced = run_child([sys.executable, os.path.abspath(__file__), '--child', 'trace', '--app-dir', DEMO_DIR],
+                       DEMO_DIR, home)
+    shutil.rmtree(home, ignore_errors=True)
+    if traced is None:
+        return 1
+    static = static_kivy_imports(spec)
+    problems = [f"imported in a headless session: {name}" for name in sorted(traced) if dropped(name)]
+    problems += [f"imported by the app: {name}" for name in sorted(static) if dropped(name)]
+    guarded = set()
+    for rel in shipped:
+        if not rel.endswith('.py'):
+            continue
+        path = rel.replace(os.sep, '/')
+        for line, name in imports_in(os.path.join(base, rel)):
+            if not dropped(name):
+                continue
+            if (path, name) in GUARDED_IMPORTS:
+                guarded.add((path, name))
+            else:
+                problems.append(f"imported by {path}:{line}: {name}")
+    print(f"{len(patterns)} patterns leave out {len(files) - len(shipped)} of {len(files)} Kivy files; "
+          f"{len(traced)} modules traced, {len(static)} imported by the app")
+    for path, name in sorted(guarded):
+        print(f"guarded: {path} imports {name}, {GUARDED_IMPORTS[path, name]}")
+    for path, name in sorted(set(GUARDED_IMPORTS) - guarded):
+        print(f"GUARDED_IMPORTS entry no longer needed: {path} imports {name}")
+    for problem in problems:
+        print(f"blacklisted but {problem}")
+    print('FAIL' if problems else 'OK')
+    return 1 if problems else 0
+
+
+def startup_times(cases, runs):
+    """{case: median ms from interpreter start to each startup mark}, or None for a case that failed.
+
+    Cases take turns, so drift in machine load spreads over all of them;
+    the first round only warms caches.
+    """
+    # A home, and so a bytecode cache, per case: -B still reads caches.
+    homes = {name: tempfile.mkdtemp(prefix='cyn_package_') for name, _, _ in cases}
+    for home in homes.values():
+        with open(os.path.join(home, 'startup_child.py'), 'w') as f:
+            f.write(STARTUP_CHILD)
+    results = {name: [] for name, _, _ in cases}
+    for _ in range(runs + 1):
+        for name, app_dir, flags in cases:
+            script = os.path.join(homes[name], 'startup_child.py')
+            results[name].append(run_child([sys.executable, *flags, script], app_dir, homes[name]))
+    for home in homes.values():
+        shutil.rmtree(home, ignore_errors=True)
+    medians = {}
+    for name, runs_of_case in results.items():
+        runs_of_case = runs_of_case[1:]
+        if None in runs_of_case:
+            medians[name] = None
+            continue
+        medians[name] = {mark: statistics.median(r[mark] for r in runs_of_case)
+                         for mark in ('imports_done', 'first_frame', 'interactive')}
+    return medians
+
+
+def report(spec, runs, apks):
+    stage_dir = stage(spec, os.path.join(tempfile.gettempdir(), 'cyn_stage'))
+    # What the build shipped before exclude_patterns: every source, also byte-compiled.
+    baseline_dir = stage(spec, tempfile.mkdtemp(prefix='cyn_baseline_'), excludes=False)
+
+    def listing(base):
+        return [os.path.relpath(os.path.join(root, name), base) for root, _, names in os.walk(base) for name in names]
+
+    raw_files = app_files(spec, excludes=False)
+    baseline_files = listing(baseline_dir)
+    staged_files = listing(stage_dir)
+    patterns = read_blacklist()
+    kivy_base, kivy_all = kivy_files()
+    kivy_kept = [rel for rel in kivy_all if not blacklisted(rel, patterns)]
+
+    sizes = [
+        ('app', zipped_size(baseline_dir, baseline_files), zipped_size(stage_dir, staged_files),
+         len(baseline_files), len(staged_files)),
+        ('kivy', zipped_size(kivy_base, kivy_all), zipped_size(kivy_base, kivy_kept), len(kivy_all), len(kivy_kept)),
+    ]
+    print(f"{'payload (zipped)':18} {'before KiB':>10} {'after KiB':>10} {'files':>12}")
+    for name, before, after, n_before, n_after in sizes:
+        print(f"{name:18} {before / 1024:10.0f} {after / 1024:10.0f} {n_before:5} -> {n_after:4}")
+    before = sum(s[1] for s in sizes)
+    after = sum(s[2] for s in sizes)
+    print(f"{'total':18} {before / 1024:10.0f} {after / 1024:10.0f}   ({(before - after) / 1024:.0f} KiB less)")
+    if apks:
+        old, new = (os.path.getsize(path) for path in apks)
+        print(f"{'APK':18} {old / 1024:10.0f} {new / 1024:10.0f}")
+
+    # The raw sources, copied so no existing __pycache__ is picked up.
+    raw_dir = tempfile.mkdtemp(prefix='cyn_raw_')
+    for rel in raw_files:
+        os.makedirs(os.path.join(raw_dir, os.path.dirname(rel)), exist_ok=True)
+        shutil.copy2(os.path.join(DEMO_DIR, rel), os.path.join(raw_dir, rel))
+    cases = [('sources, no bytecode', raw_dir, ('-B',)), ('sources, cached .pyc', raw_dir, ()),
+             ('staged -OO .pyc', stage_dir, ('-OO',))]
+    print(f"{'startup ms (median)':22} {'imports':>8} {'first frame':>11} {'interactive':>11}")
+    failed = False
+    for name, result in startup_times(cases, runs).items():
+        if result is None:
+            failed = True
+            continue
+        print(f"{name:22} {result['imports_done']:8.0f} {result['first_frame']:11.0f} {result['interactive']:11.0f}")
+    shutil.rmtree(raw_dir, ignore_errors=True)
+    shutil.rmtree(baseline_dir, ignore_errors=True)
+    print('FAIL' if failed else 'OK')
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--check', action='store_true', help='verify tools/apk_blacklist.txt')
+    parser.add_argument('--runs', type=int, default=5, help='startup runs per case')
+    parser.add_argument('--apk', nargs=2, metavar=('BEFORE', 'AFTER'), help='built APKs to compare')
+    parser.add_argument('--child', choices=('trace',), help=argparse.SUPPRESS)
+    parser.add_argument('--app-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child == 'trace':
+        child_trace(args.app_dir)
+        return 0
+    spec = read_spec()
+    if args.check:
+        return check(spec)
+    return report(spec, args.runs, args.apk)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Check the voice preview cache: disk hits, equalizer reuse and superseded renders.
+
+Renders previews into a temporary cache directory through the same calls
+the Voice tab makes, and checks which of PreviewCache.counts each step
+moves: a repeat of the same settings, or of settings that differ only in
+pitch and speed, must be a disk hit, a distortion-only change must reuse
+the equalizer stage, a render whose generation was superseded must stop
+without writing a clip, and switching the sample rate (as
+configure_audio() does) must write clips at the new rate:
+
+    python tools/preview_cache_check.py --sample-rate 48000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_engine import VoiceChangerEngine
+from voice_preview import PreviewCache, preset_params, voice_params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sample-rate', type=int, default=48000, help='rate set after construction')
+    parser.add_argument('--preset', default='deep', choices=sorted(VoiceChangerEngine.VOICE_PRESETS),
+                        help='voice preset to start from')
+    args = parser.parse_args(argv)
+
+    cache_dir = tempfile.mkdtemp(prefix='cyn_previews_')
+    # Built at the engine's default rate, then switched, like the app.
+    previews = PreviewCache(cache_dir)
+    previews.set_sample_rate(args.sample_rate)
+    base = preset_params(args.preset, VoiceChangerEngine().dsp_mode)
+    # Integer steps within the Voice tab's slider ranges.
+    distorted = dict(base, distortion=(base['distortion'] + 25) % 100)
+    bass = dict(base, bass=base['bass'] + 5)
+    # Pitch and speed aren't processed, so they share the clip of base.
+    engine = VoiceChangerEngine()
+    engine.apply_preset(args.preset)
+    engine.dsp_mode = base['dsp_mode']
+    engine.pitch_shift += 7
+    engine.speed = 1.5
+    unprocessed = voice_params(engine)
+
+    def rate_of(path):
+        with wave.open(path) as wav_file:
+            return wav_file.getframerate()
+
+    def stale(params):
+        generation = previews.supersede()
+        previews.supersede()
+        return previews.render(params, generation)
+
+    def at_rate(params, sample_rate):
+        previews.set_sample_rate(sample_rate)
+        return previews.render(params)
+
+    other_rate = 44100 if args.sample_rate != 44100 else 48000
+    # (step, call, counter that must move by one, the others staying put, expected clip rate)
+    steps = [
+        ('first render', lambda: previews.render(base), 'renders', args.sample_rate),
+        ('same settings', lambda: previews.render(base), 'hits', args.sample_rate),
+        ('pitch and speed only', lambda: previews.render(unprocessed), 'hits', args.sample_rate),
+        ('distortion only', lambda: previews.render(distorted), 'eq_reused', args.sample_rate),
+        ('superseded', lambda: stale(bass), 'superseded', None),
+        ('current generation', lambda: previews.render(bass, previews.supersede()), 'renders', args.sample_rate),
+        ('other rate', lambda: at_rate(base, other_rate), 'renders', other_rate),
+    ]
+    # A distortion-only render also counts as a render.
+    also = {'distortion only': {'renders'}}
+
+    failed = False
+    print(f"{'step':20} {'hits':>5} {'renders':>8} {'eq reused':>10} {'superseded':>11} {'rate':>6} "
+          f"{'time':>9}  result")
+    for name, call, counter, rate in steps:
+        before = dict(previews.counts)
+        start = time.perf_counter()
+        path = call()
+        elapsed = time.perf_counter() - start
+        delta = {key: previews.counts[key] - before[key] for key in before}
+        expected = {key: int(key == counter or key in also.get(name, ())) for key in delta}
+        ok = delta == expected
+        if rate is None:
+            ok &= path is None and len(os.listdir(cache_dir)) == previews.counts['renders']
+            clip_rate = '-'
+        else:
+            clip_rate = rate_of(path) if path else 0
+            ok &= clip_rate == rate
+        failed |= not ok
+        print(f"{name:20} {delta['hits']:5} {delta['renders']:8} {delta['eq_reused']:10} "
+              f"{delta['superseded']:11} {clip_rate:>6} {elapsed * 1000:7.1f}ms  {'ok' if ok else 'FAIL'}")
+    shutil.rmtree(cache_dir)
+    print('FAIL' if failed else 'OK')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Crash-safety checks for the memory-mapped settings store.
+
+Simulates torn slot writes, damaged index entries, a damaged header and
+format migrations against a scratch store, and exits non-zero on any
+failure:
+
+    python tools/settings_crash_check.py
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settings_manager import AppSettingsManager
+from settings_schema import encode_settings
+from settings_store import INDEX_ENTRY, SettingsStore
+
+
+def populate(path, count=10):
+    manager = AppSettingsManager(settings_file=path)
+    with manager.batch():
+        for i in range(count):
+            manager.update_app_setting(f'com.check.app{i}', 'fps_cap', 30 + i % 100)
+    manager.close()
+
+
+def slot_offsets(path, app_name):
+    store = SettingsStore(path)
+    store.open()
+    slot = store.index[app_name]
+    offsets = [store._slot_offset(slot, copy) for copy in (0, 1)]
+    newest = max((c for c in (store._read_copy(slot, 0), store._read_copy(slot, 1)) if c))[1]
+    size = store.slot_size
+    store.close()
+    return offsets, newest, size
+
+
+def patch(path, offset, data):
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        f.write(data)
+
+
+def check_torn_slot_write(workdir):
+    """Half of a new slot write lands: the previous value must survive."""
+    path = os.path.join(workdir, 'torn.bin')
+    populate(path)
+    manager = AppSettingsManager(settings_file=path)
+    manager.update_app_setting('com.check.app3', 'fps_cap', 120)
+    manager.close()
+
+    _, newest, size = slot_offsets(path, 'com.check.app3')
+    with open(path, 'rb') as f:
+        f.seek(newest)
+        slot = f.read(size)
+    patch(path, newest + size // 2, bytes(b ^ 0x5a for b in slot[size // 2:]))
+
+    manager = AppSettingsManager(settings_file=path)
+    value = manager.get_app_settings('com.check.app3')['fps_cap']
+    others = [manager.get_app_settings(f'com.check.app{i}')['fps_cap'] for i in range(10) if i != 3]
+    assert value == 33, f'expected previous value 33 after torn write, got {value}'
+    assert others == [30 + i for i in range(10) if i != 3], others
+
+    manager.update_app_setting('com.check.app3', 'fps_cap', 90)
+    manager.close()
+    manager = AppSettingsManager(settings_file=path)
+    assert manager.get_app_settings('com.check.app3')['fps_cap'] == 90
+    manager.close()
+
+
+def check_both_copies_corrupt(workdir):
+    """Both copies damaged: that app falls back to defaults, others load."""
+    path = os.path.join(workdir, 'both.bin')
+    populate(path)
+    offsets, _, size = slot_offsets(path, 'com.check.app5')
+    for offset in offsets:
+        patch(path, offset, b'\xff' * size)
+    manager = AppSettingsManager(settings_file=path)
+    assert manager.get_app_settings('com.check.app5')['fps_cap'] == 60
+    assert manager.get_app_settings('com.check.app6')['fps_cap'] == 36
+    assert manager.skipped_records == 1, manager.skipped_records
+    manager.close()
+
+
+def check_damaged_index_entry(workdir):
+    """A damaged index entry drops only that app; later slots stay aligned."""
+    path = os.path.join(workdir, 'index.bin')
+    populate(path)
+    store = SettingsStore(path)
+    store.open()
+    offset = store.index_offset + store.index['com.check.app2'] * INDEX_ENTRY.size
+    store.close()
+    patch(path, offset + 10, b'\x00\x01\x02')
+    manager = AppSettingsManager(settings_file=path)
+    assert 'com.check.app2' not in manager.settings
+    assert manager.get_app_settings('com.check.app9')['fps_cap'] == 39
+    assert manager.skipped_records == 1, manager.skipped_records
+    manager.close()
+
+
+def check_growth_and_reopen(workdir):
+    path = os.path.join(workdir, 'grow.bin')
+    populate(path, count=300)
+    manager = AppSettingsManager(settings_file=path)
+    assert len(manager.settings) == 300
+    assert manager.get_app_settings('com.check.app299')['fps_cap'] == 129
+    manager.close()
+
+
+def check_migrations(workdir):
+    json_base = os.path.join(workdir, 'legacy')
+    with open(json_base + '.json', 'w') as f:
+        json.dump({'com.check.json': {'fps_cap': 75, 'shadow_quality': 'ultra'}}, f)
+    manager = AppSettingsManager(settings_file=json_base + '.bin')
+    assert manager.get_app_settings('com.check.json')['fps_cap'] == 75
+    manager.close()
+
+    records = os.path.join(workdir, 'records.bin')
+    with open(records, 'wb') as f:
+        f.write(encode_settings({'com.check.records': dict(AppSettingsManager.DEFAULT_SETTINGS, fps_cap=45)}))
+    manager = AppSettingsManager(settings_file=records)
+    assert manager.get_app_settings('com.check.records')['fps_cap'] == 45
+    manager.close()
+
+
+def check_corrupt_header(workdir):
+    path = os.path.join(workdir, 'header.bin')
+    populate(path)
+    patch(path, 0, b'XXXX')
+    manager = AppSettingsManager(settings_file=path)
+    assert os.path.exists(path + '.corrupt')
+    manager.update_app_setting('com.check.new', 'fps_cap', 50)
+    manager.close()
+
+
+CHECKS = [
+    check_torn_slot_write,
+    check_both_copies_corrupt,
+    check_damaged_index_entry,
+    check_growth_and_reopen,
+    check_migrations,
+    check_corrupt_header,
+]
+
+
+def main():
+    failures = 0
+    for check in CHECKS:
+        workdir = tempfile.mkdtemp(prefix='cyn_crash_')
+        try:
+            check(workdir)
+            print(f'ok    {check.__name__}')
+        except Exception as e:
+            failures += 1
+            print(f'FAIL  {check.__name__}: {e!r}')
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Concurrency stress check for AppSettingsManager.
+
+Writer threads hammer update_app_setting on a shared set of apps (each
+thread owns one key, so a lost read-modify-write shows up as a stale
+value), while saver threads force syncs and reader threads check every
+snapshot they get against the schema. The store is then reopened and
+every last write must be there. Exits non-zero on any failure:
+
+    python tools/settings_stress.py --writers 8 --updates 2000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settings_manager import AppSettingsManager
+from settings_schema import FIELDS, SETTINGS_SCHEMA
+
+
+INT_KEYS = [field for field in SETTINGS_SCHEMA if field.kind == 'int']
+
+
+def run(writers, updates, apps, readers, savers):
+    workdir = tempfile.mkdtemp(prefix='cyn_stress_')
+    path = os.path.join(workdir, 'settings.bin')
+    errors = []
+    try:
+        manager = AppSettingsManager(settings_file=path)
+        app_names = [f'com.stress.app{i}' for i in range(apps)]
+        expected = {}
+        expected_lock = threading.Lock()
+        stop = threading.Event()
+
+        def writer(index):
+            field = INT_KEYS[index % len(INT_KEYS)]
+            rng = random.Random(index)
+            last = {}
+            for _ in range(updates):
+                app_name = rng.choice(app_names)
+                value = rng.randint(field.lo, field.hi)
+                manager.update_app_setting(app_name, field.name, value)
+                last[app_name] = value
+            with expected_lock:
+                for app_name, value in last.items():
+                    expected[(app_name, field.name)] = value
+
+        def reader():
+            rng = random.Random()
+            while not stop.is_set():
+                snapshot = manager.get_app_settings(rng.choice(app_names))
+                try:
+                    if set(snapshot) != set(FIELDS):
+                        raise ValueError(f'incomplete snapshot: {sorted(snapshot)}')
+                    for key, value in snapshot.items():
+                        FIELDS[key].validate(value)
+                except ValueError as e:
+                    errors.append(f'reader: {e}')
+                    return
+
+        def saver():
+            while not stop.is_set():
+                manager.save_settings()
+                time.sleep(0.001)
+
+        # A single thread owns each key, so run at most one writer per key.
+        writers = min(writers, len(INT_KEYS))
+        background = [threading.Thread(target=reader) for _ in range(readers)]
+        background += [threading.Thread(target=saver) for _ in range(savers)]
+        workers = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        start = time.perf_counter()
+        for thread in background + workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        stop.set()
+        for thread in background:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        manager.close()
+
+        reopened = AppSettingsManager(settings_file=path)
+        lost = [(app_name, key, value, reopened.get_app_settings(app_name)[key])
+                for (app_name, key), value in expected.items()
+                if reopened.get_app_settings(app_name)[key] != value]
+        if lost:
+            errors.append(f'{len(lost)} lost update(s), e.g. {lost[:3]}')
+        if reopened.skipped_records:
+            errors.append(f'{reopened.skipped_records} corrupt record(s) after reopen')
+        reopened.close()
+        return {
+            'updates': writers * updates,
+            'elapsed_s': elapsed,
+            'updates_per_s': writers * updates / elapsed,
+            'errors': errors,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=len(INT_KEYS))
+    parser.add_argument('--updates', type=int, default=2000, help='updates per writer')
+    parser.add_argument('--apps', type=int, default=50)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--savers', type=int, default=2)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for round_no in range(args.rounds):
+        result = run(args.writers, args.updates, args.apps, args.readers, args.savers)
+        status = 'FAIL' if result['errors'] else 'ok'
+        print(f"{status:5} round {round_no + 1}: {result['updates']} updates in "
+              f"{result['elapsed_s']:.2f}s ({result['updates_per_s']:.0f}/s)")
+        for error in result['errors']:
+            print(f'      {error}')
+        failed = failed or bool(result['errors'])
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
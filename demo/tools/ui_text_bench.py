@@ -0,0 +1,134 @@
+"""Popup build time and text texture memory with and without the text cache.
+
+Opens the per-app settings popup repeatedly, once with plain Kivy Labels
+and once with the cached StaticLabel/NumericLabel, forcing every text
+texture to be rasterised so both sides pay for the text they show. Each
+variant starts after a full garbage collection, so neither pays for
+collecting the other's popups. The readout glyph atlas is built first and
+timed on its own, as the app builds it after startup. Also times slider
+readout updates. Needs a display or the offscreen driver:
+
+    SDL_VIDEODRIVER=offscreen KIVY_GL_BACKEND=sdl2 python tools/ui_text_bench.py
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Settings written by the popup go to a scratch home, not the user's.
+os.environ['HOME'] = tempfile.mkdtemp(prefix='cyn_bench_')
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+
+import main as app_main
+from perf import percentile
+from text_cache import NumericLabel, StaticLabel, prepare_atlas, texture_bytes, texture_cache
+
+
+def label_texture_bytes(popup):
+    """Rasterise every text texture in the popup; returns the bytes plain Labels hold.
+
+    Kivy fills text textures when they are first drawn; binding them here
+    makes that happen inside the timed section.
+    """
+    total = 0
+    for widget in popup.walk():
+        if isinstance(widget, Label):
+            widget.texture_update()
+            widget.texture.bind()
+            total += texture_bytes(widget.texture)
+        elif isinstance(widget, StaticLabel):
+            widget._rect.texture.bind()
+    return total
+
+
+def bench_popup(app, runs):
+    """Popup build times and the text texture bytes each open allocates.
+
+    Plain Labels (the popup title, buttons and spinners in both variants)
+    each own a texture; cached labels only add what texture_cache grows by.
+    """
+    instance = Button(text='com.example.game1')
+    gc.collect()
+    times = []
+    new_bytes = []
+    for _ in range(runs):
+        cache_before = texture_cache.bytes
+        start = time.perf_counter()
+        app.show_app_settings(instance)
+        popup = Window.children[0]
+        own = label_texture_bytes(popup)
+        times.append(time.perf_counter() - start)
+        new_bytes.append(own + texture_cache.bytes - cache_before)
+        popup.dismiss(animation=False)
+    ordered = sorted(times[1:]) or times
+    return {
+        'first_ms': times[0] * 1000,
+        'median_ms': percentile(ordered, 50) * 1000,
+        'first_kib': new_bytes[0] / 1024,
+        'repeat_kib': sum(new_bytes[1:]) / max(1, runs - 1) / 1024,
+    }
+
+
+def bench_readout(label_class, updates):
+    label = label_class(text='fps_cap: 30', size=(300, 30))
+    start = time.perf_counter()
+    for i in range(updates):
+        label.text = f'fps_cap: {30 + i % 211}'
+        if isinstance(label, Label):
+            label.texture_update()
+            label.texture.bind()
+    return (time.perf_counter() - start) / updates * 1e6
+
+
+class BenchApp(app_main.CynEnhancementsApp):
+
+    def __init__(self, args, **kwargs):
+        super().__init__(**kwargs)
+        self.args = args
+        self.results = {}
+
+    def on_first_frame(self, *args):
+        Window.unbind(on_flip=self.on_first_frame)
+        Clock.schedule_once(self.run_bench, 0)
+
+    def run_bench(self, dt):
+        static, numeric = app_main.StaticLabel, app_main.NumericLabel
+        app_main.StaticLabel = app_main.NumericLabel = Label
+        self.results['Label'] = bench_popup(self, self.args.runs)
+        self.results['Label']['readout_us'] = bench_readout(Label, self.args.updates)
+        app_main.StaticLabel, app_main.NumericLabel = static, numeric
+        start = time.perf_counter()
+        prepare_atlas()
+        self.atlas_ms = (time.perf_counter() - start) * 1000
+        self.results['cached'] = bench_popup(self, self.args.runs)
+        self.results['cached']['readout_us'] = bench_readout(NumericLabel, self.args.updates)
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='popup opens per variant')
+    parser.add_argument('--updates', type=int, default=500, help='readout text changes per variant')
+    args = parser.parse_args(argv)
+
+    app = BenchApp(args)
+    app.run()
+    print(f"{'labels':8} {'first ms':>9} {'median ms':>10} {'first KiB':>10} {'repeat KiB':>11} {'readout us':>11}")
+    for name, r in app.results.items():
+        print(f"{name:8} {r['first_ms']:9.1f} {r['median_ms']:10.1f} {r['first_kib']:10.1f} "
+              f"{r['repeat_kib']:11.1f} {r['readout_us']:11.1f}")
+    print(f"glyph atlas built ahead: {app.atlas_ms:.1f} ms")
+    print(f"text cache: {texture_cache.stats()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Quality and speed of the wavetable oscillator against per-sample math.sin.
+
+Renders every sound template with the original per-sample renderer and
+as a compiled synth graph, and reports render times and the max absolute
+sample error. Exits non-zero if any error exceeds --max-error:
+
+    python tools/wavetable_check.py --repeat 5
+"""
+import argparse
+import array
+import math
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from soundboard import SoundBoardManager
+from synth_graph import compile_graph, tone
+
+
+# The templates as they were defined for legacy_render().
+LEGACY_TEMPLATES = {
+    'beep': {'freq': 800, 'duration': 0.5, 'volume': 0.7},
+    'success': {'freq': [600, 900], 'duration': 0.8, 'volume': 0.7},
+    'error': {'freq': [300, 150], 'duration': 0.6, 'volume': 0.7},
+    'click': {'freq': 1000, 'duration': 0.1, 'volume': 0.7},
+    'notification': {'freq': [500, 700, 900], 'duration': 0.4, 'volume': 0.6},
+    'alert': {'freq': 'sweep', 'duration': 0.5, 'volume': 0.8},
+    'chime': {'freq': 1200, 'duration': 0.6, 'volume': 0.5},
+    'laser': {'freq': 'down', 'duration': 0.2, 'volume': 0.6},
+    'pop': {'freq': 150, 'duration': 0.15, 'volume': 0.5},
+    'whoosh': {'freq': 'sweep', 'duration': 0.3, 'volume': 0.6},
+}
+
+
+def legacy_render(config, num_samples, sample_rate=44100):
+    """The renderer soundboard used before the wavetable, kept as the reference."""
+    frames = []
+    if config['freq'] == 'sweep':
+        for i in range(num_samples):
+            env = 1.0 - (i / num_samples) * 0.8
+            freq = 2000 - 1500 * (i / num_samples)
+            sample = int(32767 * 0.4 * env * math.sin(2.0 * math.pi * freq * i / sample_rate))
+            frames.append(struct.pack('<h', sample))
+    elif config['freq'] == 'down':
+        for i in range(num_samples):
+            env = 1.0 - (i / num_samples)
+            freq = 2000 - 1500 * (i / num_samples)
+            sample = int(32767 * 0.4 * env * math.sin(2.0 * math.pi * freq * i / sample_rate))
+            frames.append(struct.pack('<h', sample))
+    elif isinstance(config['freq'], list):
+        for i in range(num_samples):
+            idx = int((i / num_samples) * (len(config['freq']) - 1))
+            freq = config['freq'][idx]
+            sample = int(32767 * 0.3 * math.sin(2.0 * math.pi * freq * i / sample_rate))
+            frames.append(struct.pack('<h', sample))
+    else:
+        for i in range(num_samples):
+            freq = config['freq']
+            sample = int(32767 * 0.5 * math.sin(2.0 * math.pi * freq * i / sample_rate))
+            frames.append(struct.pack('<h', sample))
+    samples = array.array('h')
+    samples.frombytes(b''.join(frames))
+    return samples
+
+
+def direct_glide(num_samples, freq, end_freq, amplitude, sample_rate=44100):
+    """Per-sample math.sin of the integrated phase of a linear glide."""
+    rate = (end_freq - freq) / (2.0 * num_samples * sample_rate)
+    return array.array('h', (
+        int(amplitude * math.sin(2.0 * math.pi * (freq * i / sample_rate + rate * i * i)))
+        for i in range(num_samples)
+    ))
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def max_error(reference, candidate):
+    if len(reference) != len(candidate):
+        return float('inf')
+    return max(abs(a - b) for a, b in zip(reference, candidate))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case (best is reported)')
+    parser.add_argument('--max-error', type=int, default=1, help='allowed max abs error in LSB')
+    args = parser.parse_args(argv)
+
+    rate = 44100
+    cases = []
+    for name, graph in SoundBoardManager.SOUND_TEMPLATES.items():
+        config = LEGACY_TEMPLATES[name]
+        num_samples = int(rate * config['duration'])
+        cases.append((name,
+                      lambda c=config, n=num_samples: legacy_render(c, n, rate),
+                      lambda g=graph: compile_graph(g, rate).render()))
+    # User-defined tones: an odd steady pitch and a true glide.
+    cases.append(('custom 437.5 Hz',
+                  lambda: legacy_render({'freq': 437.5}, rate, rate),
+                  lambda: compile_graph(tone(437.5, duration=1.0), rate).render()))
+    cases.append(('custom glide 220->880',
+                  lambda: direct_glide(rate, 220.0, 880.0, 32767 * 0.5, rate),
+                  lambda: compile_graph(tone(220.0, duration=1.0, glide_to=880.0), rate).render()))
+
+    failed = False
+    total_ref = total_new = 0.0
+    print(f"{'sound':24} {'math.sin':>10} {'wavetable':>10} {'speedup':>8} {'max err':>8}")
+    for name, reference, candidate in cases:
+        ref_s, ref = best_of(reference, args.repeat)
+        new_s, new = best_of(candidate, args.repeat)
+        error = max_error(ref, new)
+        total_ref += ref_s
+        total_new += new_s
+        flag = '' if error <= args.max_error else '  FAIL'
+        failed = failed or bool(flag)
+        print(f'{name:24} {ref_s * 1000:8.2f}ms {new_s * 1000:8.2f}ms {ref_s / new_s:7.1f}x {error:8}{flag}')
+    print(f"{'total':24} {total_ref * 1000:8.2f}ms {total_new * 1000:8.2f}ms {total_ref / total_new:7.1f}x")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
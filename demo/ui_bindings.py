@@ -0,0 +1,58 @@
+from kivy.clock import Clock
+
+from perf import perf
+
+
+def bind_coalesced(slider, on_change, on_commit=None):
+    """Bind a slider so continuous motion costs at most one update per frame.
+
+    on_change(value) runs once per frame while the value is moving, through
+    a Clock trigger. on_commit(value) runs with the final value when the
+    drag is released, or straight after on_change for programmatic changes
+    made while no touch is active. Expensive work such as writing settings
+    belongs in on_commit.
+    """
+    # Touches pressed on the slider, by uid; only those it grabbed and that
+    # haven't ended hold back the commit. Wheel scrolls are never grabbed,
+    # and a touch taken over by a parent may never reach our touch_up.
+    touches = {}
+    last = {'value': None}
+
+    def dragging():
+        for uid, touch in list(touches.items()):
+            if touch.time_end != -1 or not any(ref() is slider for ref in touch.grab_list):
+                del touches[uid]
+        return bool(touches)
+
+    def flush(dt=None):
+        value = slider.value
+        if value != last['value']:
+            last['value'] = value
+            perf.count('ui.slider.updates')
+            on_change(value)
+
+    trigger = Clock.create_trigger(lambda dt: (flush(), None if dragging() else commit()))
+
+    def commit():
+        if on_commit is not None:
+            perf.count('ui.slider.commits')
+            on_commit(slider.value)
+
+    def on_value(instance, value):
+        perf.count('ui.slider.events')
+        trigger()
+
+    def on_touch_down(instance, touch):
+        if not instance.disabled and instance.collide_point(*touch.pos) and not touch.is_mouse_scrolling:
+            touches[touch.uid] = touch
+        return False
+
+    def on_touch_up(instance, touch):
+        if touches.pop(touch.uid, None) is not None:
+            # This runs before Slider.on_touch_up sets the final value; the
+            # trigger flushes and commits on the next tick, after it.
+            trigger()
+        return False
+
+    slider.bind(value=on_value, on_touch_down=on_touch_down, on_touch_up=on_touch_up)
+    return trigger
@@ -0,0 +1,190 @@
+import array
+import glob
+import hashlib
+import json
+import os
+import threading
+import wave
+
+from perf import perf
+from synth_graph import compile_graph, graph_digest
+from voice_engine import VoiceChangerEngine
+
+
+# The preview phrase: three voiced syllables on a falling-rising pitch
+# contour, a harmonic stack with a breathy onset. It is a synth graph
+# rather than a recording so it ships as code and renders in a few ms.
+_CONTOUR = [[0, 140], [0.34, 175], [0.68, 118]]
+_SYLLABLES = [[0, 0.0], [0.03, 1.0], [0.28, 0.8], [0.32, 0.0], [0.36, 0.0], [0.39, 1.0], [0.62, 0.7],
+              [0.66, 0.0], [0.7, 0.0], [0.73, 1.0], [0.92, 0.5], [1, 0.0]]
+PHRASE = {
+    'duration': 1.2,
+    'volume': 0.8,
+    'voices': [
+        {'osc': 'sine', 'steps': [[p, f * harmonic] for p, f in _CONTOUR], 'gain': gain, 'env': _SYLLABLES}
+        for harmonic, gain in ((1, 0.34), (2, 0.24), (3, 0.17), (4, 0.11), (5, 0.07))
+    ] + [
+        {'osc': 'noise', 'gain': 0.06, 'seed': 7,
+         'env': [[0, 1.0], [0.03, 0.0], [0.36, 0.0], [0.38, 1.0], [0.41, 0.0], [0.7, 0.0], [0.72, 1.0],
+                 [0.75, 0.0], [1, 0.0]]},
+    ],
+}
+
+# Engine attributes a preview depends on, besides VoiceChangerEngine.DSP_VERSION:
+# those process() applies. Pitch, speed, reverb and echo aren't processed,
+# so they aren't previewed either and don't split the cache.
+PARAMS = ('bass', 'mid', 'treble', 'distortion', 'dsp_mode')
+EQ_PARAMS = ('bass', 'mid', 'treble', 'dsp_mode')
+BLOCK_SIZE = 4096
+
+
+def voice_params(engine):
+    """The settings of engine that a preview is rendered from."""
+    return {name: getattr(engine, name) for name in PARAMS}
+
+
+def preset_params(preset, dsp_mode):
+    engine = VoiceChangerEngine()
+    engine.apply_preset(preset)
+    engine.dsp_mode = dsp_mode
+    return voice_params(engine)
+
+
+class PreviewCache:
+    """Preview clips of voice settings: PHRASE through the voice chain.
+
+    Clips are WAV files in cache_dir named by a digest of the settings,
+    the DSP version, the sample rate and the phrase, so an engine change
+    never plays a stale clip. render() is thread-safe and meant for a
+    background pool. It keeps the dry phrase and the last equalizer output
+    in memory, so a tweak that only changes distortion skips the equalizer.
+    A render started with a generation stops between blocks once
+    supersede() has been called again, so dragging a slider doesn't queue
+    up renders of every value passed on the way.
+    """
+
+    MAX_FILES = 40
+
+    def __init__(self, cache_dir=None, sample_rate=44100):
+        self.cache_dir = cache_dir or os.path.join(os.path.expanduser('~'), 'voice_previews')
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._phrase = None
+        # (equalizer settings, their output for the phrase)
+        self._eq_stage = None
+        self._generation = 0
+        self.counts = {'hits': 0, 'renders': 0, 'eq_reused': 0, 'superseded': 0}
+
+    def set_sample_rate(self, sample_rate):
+        """Render at sample_rate from now on (e.g. the output device's native rate)."""
+        with self._lock:
+            if sample_rate != self.sample_rate:
+                self.sample_rate = sample_rate
+                # Clips are keyed by rate; the in-memory stages are at the old one.
+                self._phrase = None
+                self._eq_stage = None
+
+    def key(self, params):
+        text = json.dumps([params, VoiceChangerEngine.DSP_VERSION, graph_digest(PHRASE, self.sample_rate)],
+                          sort_keys=True)
+        return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+    def path(self, params):
+        return os.path.join(self.cache_dir, f'preview-{self.key(params)}.wav')
+
+    def supersede(self):
+        """Start a new generation; renders of older ones stop early. Returns the new one."""
+        self._generation += 1
+        return self._generation
+
+    def render(self, params, generation=None):
+        """Path of the clip for params, rendering it if needed; None if superseded."""
+        path = self.path(params)
+        if os.path.exists(path):
+            self._count('hits')
+            return path
+        with self._lock:
+            if os.path.exists(path):
+                self._count('hits')
+                return path
+            with perf.span('preview.render'):
+                samples = self._process(params, generation)
+            if samples is None:
+                self._count('superseded')
+                return None
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_file = path + '.tmp'
+                with wave.open(tmp_file, 'w') as wav_file:
+                    wav_file.setnchannels(1)
+                    wav_file.setsampwidth(2)
+                    wav_file.setframerate(self.sample_rate)
+                    wav_file.writeframes(samples.tobytes())
+                os.replace(tmp_file, path)
+                self._prune(path)
+            except OSError as e:
+                print(f"Error writing voice preview: {e}")
+                return None
+            self._count('renders')
+            return path
+
+    def _process(self, params, generation):
+        engine = VoiceChangerEngine(self.sample_rate)
+        for name, value in params.items():
+            setattr(engine, name, value)
+        phrase = self._phrase
+        if phrase is None:
+            phrase = self._phrase = compile_graph(PHRASE, self.sample_rate).render()
+        eq_key = tuple(params[name] for name in EQ_PARAMS)
+        stage = self._eq_stage
+        if stage is not None and stage[0] == eq_key:
+            equalized = stage[1]
+            self._count('eq_reused')
+        else:
+            equalized = self._run(engine.apply_equalizer, phrase, generation)
+            if equalized is None:
+                return None
+            self._eq_stage = (eq_key, equalized)
+        return self._run(engine.apply_distortion, equalized, generation)
+
+    def _run(self, stage, samples, generation):
+        """stage applied to samples block by block, or None once generation is superseded."""
+        out = array.array('h')
+        for start in range(0, len(samples), BLOCK_SIZE):
+            if generation is not None and generation != self._generation:
+                return None
+            block = stage(samples[start:start + BLOCK_SIZE].tobytes())
+            out.frombytes(block)
+        return out
+
+    def _prune(self, keep):
+        """Delete the oldest clips beyond MAX_FILES, e.g. of slider positions long passed."""
+        paths = glob.glob(os.path.join(glob.escape(self.cache_dir), 'preview-*.wav'))
+        if len(paths) <= self.MAX_FILES:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.MAX_FILES]:
+            if path != keep:
+                os.remove(path)
+
+    def resident_bytes(self):
+        """Bytes of the dry phrase and equalizer output kept for incremental renders."""
+        stage = self._eq_stage
+        total = 0
+        for samples in (self._phrase, stage[1] if stage else None):
+            if samples:
+                total += samples.itemsize * len(samples)
+        return total
+
+    def trim_memory(self, level):
+        """Drop the in-memory stages; the next render starts from the phrase graph."""
+        # A render in progress keeps its own references.
+        self._phrase = None
+        self._eq_stage = None
+
+    def _count(self, name):
+        self.counts[name] += 1
+        perf.count(f'preview.{name}')
+
+    def stats(self):
+        return dict(self.counts)
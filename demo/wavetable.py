@@ -0,0 +1,92 @@
+import array
+import cmath
+import math
+from fractions import Fraction
+
+
+# One shared sine cycle, with a guard point so index + 1 never wraps.
+TABLE_BITS = 12
+TABLE_SIZE = 1 << TABLE_BITS
+TABLE_MASK = TABLE_SIZE - 1
+SINE_TABLE = array.array('d', (math.sin(2.0 * math.pi * k / TABLE_SIZE) for k in range(TABLE_SIZE + 1)))
+# Slope to the next entry, for linear interpolation.
+SINE_DELTAS = array.array('d', (SINE_TABLE[k + 1] - SINE_TABLE[k] for k in range(TABLE_SIZE)))
+
+
+
+def ramp(start, end, num_samples):
+    """start + (end - start) * i / num_samples for i in range(num_samples)."""
+    if start == end:
+        return [start] * num_samples
+    step = (end - start) / num_samples
+    levels = []
+    level = start
+    for _ in range(num_samples):
+        levels.append(level)
+        level += step
+    return levels
+
+
+def phases(num_samples, freq, end_freq=None, sample_rate=44100, phase=0.0):
+    """Oscillator phase in cycles for each sample, from a phase accumulator.
+
+    With end_freq the frequency glides linearly from freq towards end_freq
+    over num_samples; the accumulator's increment is itself ramped by a
+    fixed step each sample.
+    """
+    increment = freq / sample_rate
+    step = 0.0
+    if end_freq is not None and end_freq != freq:
+        step = (end_freq - freq) / (num_samples * sample_rate)
+        # Half a step up front centres each increment on its sample interval,
+        # which keeps the phase exact for the quadratic a glide produces.
+        increment += step / 2
+    result = []
+    for _ in range(num_samples):
+        result.append(phase)
+        phase += increment
+        increment += step
+    return result
+
+
+def sine(phase_values):
+    """Interpolated table lookup of sin(2*pi*phase) for each phase."""
+    table = SINE_TABLE
+    deltas = SINE_DELTAS
+    result = []
+    for phase in phase_values:
+        position = phase * TABLE_SIZE
+        whole = math.floor(position)
+        index = whole & TABLE_MASK
+        result.append(table[index] + deltas[index] * (position - whole))
+    return result
+
+
+def glide_sine(num_samples, freq, end_freq, sample_rate=44100, phase=0.0):
+    """sin(2*pi*phase) of a linear glide, from a rotating phasor.
+
+    The same accumulator as phases(), kept as a unit phasor: each sample
+    rotates it by the current increment, and the increment is itself
+    rotated by a fixed step. Glides don't use the table: looking it up and
+    interpolating per sample costs more than the two complex multiplies.
+    """
+    step = (end_freq - freq) / (num_samples * sample_rate) if num_samples > 0 else 0.0
+    phasor = cmath.exp(2j * math.pi * phase)
+    increment = cmath.exp(2j * math.pi * (freq / sample_rate + step / 2))
+    rotation = cmath.exp(2j * math.pi * step)
+    result = []
+    for _ in range(num_samples):
+        result.append(phasor.imag)
+        phasor *= increment
+        increment *= rotation
+    return result
+
+def steady_period(freq, sample_rate):
+    """Samples after which a tone at freq repeats exactly, or None if irregular."""
+    try:
+        cycles_per_sample = Fraction(freq) / Fraction(sample_rate)
+    except (TypeError, ValueError):
+        return None
+    period = cycles_per_sample.denominator
+    return period if period <= sample_rate else None
+